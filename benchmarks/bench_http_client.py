@@ -0,0 +1,72 @@
+"""Connections and wall time for many downloads from a single host.
+
+Serves synthetic constraints files from a local keep-alive ``http.server`` and
+downloads them once with ``urllib.request.urlopen`` (one connection per file)
+and once with the pooled ``HTTPClient``. Real hosts add a TLS handshake and a
+network round trip to every new connection, so the saving grows there.
+
+Usage::
+
+    python benchmarks/bench_http_client.py [files]
+"""
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from mxdev.httpclient import HTTPClient
+from urllib import request
+
+import sys
+import threading
+import time
+
+
+BODY = "".join(f"package-{i}==1.0.{i}\n" for i in range(2000)).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        type(self).connections += 1
+        super().setup()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+
+def main() -> None:
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{httpd.server_address[1]}/constraints-{i}.txt" for i in range(files)]
+    opener = request.build_opener(request.ProxyHandler({}))
+
+    Handler.connections = 0
+    start = time.perf_counter()
+    for url in urls:
+        with opener.open(url) as fio:
+            fio.read()
+    elapsed = time.perf_counter() - start
+    print(f"{'urlopen':>10}: {elapsed:7.3f}s, {Handler.connections} connections")
+
+    Handler.connections = 0
+    start = time.perf_counter()
+    with HTTPClient() as client:
+        for url in urls:
+            client.get(url)
+    elapsed = time.perf_counter() - start
+    print(f"{'HTTPClient':>10}: {elapsed:7.3f}s, {Handler.connections} connections")
+    print(f"{files} requests, {client.stats.handshakes_saved} handshakes saved")
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Per-line cost of constraint filtering on a large synthetic constraints file.
+
+Compares processing each line with plain key lists (the filter is compiled
+for every line) against a ``RequirementFilter`` compiled once per run.
+
+Usage::
+
+    python benchmarks/bench_requirement_filter.py [lines] [keys]
+"""
+
+from io import StringIO
+from mxdev.processing import process_io
+from mxdev.processing import RequirementFilter
+
+import sys
+import time
+
+
+def synthetic_constraints(lines: int) -> str:
+    return "".join(f"package-{i}=={i % 10}.{i % 7}.{i % 3}\n" for i in range(lines))
+
+
+def run(content: str, keys: list[str], compiled: bool) -> float:
+    requirements: list[str] = []
+    constraints: list[str] = []
+    requirement_filter = RequirementFilter(keys, keys, keys) if compiled else None
+    start = time.perf_counter()
+    with StringIO(content) as fio:
+        if compiled:
+            process_io(fio, requirements, constraints, keys, keys, keys, "c", requirement_filter=requirement_filter)
+        else:
+            for line in fio:
+                # what every line paid before: key lists rebuilt per line
+                process_io(StringIO(line), requirements, constraints, keys, keys, keys, "c")
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    nkeys = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    content = synthetic_constraints(lines)
+    keys = [f"Package.{i * 7}" for i in range(nkeys)]
+    print(f"{lines} lines, {nkeys} keys per category")
+    for label, compiled in (("per-line key lists", False), ("compiled filter", True)):
+        elapsed = run(content, keys, compiled)
+        print(f"{label:>20}: {elapsed:8.3f}s total, {elapsed / lines * 1e6:8.2f}us per line")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+from .logging import logger
+from dataclasses import dataclass
+from pathlib import Path
+
+import hashlib
+import json
+import os
+import time
+
+
+# Default location of the HTTP cache, relative to the working directory
+DEFAULT_CACHE_DIR = ".mxdev_cache"
+
+# Default upper bound for the total size of the HTTP cache in bytes
+DEFAULT_MAX_SIZE = 50 * 1024 * 1024
+
+# Sidecar files stored next to each cache entry
+_SIDECAR_SUFFIXES = (".url", ".meta")
+
+# Subdirectory of the parse results of requirements files, see mxdev.parsing
+PARSED_DIR = "parsed"
+
+
+def get_cache_key(url: str) -> str:
+    """Generate a deterministic cache key from a URL.
+
+    Uses SHA256 hash of the URL, truncated to 16 hex characters for readability
+    while maintaining low collision probability.
+
+    Args:
+        url: The URL to generate a cache key for
+
+    Returns:
+        16-character hex string (cache key)
+
+    """
+    hash_obj = hashlib.sha256(url.encode("utf-8"))
+    return hash_obj.hexdigest()[:16]
+
+
+def parse_size(value: str | int | None) -> int | None:
+    """Parse a size like ``1048576``, ``512K``, ``50M`` or ``1G`` into bytes.
+
+    Empty values mean no limit and return None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    value = value.strip()
+    if not value:
+        return None
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    factor = units.get(value[-1].upper())
+    if factor:
+        return int(float(value[:-1]) * factor)
+    return int(value)
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    url: str
+    size: int
+    fetched: float
+    accessed: float
+
+
+class HTTPCache:
+    """Disk cache for remote files downloaded by mxdev.
+
+    Each entry is stored as a content file named by the cache key, with a
+    ``.url`` sidecar holding the URL and an optional ``.meta`` sidecar holding
+    the ETag/Last-Modified validators. The content file's modification time
+    records when the entry was last fetched or revalidated, its access time
+    when it was last used.
+
+    The parse results in ``parsed/`` are entries as well, without URL, so
+    they are pruned and cleared along with the downloads.
+
+    ``max_age`` is the number of seconds an entry is served without asking the
+    server; 0 always revalidates. ``max_size`` bounds the total size of the
+    cache in bytes; :meth:`prune` evicts the least recently used entries
+    beyond it.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str = DEFAULT_CACHE_DIR,
+        max_age: int = 0,
+        max_size: int | None = DEFAULT_MAX_SIZE,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.max_size = max_size
+
+    @classmethod
+    def from_settings(cls, settings: dict[str, str], directory: Path | str = DEFAULT_CACHE_DIR) -> "HTTPCache":
+        return cls(
+            directory,
+            max_age=int(settings.get("http-cache-max-age", "0") or 0),
+            max_size=parse_size(settings.get("http-cache-max-size", str(DEFAULT_MAX_SIZE))),
+        )
+
+    def _content_file(self, url: str) -> Path:
+        return self.directory / get_cache_key(url)
+
+    def read(self, url: str) -> str | None:
+        """Return the cached content of ``url`` or None, marking it as used."""
+        cache_file = self._content_file(url)
+        if not cache_file.exists():
+            return None
+        logger.debug(f"Cache hit for {url} from {cache_file}")
+        content = cache_file.read_text(encoding="utf-8")
+        os.utime(cache_file, (time.time(), cache_file.stat().st_mtime))
+        return content
+
+    def write(self, url: str, content: str, validators: dict[str, str] | None = None) -> None:
+        """Store content of ``url`` along with its response validators."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        cache_file = self._content_file(url)
+        cache_file.write_text(content, encoding="utf-8")
+
+        # Write URL metadata for debugging and listing
+        cache_file.with_suffix(".url").write_text(url, encoding="utf-8")
+
+        # Write validators for conditional requests, drop stale ones
+        meta_file = cache_file.with_suffix(".meta")
+        if validators:
+            meta_file.write_text(json.dumps(validators), encoding="utf-8")
+        elif meta_file.exists():
+            meta_file.unlink()
+
+        logger.debug(f"Cached {url} to {cache_file}")
+
+    def validators(self, url: str) -> dict[str, str]:
+        """Return the stored ETag/Last-Modified validators of an entry.
+
+        Returns an empty dict if there is no cached content to fall back to.
+        """
+        cache_file = self._content_file(url)
+        meta_file = cache_file.with_suffix(".meta")
+        if not cache_file.exists() or not meta_file.exists():
+            return {}
+        try:
+            return json.loads(meta_file.read_text(encoding="utf-8"))
+        except ValueError:
+            logger.debug(f"Ignoring broken cache metadata {meta_file}")
+            return {}
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as revalidated, it is fresh again for ``max_age``."""
+        cache_file = self._content_file(url)
+        if cache_file.exists():
+            cache_file.touch()
+
+    def is_fresh(self, url: str) -> bool:
+        """Whether the entry may be served without asking the server."""
+        if self.max_age <= 0:
+            return False
+        cache_file = self._content_file(url)
+        if not cache_file.exists():
+            return False
+        return time.time() - cache_file.stat().st_mtime < self.max_age
+
+    def entries(self) -> list[CacheEntry]:
+        """List all cache entries, least recently used first."""
+        if not self.directory.exists():
+            return []
+        entries = []
+        for path in self.directory.iterdir():
+            if path.suffix or not path.is_file():
+                continue
+            url_file = path.with_suffix(".url")
+            url = url_file.read_text(encoding="utf-8") if url_file.exists() else ""
+            stat = path.stat()
+            size = stat.st_size
+            for suffix in _SIDECAR_SUFFIXES:
+                sidecar = path.with_suffix(suffix)
+                if sidecar.exists():
+                    size += sidecar.stat().st_size
+            entries.append(CacheEntry(path.name, url, size, stat.st_mtime, stat.st_atime))
+        parsed_dir = self.directory / PARSED_DIR
+        if parsed_dir.is_dir():
+            for path in parsed_dir.glob("*.json"):
+                stat = path.stat()
+                key = f"{PARSED_DIR}/{path.name}"
+                entries.append(CacheEntry(key, "", stat.st_size, stat.st_mtime, stat.st_atime))
+        return sorted(entries, key=lambda entry: entry.accessed)
+
+    def remove(self, key: str) -> None:
+        path = self.directory / key
+        for file in (path, *(path.with_suffix(suffix) for suffix in _SIDECAR_SUFFIXES)):
+            if file.exists():
+                file.unlink()
+
+    def prune(self, max_size: int | None = None, unused_for: int | None = None) -> list[CacheEntry]:
+        """Evict entries, least recently used first.
+
+        Removes entries not used for ``unused_for`` seconds, then evicts until
+        the cache fits into ``max_size`` (defaults to the configured limit).
+        Returns the removed entries.
+        """
+        if max_size is None:
+            max_size = self.max_size
+        entries = self.entries()
+        removed = []
+        if unused_for is not None:
+            threshold = time.time() - unused_for
+            removed += [entry for entry in entries if entry.accessed < threshold]
+            entries = [entry for entry in entries if entry.accessed >= threshold]
+        if max_size is not None:
+            total = sum(entry.size for entry in entries)
+            while entries and total > max_size:
+                entry = entries.pop(0)
+                total -= entry.size
+                removed.append(entry)
+        for entry in removed:
+            logger.debug(f"Evict {entry.url or entry.key} from cache")
+            self.remove(entry.key)
+        return removed
+
+    def clear(self) -> int:
+        """Remove all entries, returns the number of removed entries."""
+        entries = self.entries()
+        for entry in entries:
+            self.remove(entry.key)
+        return len(entries)
@@ -1,15 +1,65 @@
-from .including import read_with_included
+from .cache import HTTPCache
+from .including import parse_dependencies
+from .including import read_dependencies
 from .logging import logger
-from packaging.requirements import Requirement
+from .parsing import requirement_name
+from configparser import ConfigParser
+from pathlib import Path
 
+import hashlib
+import json
+import logging
 import os
 import typing
 
 
+try:
+    from ._version import __version__
+except ImportError:
+    __version__ = "unknown (not installed)"
+
+
 if typing.TYPE_CHECKING:
     from .hooks import Hook
 
 
+# File in the cache directory holding the compiled configuration of the last run
+SNAPSHOT_FILE = "config-snapshot.json"
+
+# Configuration attributes stored in a snapshot
+SNAPSHOT_ATTRIBUTES = ("settings", "overrides", "ignore_keys", "packages", "hooks")
+
+
+def _snapshot_key(texts: list[tuple[str, str]], override_args: dict, hooks: list["Hook"]) -> str:
+    """Hash of everything the compiled configuration depends on."""
+    key = {
+        "version": __version__,
+        "directory": os.getcwd(),
+        "files": [[source, hashlib.sha256(text.encode("utf-8")).hexdigest()] for source, text in texts],
+        "override_args": override_args,
+        "hooks": [[f"{type(hook).__module__}.{type(hook).__name__}", hook.namespace] for hook in hooks],
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _WarningCollector(logging.Handler):
+    """Collect the warnings logged while compiling a configuration."""
+
+    def __init__(self) -> None:
+        super().__init__(logging.WARNING)
+        self.records: list[tuple[int, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append((record.levelno, record.getMessage()))
+
+    def __enter__(self) -> "_WarningCollector":
+        logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        logger.removeHandler(self)
+
+
 def to_bool(value):
     if not isinstance(value, str):
         return bool(value)
@@ -48,10 +98,53 @@ class Configuration:
         mxini: str,
         override_args: dict = {},
         hooks: list["Hook"] = [],
+        cache_dir: str | Path | None = None,
     ) -> None:
         logger.debug("Read configuration")
-        data = read_with_included(mxini)
-
+        texts = read_dependencies(
+            mxini,
+            offline=bool(override_args.get("offline")),
+            http_cache=None if cache_dir is None else HTTPCache(cache_dir),
+        )
+        if cache_dir is None:
+            self._compile(parse_dependencies(texts), override_args, hooks)
+            return
+        snapshot_file = Path(cache_dir) / SNAPSHOT_FILE
+        key = _snapshot_key(texts, override_args, hooks)
+        if self._load_snapshot(snapshot_file, key):
+            logger.debug(f"Loaded configuration snapshot {snapshot_file}")
+            return
+        with _WarningCollector() as warnings:
+            self._compile(parse_dependencies(texts), override_args, hooks)
+        self._save_snapshot(snapshot_file, key, warnings.records)
+
+    def _load_snapshot(self, snapshot_file: Path, key: str) -> bool:
+        if not snapshot_file.exists():
+            return False
+        try:
+            snapshot = json.loads(snapshot_file.read_text(encoding="utf-8"))
+        except ValueError:
+            return False
+        if snapshot.get("key") != key:
+            return False
+        for name in SNAPSHOT_ATTRIBUTES:
+            setattr(self, name, snapshot[name])
+        # repeat what compiling the configuration reported
+        for level, message in snapshot["warnings"]:
+            logger.log(level, message)
+        return True
+
+    def _save_snapshot(self, snapshot_file: Path, key: str, warnings: list[tuple[int, str]]) -> None:
+        snapshot = {name: getattr(self, name) for name in SNAPSHOT_ATTRIBUTES}
+        snapshot["key"] = key
+        snapshot["warnings"] = warnings
+        try:
+            snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+            snapshot_file.write_text(json.dumps(snapshot, separators=(",", ":")), encoding="utf-8")
+        except OSError as e:
+            logger.debug(f"Can not write configuration snapshot: {e}")
+
+    def _compile(self, data: ConfigParser, override_args: dict, hooks: list["Hook"]) -> None:
         settings = self.settings = dict(data["settings"].items())
 
         logger.debug(f"infile={self.infile}")
@@ -66,6 +159,9 @@ class Configuration:
         else:
             settings["threads"] = "4"
 
+        if override_args.get("dirty-policy"):
+            settings["dirty-policy"] = override_args["dirty-policy"]
+
         # Set default for smart-threading (process HTTPS packages serially to avoid
         # overlapping credential prompts)
         settings.setdefault("smart-threading", "true")
@@ -94,12 +190,11 @@ class Configuration:
             line = line.strip()
             if not line:
                 continue
-            try:
-                parsed = Requirement(line)
-            except Exception:
+            name = requirement_name(line)
+            if name is None:
                 logger.error(f"Can not parse override: {line}")
                 continue
-            self.overrides[parsed.name] = line
+            self.overrides[name] = line
 
         raw_ignores = settings.get("ignores", "").strip()
         self.ignore_keys = []
@@ -1,3 +1,4 @@
+from . import timing
 from .entry_points import load_eps_by_group
 from .state import State
 
@@ -23,16 +24,30 @@ class Hook:
     def write(self, state: State) -> None:
         """Gets executed after mxdev write operation."""
 
+    def files(self, state: State) -> list[str] | None:
+        """Files this hook reads or writes.
+
+        A run is only skipped as unchanged if none of them changed either.
+        ``None`` means unknown, runs with this hook are never skipped.
+        """
+        return None
+
 
 def load_hooks() -> list:
     return [ep.load()() for ep in load_eps_by_group("mxdev") if ep.name == "hook"]
 
 
 def read_hooks(state: State, hooks: list[Hook]) -> None:
+    if hooks:
+        state.expand()
     for hook in hooks:
-        hook.read(state)
+        with timing.phase(f"{type(hook).__name__}.read", category="hook"):
+            hook.read(state)
 
 
 def write_hooks(state: State, hooks: list[Hook]) -> None:
+    if hooks:
+        state.expand()
     for hook in hooks:
-        hook.write(state)
+        with timing.phase(f"{type(hook).__name__}.write", category="hook"):
+            hook.write(state)
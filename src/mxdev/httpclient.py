@@ -0,0 +1,195 @@
+from .logging import logger
+from dataclasses import dataclass
+from email.message import Message
+from urllib import parse
+from urllib import request
+from urllib.error import HTTPError
+from urllib.error import URLError
+
+import http.client
+import threading
+
+
+# Idle connections kept open per host
+MAX_IDLE_PER_HOST = 4
+
+# Redirects followed per request, like urllib does
+MAX_REDIRECTS = 10
+
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+# Errors of a reused keep-alive connection the server already closed
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+_HostKey = tuple[str, str, int | None]
+
+
+@dataclass
+class Response:
+    url: str
+    status: int
+    headers: Message
+    body: bytes = b""
+
+
+@dataclass
+class ClientStats:
+    requests: int = 0
+    connections: int = 0
+
+    @property
+    def handshakes_saved(self) -> int:
+        return self.requests - self.connections
+
+
+class HTTPClient:
+    """Minimal HTTP(S) GET client with persistent connections per host.
+
+    Connections are kept alive after a response was read completely and are
+    reused by later requests to the same scheme, host and port, from any
+    thread. Responses other than 2xx and ``304 Not Modified`` raise
+    ``urllib.error.HTTPError``, network failures raise ``URLError``, just like
+    ``urllib.request.urlopen`` does. Requests that have to go through a proxy
+    configured in the environment and URLs of other schemes, like ``file://``,
+    are delegated to ``urlopen``.
+    """
+
+    def __init__(self, max_idle_per_host: int = MAX_IDLE_PER_HOST) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self.stats = ClientStats()
+        self._idle: dict[_HostKey, list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "HTTPClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for idle in pools:
+            for conn in idle:
+                conn.close()
+
+    def get(self, url: str, headers: dict[str, str] | None = None) -> Response:
+        headers = {"User-Agent": "mxdev", **(headers or {})}
+        for _ in range(MAX_REDIRECTS + 1):
+            if self._uses_urlopen(url):
+                return self._get_with_urlopen(url, headers)
+            response = self._request(url, headers)
+            if response.status not in _REDIRECT_CODES:
+                break
+            location = response.headers.get("Location")
+            if not location:
+                break
+            url = parse.urljoin(url, location)
+            logger.debug(f"Redirected to {url}")
+        else:
+            raise HTTPError(url, response.status, "Too many redirects", response.headers, None)
+        if response.status >= 400 or (response.status >= 300 and response.status != 304):
+            reason = http.client.responses.get(response.status, "")
+            raise HTTPError(url, response.status, reason, response.headers, None)
+        return response
+
+    def _uses_urlopen(self, url: str) -> bool:
+        parts = parse.urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return True
+        return parts.scheme in request.getproxies() and not request.proxy_bypass(parts.hostname or "")
+
+    def _get_with_urlopen(self, url: str, headers: dict[str, str]) -> Response:
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.connections += 1
+        try:
+            with request.urlopen(request.Request(url, headers=headers)) as fio:
+                # urlopen reports no status for file:// and ftp:// URLs
+                return Response(fio.url, fio.status or 200, fio.headers, fio.read())
+        except HTTPError as e:
+            if e.code == 304:
+                return Response(url, 304, e.headers)
+            raise
+
+    def _request(self, url: str, headers: dict[str, str]) -> Response:
+        parts = parse.urlsplit(url)
+        key: _HostKey = (parts.scheme, parts.hostname or "", parts.port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        with self._lock:
+            self.stats.requests += 1
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                response = self._send(conn, target, headers)
+            except _STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # the server dropped the idle connection, retry on a new one
+                conn.close()
+                conn, reused = self._connect(key), False
+                response = self._send(conn, target, headers)
+            body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise URLError(e)
+        result = Response(url, response.status, response.headers, body)
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return result
+
+    def _send(
+        self,
+        conn: http.client.HTTPConnection,
+        target: str,
+        headers: dict[str, str],
+    ) -> http.client.HTTPResponse:
+        conn.request("GET", target, headers=headers)
+        return conn.getresponse()
+
+    def _acquire(self, key: _HostKey) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _connect(self, key: _HostKey) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        with self._lock:
+            self.stats.connections += 1
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port)
+        return http.client.HTTPConnection(host, port)
+
+    def _release(self, key: _HostKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+
+_default_client: HTTPClient | None = None
+_default_client_lock = threading.Lock()
+
+
+def default_client() -> HTTPClient:
+    """Return the client shared by all downloads of this process."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HTTPClient()
+        return _default_client
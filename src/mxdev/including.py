@@ -1,85 +1,268 @@
+from .cache import HTTPCache
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 from configparser import ExtendedInterpolation
+from io import StringIO
 from pathlib import Path
 from urllib import parse
-from urllib import request
 
 import os
+import re
 import tempfile
+import threading
 
 
-def resolve_dependencies(
+# Number of threads used to download remote include files
+INCLUDE_FETCH_WORKERS = 4
+
+
+def _is_url(file_or_url: str) -> bool:
+    # Check if it's a real URL scheme (not a Windows drive letter)
+    # Windows drive letters are single characters, URL schemes are longer
+    scheme = parse.urlparse(file_or_url).scheme
+    return bool(scheme) and len(scheme) > 1
+
+
+def _http_parent(url: str) -> str:
+    parts = list(parse.urlparse(url))
+    parts[2] = str(Path(parts[2]).parent)
+    return parse.urlunparse(parts)
+
+
+_SECTION = re.compile(r"\[(?P<header>.+)\]")
+_OPTION = re.compile(r"(?P<option>.*?)\s*[=:]\s*(?P<value>.*)$")
+
+
+def _scan_includes(text: str) -> list[str]:
+    """Extract the ``include`` option of the ``[settings]`` section.
+
+    Follows the line rules of ``ConfigParser`` (comments, indented
+    continuation lines, case insensitive option names) for this single
+    option, so a file does not have to be parsed just to find its includes.
+    """
+    section = None
+    option = None
+    indent_level = 0
+    includes: list[str] = []
+    for line in StringIO(text):
+        value = line.strip()
+        if not value or value.startswith(("#", ";")):
+            continue
+        cur_indent_level = len(line) - len(line.lstrip())
+        if option is not None and cur_indent_level > indent_level:
+            if section == "settings" and option == "include":
+                includes.append(value)
+            continue
+        indent_level = cur_indent_level
+        match = _SECTION.match(value)
+        if match:
+            section = match.group("header")
+            option = None
+            continue
+        match = _OPTION.match(value)
+        if match is None:
+            option = None
+            continue
+        option = match.group("option").rstrip().lower()
+        if section == "settings" and option == "include":
+            includes = [match.group("value")]
+    return [include.strip() for include in includes if include.strip()]
+
+
+def _read_url(url: str, offline: bool, http_cache: HTTPCache | None) -> str:
+    """Content of a remote include, cached for revalidation and offline use."""
+    from .processing import _fetch_http
+
+    if not offline:
+        return _fetch_http(url, http_cache)
+    if http_cache is None:
+        raise RuntimeError(f"Offline mode: include '{url}' can not be read without a cache")
+    content = http_cache.read(url)
+    if content is None:
+        raise RuntimeError(
+            f"Offline mode: include '{url}' not found in cache. "
+            f"Run mxdev in online mode first to populate the cache at {http_cache.directory}"
+        )
+    return content
+
+
+class IncludeFetcher:
+    """Download remote include files concurrently.
+
+    When a remote file arrives, its remote includes are scheduled right away,
+    so siblings and their includes are downloaded in parallel. Each URL is
+    fetched at most once, and each local file, by its resolved path, is read
+    at most once. The order in which files are used is still decided by
+    :func:`resolve_dependencies`.
+    """
+
+    def __init__(
+        self,
+        http_cache: HTTPCache | None,
+        offline: bool = False,
+        workers: int = INCLUDE_FETCH_WORKERS,
+    ) -> None:
+        self.http_cache = http_cache
+        self.offline = offline
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mxdev-include")
+        self._futures: dict[str, Future] = {}
+        self._files: dict[Path, str] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "IncludeFetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def schedule(self, url: str) -> Future:
+        with self._lock:
+            future = self._futures.get(url)
+            if future is None:
+                future = self._futures[url] = self._executor.submit(self._fetch, url)
+        return future
+
+    def schedule_includes(self, includes: list[str], http_parent: str | None) -> None:
+        """Schedule the remote ones of a file's includes."""
+        for include in includes:
+            if http_parent:
+                self.schedule(parse.urljoin(http_parent, include))
+            elif _is_url(include):
+                self.schedule(include)
+
+    def _fetch(self, url: str) -> str:
+        content = _read_url(url, self.offline, self.http_cache)
+        try:
+            self.schedule_includes(_scan_includes(content), _http_parent(url))
+        except RuntimeError:
+            # fetcher shut down while we were downloading
+            pass
+        return content
+
+    def get(self, url: str) -> str:
+        """Return the content of ``url``, waiting for its download if needed."""
+        return self.schedule(url).result()
+
+    def read_file(self, file: Path) -> str:
+        """Return the content of a local file, read once per resolved path."""
+        path = file.resolve()
+        text = self._files.get(path)
+        if text is None:
+            text = self._files[path] = file.read_text()
+        return text
+
+
+def read_dependencies(
     file_or_url: str | Path,
-    tmpdir: str,
-    http_parent=None,
-) -> list[Path]:
-    """Resolve dependencies of a file or url
+    http_parent: str | None = None,
+    offline: bool = False,
+    http_cache: HTTPCache | None = None,
+    fetcher: IncludeFetcher | None = None,
+) -> list[tuple[str, str]]:
+    """Read a file or url and all files it includes, each exactly once.
 
-    The result is a list of Path objects, starting with the
-    given file_or_url and followed by all file_or_urls referenced from it.
+    The result is a list of ``(source, text)`` tuples in the order they must
+    be fed to a ConfigParser: innermost includes first, the given file last.
+    ``source`` is the path or URL of the file. A file included several times
+    is listed at each place, but read or downloaded only once.
 
     The file_or_url is assumed to be a ini file or url to such, with an option key "include"
     under the "[settings]" section.
+
+    Remote files are fetched through ``http_cache`` if given, and revalidated
+    on each run; without it they are downloaded and not cached. In offline mode
+    they are served from the cache only. Remote includes are downloaded concurrently
+    by ``fetcher``, which is started for the whole tree if not given; the
+    order of the result does not depend on the download order.
     """
+    if fetcher is None:
+        with IncludeFetcher(http_cache, offline) as fetcher:
+            return read_dependencies(file_or_url, http_parent, offline, http_cache, fetcher)
+    file = None
     if isinstance(file_or_url, str):
         if http_parent:
             file_or_url = parse.urljoin(http_parent, file_or_url)
-        parsed = parse.urlparse(str(file_or_url))
-        # Check if it's a real URL scheme (not a Windows drive letter)
-        # Windows drive letters are single characters, URL schemes are longer
-        is_url = parsed.scheme and len(parsed.scheme) > 1
-        if is_url:
-            with request.urlopen(str(file_or_url)) as fio:
-                tf = tempfile.NamedTemporaryFile(
-                    suffix=".ini",
-                    dir=str(tmpdir),
-                    delete=False,
-                )
-                tf.write(fio.read())
-                tf.flush()
-                file = Path(tf.name)
-            parts = list(parsed)
-            parts[2] = str(Path(parts[2]).parent)
-            http_parent = parse.urlunparse(parts)
+        if _is_url(file_or_url):
+            source = file_or_url
+            text = fetcher.get(file_or_url)
+            http_parent = _http_parent(file_or_url)
         else:
             file = Path(file_or_url)
     else:
         file = file_or_url
-    if not file.exists():
-        raise FileNotFoundError(file)
-    cfg = ConfigParser()
-    cfg.read(file)
-    if not ("settings" in cfg and "include" in cfg["settings"]):
-        return [file]
+    if file is not None:
+        if not file.exists():
+            raise FileNotFoundError(file)
+        source = str(file)
+        text = fetcher.read_file(file)
+    includes = _scan_includes(text)
+    # start downloading all remote siblings before resolving them in order
+    fetcher.schedule_includes(includes, http_parent)
+    texts = []
+    for include in includes:
+        if http_parent or _is_url(include):
+            texts += read_dependencies(include, http_parent, offline, http_cache, fetcher)
+        elif file is not None:
+            texts += read_dependencies(file.parent / include, None, offline, http_cache, fetcher)
+    texts.append((source, text))
+    return texts
+
+
+def resolve_dependencies(
+    file_or_url: str | Path,
+    tmpdir: str,
+    http_parent=None,
+    offline: bool = False,
+    http_cache: HTTPCache | None = None,
+) -> list[Path]:
+    """Resolve dependencies of a file or url
+
+    The result is a list of Path objects, starting with the
+    given file_or_url and followed by all file_or_urls referenced from it.
+    Remote files are written to ``tmpdir``.
+
+    Kept for backward compatibility, :func:`read_dependencies` reads the
+    files into memory instead.
+    """
     file_list = []
-    for include in cfg["settings"]["include"].split("\n"):
-        include = include.strip()
-        if not include:
+    for source, text in read_dependencies(file_or_url, http_parent, offline, http_cache):
+        if not _is_url(source):
+            file_list.append(Path(source))
             continue
-        # Check if it's a real URL scheme (not a Windows drive letter)
-        parsed_include = parse.urlparse(include)
-        is_include_url = parsed_include.scheme and len(parsed_include.scheme) > 1
-        if http_parent or is_include_url:
-            file_list += resolve_dependencies(include, tmpdir, http_parent)
-        else:
-            file_list += resolve_dependencies(file.parent / include, tmpdir)
-
-    file_list.append(file)
+        with tempfile.NamedTemporaryFile(
+            suffix=".ini",
+            dir=str(tmpdir),
+            delete=False,
+        ) as tf:
+            tf.write(text.encode("utf-8"))
+            file_list.append(Path(tf.name))
     return file_list
 
 
-def read_with_included(file_or_url: str | Path) -> ConfigParser:
+def read_with_included(
+    file_or_url: str | Path,
+    offline: bool = False,
+    http_cache: HTTPCache | None = None,
+) -> ConfigParser:
     """Read a file or url and include all referenced files,
 
     Parse the result as a ConfigParser and return it.
     """
+    return parse_dependencies(read_dependencies(file_or_url, offline=offline, http_cache=http_cache))
+
+
+def parse_dependencies(texts: list[tuple[str, str]]) -> ConfigParser:
+    """Parse the result of :func:`read_dependencies` into one ConfigParser."""
     cfg = ConfigParser(
         default_section="settings",
         interpolation=ExtendedInterpolation(),
     )
     cfg.optionxform = str  # type: ignore
     cfg["settings"]["directory"] = os.getcwd()
-    with tempfile.TemporaryDirectory() as tmpdir:
-        resolved = resolve_dependencies(file_or_url, tmpdir)
-        cfg.read(resolved)
+    for source, text in texts:
+        cfg.read_string(text, source=source)
     return cfg
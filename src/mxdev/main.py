@@ -1,3 +1,8 @@
+from . import manifest
+from . import timing
+from .cache import DEFAULT_CACHE_DIR
+from .cache import HTTPCache
+from .cache import parse_size
 from .config import Configuration
 from .config import to_bool
 from .hooks import load_hooks
@@ -5,6 +10,7 @@ from .hooks import read_hooks
 from .hooks import write_hooks
 from .logging import logger
 from .logging import setup_logger
+from .processing import _is_url
 from .processing import fetch
 from .processing import read
 from .processing import write
@@ -18,12 +24,15 @@ except ImportError:
 
 import argparse
 import logging
+import os
 import sys
+import time
 
 
 parser = argparse.ArgumentParser(
     description="Make it easy to work with Python projects containing lots "
     "of packages, of which you only want to develop some.",
+    epilog="Run 'mxdev cache --help' to inspect and maintain the HTTP cache.",
     formatter_class=argparse.RawDescriptionHelpFormatter,
 )
 parser.add_argument(
@@ -52,6 +61,28 @@ parser.add_argument(
     help="Number of threads to fetch sources in parallel with",
     type=int,
 )
+parser.add_argument(
+    "--dirty-policy",
+    help="What to do with sources with local changes: ask, skip them or update them anyway",
+    choices=["ask", "skip", "update"],
+)
+parser.add_argument(
+    "--force",
+    help="Run even if no input changed since the last successful run",
+    action="store_true",
+)
+parser.add_argument(
+    "--timings",
+    help="Write the time spent per phase and package to this JSON file and show the slowest packages",
+    type=str,
+    metavar="REPORT",
+)
+parser.add_argument(
+    "--trace",
+    help="Write a timeline of all threads, sources, commands, downloads and hooks in Chrome Trace Event Format",
+    type=str,
+    metavar="OUT",
+)
 parser.add_argument("-s", "--silent", help="Reduce verbosity", action="store_true")
 parser.add_argument("-v", "--verbose", help="Increase verbosity", action="store_true")
 parser.add_argument(
@@ -61,6 +92,52 @@ parser.add_argument(
 )
 
 
+cache_parser = argparse.ArgumentParser(
+    prog="mxdev cache",
+    description="Inspect and maintain the cache of remote requirements, constraints and includes.",
+)
+cache_parser.add_argument(
+    "--cache-dir",
+    help="cache directory",
+    type=str,
+    default=DEFAULT_CACHE_DIR,
+)
+cache_commands = cache_parser.add_subparsers(dest="command", required=True)
+cache_commands.add_parser("list", help="List cache entries, least recently used first")
+prune_parser = cache_commands.add_parser("prune", help="Evict least recently used entries")
+prune_parser.add_argument(
+    "--max-size",
+    help="Evict entries until the cache fits into this size, e.g. 512K, 50M",
+    type=str,
+)
+prune_parser.add_argument(
+    "--unused-for",
+    help="Remove entries not used for this many seconds",
+    type=int,
+)
+cache_commands.add_parser("clear", help="Remove all cache entries")
+
+
+def cache_main(argv: list[str]) -> None:
+    args = cache_parser.parse_args(argv)
+    setup_logger(logging.INFO)
+    http_cache = HTTPCache(args.cache_dir)
+    if args.command == "list":
+        entries = http_cache.entries()
+        for entry in entries:
+            fetched = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.fetched))
+            accessed = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.accessed))
+            print(f"{entry.key}  {entry.size:>10}  fetched {fetched}  used {accessed}  {entry.url}")
+        print(f"{len(entries)} entries, {sum(entry.size for entry in entries)} bytes in {http_cache.directory}")
+    elif args.command == "prune":
+        max_size = parse_size(args.max_size) if args.max_size else None
+        removed = http_cache.prune(max_size=max_size, unused_for=args.unused_for)
+        logger.info(f"Removed {len(removed)} entries from {http_cache.directory}")
+    elif args.command == "clear":
+        count = http_cache.clear()
+        logger.info(f"Removed {count} entries from {http_cache.directory}")
+
+
 def supports_unicode() -> bool:
     """Check if stdout supports Unicode/emoji encoding.
 
@@ -78,7 +155,27 @@ def supports_unicode() -> bool:
         return False
 
 
+def run_key(args: argparse.Namespace, hooks: list) -> dict:
+    """Arguments a recorded run must match to be skipped."""
+    configuration = args.configuration
+    if not _is_url(configuration):
+        configuration = os.path.abspath(configuration)
+    return {
+        "version": __version__,
+        "configuration": configuration,
+        "directory": os.getcwd(),
+        "offline": args.offline,
+        "no-fetch": args.no_fetch,
+        "fetch-only": args.fetch_only,
+        "dirty-policy": args.dirty_policy,
+        "hooks": sorted(f"{type(hook).__module__}.{type(hook).__name__}" for hook in hooks),
+    }
+
+
 def main() -> None:
+    if sys.argv[1:2] == ["cache"]:
+        cache_main(sys.argv[2:])
+        return
     args = parser.parse_args()
     loglevel = logging.INFO
     if not args.silent and args.verbose:
@@ -87,32 +184,70 @@ def main() -> None:
         loglevel = logging.WARNING
     setup_logger(loglevel)
     logger.info("#" * 79)
+    if args.timings or args.trace:
+        timing.enable()
+    try:
+        run(args)
+    finally:
+        report_timings(args)
+
+
+def report_timings(args: argparse.Namespace) -> None:
+    current = timing.recorder()
+    if current is None:
+        return
+    timing.disable()
+    if args.trace:
+        timing.write_trace(args.trace, current)
+    if args.timings:
+        report = current.report()
+        timing.write_report(args.timings, report)
+        for line in timing.summary(report):
+            logger.info(line)
+
+
+def run(args: argparse.Namespace) -> None:
     hooks = load_hooks()
+    key = run_key(args, hooks)
+    if not args.force and manifest.is_unchanged(key):
+        logger.info("# Nothing changed since the last run, skipping (use --force to run anyway)")
+        return
+    manifest.invalidate()
     logger.info("# Load configuration")
     override_args = {}
     if args.offline:
         override_args["offline"] = True
     if args.threads:
         override_args["threads"] = args.threads
+    if args.dirty_policy:
+        override_args["dirty-policy"] = args.dirty_policy
     configuration = Configuration(
         mxini=args.configuration,
         override_args=override_args,
         hooks=hooks,
+        cache_dir=DEFAULT_CACHE_DIR,
     )
     state = State(configuration=configuration)
     logger.info("#" * 79)
     logger.info("# Read infiles")
-    read(state)
+    with timing.phase("read"):
+        read(state)
     if not args.fetch_only:
-        read_hooks(state, hooks)
+        with timing.phase("hooks"):
+            read_hooks(state, hooks)
     # Skip fetch if --no-fetch flag is set OR if offline mode is enabled
     offline = to_bool(state.configuration.settings.get("offline", False))
     if not args.no_fetch and not offline:
-        fetch(state)
+        with timing.phase("fetch"):
+            fetch(state)
     if args.fetch_only:
+        manifest.record(state, key, hooks=hooks)
         return
-    write(state)
-    write_hooks(state, hooks)
+    with timing.phase("write"):
+        write(state)
+    with timing.phase("hooks"):
+        write_hooks(state, hooks)
+    manifest.record(state, key, hooks=hooks)
     out_requirements = state.configuration.out_requirements
     # Use emoji only if console encoding supports it (avoid cp1252 errors on Windows)
     prefix = "🎂 " if supports_unicode() else ""
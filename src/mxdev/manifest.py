@@ -0,0 +1,277 @@
+"""Fingerprints of all inputs of a mxdev run, used to skip runs without changes.
+
+After a successful run, :func:`record` stores a manifest with content hashes
+of the configuration files, of all requirements/constraints files reachable
+from ``requirements-in``, of the generated output files, and the ``HEAD`` of
+every source checkout. Files hooks read or write are fingerprinted as
+declared by :meth:`mxdev.hooks.Hook.files`; runs with a hook which does not
+declare its files are never skipped. :func:`is_unchanged` computes the same fingerprints
+without parsing the configuration or touching the network; if they match, the
+run can be skipped.
+
+A run which updates sources from their remotes is never skipped, since new
+commits upstream can not be detected without fetching them.
+
+Remote files are only trusted while their HTTP cache entry is fresh (see
+``http-cache-max-age``) or in offline mode, otherwise the run is not skipped.
+"""
+
+from .cache import DEFAULT_CACHE_DIR
+from .cache import HTTPCache
+from .including import _http_parent
+from .including import _scan_includes
+from .logging import logger
+from .processing import _is_url
+from .processing import _parse_reference
+from .state import State
+from pathlib import Path
+from urllib import parse
+
+import hashlib
+import json
+import os
+import subprocess
+import typing
+
+
+MANIFEST_FILE = "manifest.json"
+
+# Fingerprint of an input file which does not exist
+_MISSING = ""
+
+
+class _Unknown(Exception):
+    """An input can not be fingerprinted without doing real work."""
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _config_fingerprints(
+    file_or_url: str | Path,
+    read_url: typing.Callable[[str], str | None],
+    fingerprints: dict[str, str],
+    http_parent: str | None = None,
+) -> None:
+    """Fingerprint a configuration file and its includes.
+
+    Follows includes like ``including.read_dependencies`` does.
+    """
+    if isinstance(file_or_url, str):
+        if http_parent:
+            file_or_url = parse.urljoin(http_parent, file_or_url)
+        if _is_url(file_or_url):
+            url_content = read_url(file_or_url)
+            if url_content is None:
+                raise _Unknown(file_or_url)
+            content = url_content
+            fingerprints[file_or_url] = _hash(content.encode("utf-8"))
+            http_parent = _http_parent(file_or_url)
+            file = None
+        else:
+            file = Path(file_or_url)
+    else:
+        file = file_or_url
+    if file is not None:
+        if not file.exists():
+            raise _Unknown(file)
+        data = file.read_bytes()
+        fingerprints[str(file.absolute())] = _hash(data)
+        content = data.decode("utf-8")
+    for include in _scan_includes(content):
+        if http_parent or _is_url(include):
+            _config_fingerprints(include, read_url, fingerprints, http_parent)
+        elif file is not None:
+            _config_fingerprints(file.parent / include, read_url, fingerprints)
+
+
+def _requirement_fingerprints(
+    file_or_url: str,
+    read_url: typing.Callable[[str], str | None],
+    fingerprints: dict[str, str],
+) -> None:
+    """Fingerprint a requirements file and all files it references."""
+    if not file_or_url.strip() or file_or_url in fingerprints:
+        return
+    if _is_url(file_or_url):
+        content = read_url(file_or_url)
+        if content is None:
+            raise _Unknown(file_or_url)
+    else:
+        path = Path(file_or_url)
+        if not path.exists():
+            fingerprints[file_or_url] = _MISSING
+            return
+        content = path.read_text()
+    fingerprints[file_or_url] = _hash(content.encode("utf-8"))
+    for line in content.splitlines():
+        try:
+            reference = _parse_reference(line)
+        except IndexError:
+            continue
+        if reference is not None:
+            _requirement_fingerprints(reference[1], read_url, fingerprints)
+
+
+def _git_head(path: Path) -> str | None:
+    git_dir = path / ".git"
+    if git_dir.is_dir():
+        head = (git_dir / "HEAD").read_text().strip()
+        if not head.startswith("ref: "):
+            return head
+        ref = head[5:]
+        ref_file = git_dir / ref
+        if ref_file.exists():
+            return ref_file.read_text().strip()
+        packed_refs = git_dir / "packed-refs"
+        if packed_refs.exists():
+            for line in packed_refs.read_text().splitlines():
+                if line.endswith(f" {ref}"):
+                    return line.split(" ", 1)[0]
+    # worktrees, submodules or unborn branches: ask git
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=path, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def _source_fingerprints(sources: dict[str, str]) -> dict[str, str]:
+    """Map each source path to its git HEAD, or a marker for other VCS."""
+    fingerprints = {}
+    for path, vcs in sources.items():
+        if not os.path.exists(path):
+            fingerprints[path] = _MISSING
+        elif vcs in ("git", "gitsvn"):
+            fingerprints[path] = _git_head(Path(path)) or _MISSING
+        else:
+            fingerprints[path] = "exists"
+    return fingerprints
+
+
+def _updates_sources(packages: dict[str, dict], offline: bool, no_fetch: bool) -> bool:
+    """Whether the run fetches new commits for any existing source."""
+    if offline or no_fetch:
+        return False
+    # same values as WorkingCopies.checkout, sources are updated by default
+    return any(str(package.get("update", True)).lower() not in ("false", "no", "off") for package in packages.values())
+
+
+def _file_fingerprints(paths: typing.Iterable[str]) -> dict[str, str]:
+    return {path: _hash(Path(path).read_bytes()) if os.path.exists(path) else _MISSING for path in paths}
+
+
+def _compute(manifest: dict, read_url: typing.Callable[[str], str | None]) -> dict:
+    config: dict[str, str] = {}
+    _config_fingerprints(manifest["configuration"], read_url, config)
+    requirements: dict[str, str] = {}
+    _requirement_fingerprints(manifest["requirements-in"], read_url, requirements)
+    return {
+        "config": config,
+        "requirements": requirements,
+        "sources": _source_fingerprints(manifest["source-paths"]),
+        "outputs": _file_fingerprints(manifest["outputs"]),
+        "hooks": _file_fingerprints(manifest.get("hook-files", [])),
+    }
+
+
+def _manifest_file(cache_dir: Path | str) -> Path:
+    return Path(cache_dir) / MANIFEST_FILE
+
+
+def invalidate(cache_dir: Path | str = DEFAULT_CACHE_DIR) -> None:
+    """Remove the manifest, the next run can not be skipped."""
+    manifest_file = _manifest_file(cache_dir)
+    if manifest_file.exists():
+        manifest_file.unlink()
+
+
+def is_unchanged(key: dict, cache_dir: Path | str = DEFAULT_CACHE_DIR) -> bool:
+    """Whether nothing changed since the run recorded with the same key."""
+    manifest_file = _manifest_file(cache_dir)
+    if not manifest_file.exists():
+        return False
+    try:
+        manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    except ValueError:
+        return False
+    if manifest.get("key") != key:
+        logger.debug("Manifest was recorded with other arguments")
+        return False
+    if manifest.get("updates-sources", True):
+        logger.debug("Sources are updated from their remotes")
+        return False
+    http_cache = HTTPCache(cache_dir, max_age=manifest["http-cache-max-age"])
+    offline = manifest["offline"]
+
+    def read_url(url: str) -> str | None:
+        if offline or http_cache.is_fresh(url):
+            return http_cache.read(url)
+        return None
+
+    try:
+        fingerprints = _compute(manifest, read_url)
+    except _Unknown as e:
+        logger.debug(f"Can not fingerprint {e} without fetching it")
+        return False
+    return fingerprints == manifest["fingerprints"]
+
+
+def _hook_files(hooks: typing.Iterable, state: State) -> list[str] | None:
+    """Files read or written by the hooks, ``None`` if a hook does not tell."""
+    files: list[str] = []
+    for hook in hooks:
+        hook_files = getattr(hook, "files", lambda state: None)(state)
+        if hook_files is None:
+            logger.debug(f"Hook {type(hook).__name__} does not declare its files")
+            return None
+        files.extend(hook_files)
+    return files
+
+
+def record(
+    state: State,
+    key: dict,
+    cache_dir: Path | str = DEFAULT_CACHE_DIR,
+    hooks: typing.Iterable = (),
+) -> None:
+    """Record the fingerprints of all inputs after a successful run."""
+    from .config import to_bool
+
+    hook_files = _hook_files(hooks, state)
+    if hook_files is None:
+        logger.debug("Not recording manifest, can not fingerprint the hooks")
+        invalidate(cache_dir)
+        return
+    cfg = state.configuration
+    outputs = [cfg.out_requirements]
+    if state.constraints or cfg.overrides:
+        outputs.append(cfg.out_constraints)
+    offline = to_bool(cfg.settings.get("offline", False))
+    manifest = {
+        "key": key,
+        "configuration": key["configuration"],
+        "requirements-in": cfg.infile,
+        "offline": offline,
+        "updates-sources": _updates_sources(cfg.packages, offline, bool(key.get("no-fetch"))),
+        "http-cache-max-age": int(cfg.settings.get("http-cache-max-age", "0") or 0),
+        "source-paths": {package["path"]: package["vcs"] for package in cfg.packages.values()},
+        "outputs": [] if key.get("fetch-only") else outputs,
+        "hook-files": hook_files,
+    }
+    http_cache = HTTPCache(cache_dir)
+    try:
+        manifest["fingerprints"] = _compute(manifest, http_cache.read)
+    except _Unknown as e:
+        logger.debug(f"Not recording manifest, can not fingerprint {e}")
+        invalidate(cache_dir)
+        return
+    except Exception as e:
+        # never fail a successful run because of the manifest
+        logger.debug(f"Not recording manifest: {e}")
+        invalidate(cache_dir)
+        return
+    manifest_file = _manifest_file(cache_dir)
+    manifest_file.parent.mkdir(parents=True, exist_ok=True)
+    manifest_file.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
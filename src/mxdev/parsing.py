@@ -0,0 +1,100 @@
+from .logging import logger
+from collections import OrderedDict
+from packaging.requirements import Requirement
+from pathlib import Path
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+# Number of lines whose parse result is kept in memory
+MAX_MEMOIZED_LINES = 100_000
+
+# Marks a memoized line which is not a requirement specifier
+_INVALID = ""
+
+
+class _NameMemo:
+    """Thread safe LRU memo of requirement names by stripped line."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._names: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, line: str) -> str | None:
+        with self._lock:
+            name = self._names.get(line)
+            if name is not None:
+                self._names.move_to_end(line)
+            return name
+
+    def set(self, line: str, name: str) -> None:
+        with self._lock:
+            self._names[line] = name
+            self._names.move_to_end(line)
+            while len(self._names) > self.maxsize:
+                self._names.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._names.clear()
+
+
+_memo = _NameMemo(MAX_MEMOIZED_LINES)
+
+
+def requirement_name(line: str) -> str | None:
+    """Return the project name of a PEP 508 requirement line.
+
+    Returns None if the line is not a requirement specifier (comments, blank
+    lines, options like ``-e`` or ``--hash``). Results are memoized per line.
+    """
+    line = line.strip()
+    if not _parsable(line):
+        return None
+    name = _memo.get(line)
+    if name is None:
+        try:
+            name = Requirement(line).name
+        except Exception:
+            name = _INVALID
+        _memo.set(line, name)
+    return name or None
+
+
+def _parsable(line: str) -> bool:
+    return bool(line) and not line.startswith(("#", "-"))
+
+
+def preload_requirement_names(content: str, cache_dir: Path) -> None:
+    """Memoize the requirement names of a whole file, cached on disk.
+
+    The parse results are stored in ``cache_dir`` keyed by the SHA256 hash of
+    the file content. For unchanged content they are loaded from there and
+    nothing is parsed.
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    cache_file = cache_dir / f"{content_hash}.json"
+    if cache_file.exists():
+        try:
+            names = json.loads(cache_file.read_text(encoding="utf-8"))
+        except ValueError:
+            logger.debug(f"Ignoring broken parse cache {cache_file}")
+        else:
+            for line, name in names.items():
+                _memo.set(line, name)
+            # used now, for the least recently used eviction of the cache
+            os.utime(cache_file, (time.time(), cache_file.stat().st_mtime))
+            logger.debug(f"Loaded {len(names)} parsed requirements from {cache_file}")
+            return
+    names = {}
+    for line in content.splitlines():
+        line = line.strip()
+        if _parsable(line):
+            names[line] = requirement_name(line) or _INVALID
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps(names), encoding="utf-8")
@@ -1,79 +1,260 @@
+from . import timing
+from .cache import DEFAULT_CACHE_DIR
+from .cache import get_cache_key as _get_cache_key  # noqa: F401
+from .cache import HTTPCache
+from .cache import PARSED_DIR
+from .httpclient import default_client
 from .logging import logger
+from .parsing import preload_requirement_names
+from .parsing import requirement_name
+from .state import Lines
 from .state import State
 from .vcs.common import WorkingCopies
-from packaging.requirements import Requirement
+from .vcs.credentials import CredentialBroker
+from .vcs.history import DurationHistory
+from .vcs.history import HISTORY_FILE
+from .vcs.limits import HostLimiter
+from .vcs.limits import parse_host_limits
+from .vcs.retry import RetryPolicy
+from .vcs.toolchain import registry as toolchain
+from .vcs.toolchain import TOOLCHAIN_FILE
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from packaging.utils import canonicalize_name
 from pathlib import Path
 from urllib import parse
-from urllib import request
 from urllib.error import URLError
 
 import hashlib
 import os
+import shutil
+import sys
+import tempfile
+import threading
 import typing
 
 
-def _get_cache_key(url: str) -> str:
-    """Generate a deterministic cache key from a URL.
+if typing.TYPE_CHECKING:
+    from .config import Configuration
 
-    Uses SHA256 hash of the URL, truncated to 16 hex characters for readability
-    while maintaining low collision probability.
 
-    Args:
-        url: The URL to generate a cache key for
+# Number of threads used to download remote requirements/constraints files
+HTTP_PREFETCH_WORKERS = 4
 
-    Returns:
-        16-character hex string (cache key)
+# Response headers stored next to a cache entry to revalidate it later, mapped
+# to the request header sending them back.
+_CACHE_VALIDATORS = {
+    "ETag": "If-None-Match",
+    "Last-Modified": "If-Modified-Since",
+}
 
-    """
-    hash_obj = hashlib.sha256(url.encode("utf-8"))
-    return hash_obj.hexdigest()[:16]
 
+def _is_url(file_or_url: str) -> bool:
+    # Check if it's a real URL scheme (not a Windows drive letter)
+    # Windows drive letters are single characters, URL schemes are longer
+    scheme = parse.urlparse(file_or_url).scheme
+    return bool(scheme) and len(scheme) > 1
 
-def _cache_http_content(url: str, content: str, cache_dir: Path) -> None:
-    """Cache HTTP content to disk.
 
-    Args:
-        url: The URL being cached
-        content: The content to cache
-        cache_dir: Directory to store cache files
+def _parse_reference(line: str) -> tuple[str, str] | None:
+    """Return ``(variety, file_or_url)`` if the line references another file."""
+    if line.startswith("-c"):
+        return "c", line.split(" ")[1].strip()
+    if line.startswith("-r"):
+        return "r", line.split(" ")[1].strip()
+    return None
 
-    """
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    cache_key = _get_cache_key(url)
 
-    # Write content
-    cache_file = cache_dir / cache_key
-    cache_file.write_text(content, encoding="utf-8")
+def _fetch_http(url: str, http_cache: HTTPCache | None) -> str:
+    """Download a remote file and cache it for future offline use.
 
-    # Write URL metadata for debugging
-    url_file = cache_dir / f"{cache_key}.url"
-    url_file.write_text(url, encoding="utf-8")
+    While the cache entry is fresh, it is served without a request. Otherwise,
+    if the cache holds validators for the URL, the request is conditional and
+    a ``304 Not Modified`` response is served from the cache. Without a cache
+    the file is just downloaded.
+    """
+    if http_cache is None:
+        try:
+            with timing.phase(url, category="http"):
+                return default_client().get(url, {}).body.decode("utf-8")
+        except URLError as e:
+            raise Exception(f"Failed to fetch '{url}': {e}")
+    if http_cache.is_fresh(url):
+        cached_content = http_cache.read(url)
+        if cached_content is not None:
+            logger.info(f"Using fresh cached content for {url}")
+            return cached_content
+    validators = http_cache.validators(url)
+    headers = {_CACHE_VALIDATORS[k]: v for k, v in validators.items() if k in _CACHE_VALIDATORS}
+    try:
+        with timing.phase(url, category="http"):
+            response = default_client().get(url, headers)
+    except URLError as e:
+        raise Exception(f"Failed to fetch '{url}': {e}")
+    if response.status == 304:
+        cached_content = http_cache.read(url)
+        if cached_content is None:
+            raise Exception(f"Failed to fetch '{url}': not modified, but not in cache")
+        logger.info(f"Not modified, using cached content for {url}")
+        http_cache.touch(url)
+        return cached_content
+    content = response.body.decode("utf-8")
+    validators = {k: response.headers[k] for k in _CACHE_VALIDATORS if response.headers.get(k)}
+    http_cache.write(url, content, validators)
+    return content
+
+
+class HTTPPrefetcher:
+    """Download remote requirements and constraints files ahead of processing.
+
+    Fetched content is scanned for further ``-c``/``-r`` references, which are
+    scheduled right away, so a whole tree of remote files is downloaded
+    concurrently. Each URL is fetched at most once, no matter how often it
+    is referenced.
+    """
 
-    logger.debug(f"Cached {url} to {cache_file}")
+    def __init__(self, http_cache: HTTPCache, workers: int = HTTP_PREFETCH_WORKERS) -> None:
+        self.http_cache = http_cache
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mxdev-http")
+        self._futures: dict[str, Future] = {}
+        self._seen_files: set[Path] = set()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "HTTPPrefetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def discover(self, file_or_url: str) -> None:
+        """Schedule downloads for a reference and everything it references."""
+        if _is_url(file_or_url):
+            self.schedule(file_or_url)
+            return
+        path = Path(file_or_url)
+        with self._lock:
+            if path in self._seen_files:
+                return
+            self._seen_files.add(path)
+        if path.exists():
+            self._discover_content(path.read_text())
+
+    def _discover_content(self, content: str) -> None:
+        for line in content.splitlines():
+            try:
+                reference = _parse_reference(line)
+            except IndexError:
+                continue
+            if reference is not None:
+                self.discover(reference[1])
+
+    def schedule(self, url: str) -> Future:
+        with self._lock:
+            future = self._futures.get(url)
+            if future is None:
+                future = self._futures[url] = self._executor.submit(self._fetch, url)
+        return future
+
+    def _fetch(self, url: str) -> str:
+        content = _fetch_http(url, self.http_cache)
+        try:
+            self._discover_content(content)
+        except RuntimeError:
+            # executor shut down while we were downloading
+            logger.debug(f"Skipped discovery of references in {url}")
+        return content
+
+    def get(self, url: str) -> str:
+        """Return the content of ``url``, waiting for its download if needed."""
+        return self.schedule(url).result()
+
+
+class RequirementFilter:
+    """Precompiled lookup of the package names mxdev disables in requirements.
+
+    All names are PEP 503 normalized once on construction, so checking a
+    processed line is a single set lookup.
+    """
 
+    def __init__(
+        self,
+        package_keys: typing.Iterable[str] = (),
+        override_keys: typing.Iterable[str] = (),
+        ignore_keys: typing.Iterable[str] = (),
+    ) -> None:
+        self.package_keys = frozenset(canonicalize_name(k) for k in package_keys)
+        self.override_keys = frozenset(canonicalize_name(k) for k in override_keys)
+        self.ignore_keys = frozenset(canonicalize_name(k) for k in ignore_keys)
 
-def _read_from_cache(url: str, cache_dir: Path) -> str | None:
-    """Read cached HTTP content from disk.
+    @classmethod
+    def from_configuration(cls, cfg: "Configuration") -> "RequirementFilter":
+        return cls(cfg.package_keys, cfg.override_keys, cfg.ignore_keys)
 
-    Args:
-        url: The URL to look up in cache
-        cache_dir: Directory containing cache files
 
-    Returns:
-        Cached content if found, None otherwise
+class ResolutionGraph:
+    """Files expanded during one run, keyed by normalized path or URL.
 
+    Each requirements or constraints file is expanded once per variety, later
+    references to it are replaced by a comment. A reference to a file which
+    is still being expanded is a cycle.
     """
-    if not cache_dir.exists():
-        return None
 
-    cache_key = _get_cache_key(url)
-    cache_file = cache_dir / cache_key
-
-    if cache_file.exists():
-        logger.debug(f"Cache hit for {url} from {cache_file}")
-        return cache_file.read_text(encoding="utf-8")
-
-    return None
+    def __init__(self) -> None:
+        self._expanded: set[tuple[str, str]] = set()
+        self._stack: list[tuple[str, str]] = []
+        self._names: list[str] = []
+
+    @staticmethod
+    def normalize(file_or_url: str) -> str:
+        if _is_url(file_or_url):
+            parts = parse.urlsplit(file_or_url)
+            path = parts.path or "/"
+            return parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+        return os.path.normcase(os.path.abspath(file_or_url))
+
+    def enter(self, file_or_url: str, variety: str) -> bool:
+        """Mark a file as being expanded.
+
+        Returns False if it was expanded before and raises a RuntimeError if
+        it references itself, directly or through other files.
+        """
+        node = (variety, self.normalize(file_or_url))
+        if node in self._stack:
+            chain = self._names[self._stack.index(node) :] + [file_or_url]
+            raise RuntimeError(f"Circular reference of requirements/constraints files: {' -> '.join(chain)}")
+        if node in self._expanded:
+            return False
+        self._expanded.add(node)
+        self._stack.append(node)
+        self._names.append(file_or_url)
+        return True
+
+    def leave(self) -> None:
+        self._stack.pop()
+        self._names.pop()
+
+
+def _filter_line(line: str, variety: str, requirement_filter: RequirementFilter) -> str:
+    """Comment out a requirement line if mxdev takes care of its package."""
+    parsed_name = requirement_name(line)
+    if parsed_name is None:
+        logger.debug(f"Line is not a requirement specifier: {line.strip()!r}")
+        return line
+    name = canonicalize_name(parsed_name)
+    if name in requirement_filter.package_keys:
+        line = f"# {line.strip()} -> mxdev disabled (source)\n"
+    if name in requirement_filter.override_keys:
+        if variety == "c":
+            line = f"# {line.strip()} -> mxdev disabled (override)\n"
+        else:
+            line = f"# {line.strip()} -> mxdev disabled (version override)\n"
+    if name in requirement_filter.ignore_keys:
+        line = f"# {line.strip()} -> mxdev disabled (ignore)\n"
+    return line
 
 
 def process_line(
@@ -84,6 +265,11 @@ def process_line(
     variety: str,
     offline: bool = False,
     cache_dir: Path | None = None,
+    requirement_filter: RequirementFilter | None = None,
+    prefetcher: HTTPPrefetcher | None = None,
+    http_cache: HTTPCache | None = None,
+    parse_cache: bool = False,
+    graph: ResolutionGraph | None = None,
 ) -> tuple[list[str], list[str]]:
     """Take line from a constraints or requirements file and process it recursively.
 
@@ -96,49 +282,20 @@ def process_line(
     is in package_keys, override_keys or ignore_keys
         prefix the line as comment with reason appended
 
+    If a precompiled ``requirement_filter`` is given, it is used instead of
+    the key lists.
+
     returns tuple of requirements and constraints
     """
-    if isinstance(line, bytes):
-        line = line.decode("utf8")
-    logger.debug(f"Process Line [{variety}]: {line.strip()}")
-    if line.startswith("-c"):
-        return resolve_dependencies(
-            line.split(" ")[1].strip(),
-            package_keys=package_keys,
-            override_keys=override_keys,
-            ignore_keys=ignore_keys,
-            variety="c",
-            offline=offline,
-            cache_dir=cache_dir,
-        )
-    elif line.startswith("-r"):
-        return resolve_dependencies(
-            line.split(" ")[1].strip(),
-            package_keys=package_keys,
-            override_keys=override_keys,
-            ignore_keys=ignore_keys,
-            variety="r",
-            offline=offline,
-            cache_dir=cache_dir,
-        )
-    try:
-        parsed = Requirement(line.strip())
-    except Exception:
-        logger.debug(f"Line is not a requirement specifier: {line.strip()!r}")
-    else:
-        parsed_name_lower = parsed.name.lower()
-        if parsed_name_lower in [k.lower() for k in package_keys]:
-            line = f"# {line.strip()} -> mxdev disabled (source)\n"
-        if parsed_name_lower in [k.lower() for k in override_keys]:
-            if variety == "c":
-                line = f"# {line.strip()} -> mxdev disabled (override)\n"
-            else:
-                line = f"# {line.strip()} -> mxdev disabled (version override)\n"
-        if parsed_name_lower in [k.lower() for k in ignore_keys]:
-            line = f"# {line.strip()} -> mxdev disabled (ignore)\n"
-    if variety == "c":
-        return [], [line]
-    return [line], []
+    if requirement_filter is None:
+        requirement_filter = RequirementFilter(package_keys, override_keys, ignore_keys)
+    requirements: list[str] = []
+    constraints: list[str] = []
+    for line_variety, new_line in _iter_lines(
+        [line], variety, requirement_filter, offline, cache_dir, prefetcher, http_cache, parse_cache, graph
+    ):
+        (requirements if line_variety == "r" else constraints).append(new_line)
+    return requirements, constraints
 
 
 def process_io(
@@ -151,18 +308,56 @@ def process_io(
     variety: str,
     offline: bool = False,
     cache_dir: Path | None = None,
+    requirement_filter: RequirementFilter | None = None,
+    prefetcher: HTTPPrefetcher | None = None,
+    http_cache: HTTPCache | None = None,
+    parse_cache: bool = False,
+    graph: ResolutionGraph | None = None,
 ) -> None:
     """Read lines from an open file and trigger processing of each line
 
     each line is processed and the result appendend to given requirements
     and constraint lists.
     """
-    for line in fio:
-        new_requirements, new_constraints = process_line(
-            line, package_keys, override_keys, ignore_keys, variety, offline, cache_dir
-        )
-        requirements += new_requirements
-        constraints += new_constraints
+    if requirement_filter is None:
+        requirement_filter = RequirementFilter(package_keys, override_keys, ignore_keys)
+    for line_variety, line in _iter_lines(
+        fio, variety, requirement_filter, offline, cache_dir, prefetcher, http_cache, parse_cache, graph
+    ):
+        (requirements if line_variety == "r" else constraints).append(line)
+
+
+def _iter_lines(
+    lines: typing.Iterable[str | bytes],
+    variety: str,
+    requirement_filter: RequirementFilter,
+    offline: bool,
+    cache_dir: Path | None,
+    prefetcher: HTTPPrefetcher | None,
+    http_cache: HTTPCache | None,
+    parse_cache: bool,
+    graph: ResolutionGraph | None,
+) -> typing.Iterator[tuple[str, str]]:
+    """Yield ``(variety, line)`` for each processed line, expanding references."""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf8")
+        logger.debug(f"Process Line [{variety}]: {line.strip()}")
+        reference = _parse_reference(line)
+        if reference is not None:
+            yield from iter_dependencies(
+                reference[1],
+                requirement_filter,
+                variety=reference[0],
+                offline=offline,
+                cache_dir=cache_dir,
+                prefetcher=prefetcher,
+                http_cache=http_cache,
+                parse_cache=parse_cache,
+                graph=graph,
+            )
+        else:
+            yield variety, _filter_line(line, variety, requirement_filter)
 
 
 def resolve_dependencies(
@@ -173,6 +368,11 @@ def resolve_dependencies(
     variety: str = "r",
     offline: bool = False,
     cache_dir: Path | None = None,
+    requirement_filter: RequirementFilter | None = None,
+    prefetcher: HTTPPrefetcher | None = None,
+    http_cache: HTTPCache | None = None,
+    parse_cache: bool = False,
+    graph: ResolutionGraph | None = None,
 ) -> tuple[list[str], list[str]]:
     """Takes a file or url, loads it and trigger to recursivly processes its content.
 
@@ -184,123 +384,206 @@ def resolve_dependencies(
         variety: "r" for requirements, "c" for constraints
         offline: If True, use cached HTTP content and don't make network requests
         cache_dir: Directory for caching HTTP content (default: ./.mxdev_cache)
+        requirement_filter: Precompiled name lookup, built from the key lists
+            if not given
+        prefetcher: Downloads remote references in parallel; a new one is
+            started for the whole tree if not given and not offline
+        http_cache: Cache for HTTP content, created in cache_dir if not given
+        parse_cache: If True, parsed requirement names are cached on disk in
+            cache_dir, keyed by the content hash of each file
+        graph: Files already expanded in this run; a new one is started for
+            the whole tree if not given
 
     Returns:
         Tuple of (requirements, constraints) as lists of strings
 
     """
+    if requirement_filter is None:
+        requirement_filter = RequirementFilter(package_keys, override_keys, ignore_keys)
     requirements: list[str] = []
     constraints: list[str] = []
+    for line_variety, line in iter_dependencies(
+        file_or_url,
+        requirement_filter,
+        variety=variety,
+        offline=offline,
+        cache_dir=cache_dir,
+        prefetcher=prefetcher,
+        http_cache=http_cache,
+        parse_cache=parse_cache,
+        graph=graph,
+    ):
+        (requirements if line_variety == "r" else constraints).append(line)
+    return (requirements, constraints)
+
+
+def iter_dependencies(
+    file_or_url: str,
+    requirement_filter: RequirementFilter,
+    variety: str = "r",
+    offline: bool = False,
+    cache_dir: Path | None = None,
+    prefetcher: HTTPPrefetcher | None = None,
+    http_cache: HTTPCache | None = None,
+    parse_cache: bool = False,
+    graph: ResolutionGraph | None = None,
+) -> typing.Iterator[tuple[str, str]]:
+    """Stream the processed lines of a file or url and everything it references.
+
+    Yields ``(variety, line)`` tuples, where variety is "r" for lines of the
+    requirements output and "c" for lines of the constraints output, in the
+    order they are written. Nested files are streamed through, their lines
+    are never collected per nesting level. See :func:`resolve_dependencies`
+    for the arguments.
+    """
     if not file_or_url.strip():
         logger.info("mxdev is configured to run without input requirements!")
-        return ([], [])
-    logger.info(f"Read [{variety}]: {file_or_url}")
-    parsed = parse.urlparse(file_or_url)
-    variety_verbose = "requirements" if variety == "r" else "constraints"
-    # Check if it's a real URL scheme (not a Windows drive letter)
-    # Windows drive letters are single characters, URL schemes are longer
-    is_url = parsed.scheme and len(parsed.scheme) > 1
+        return
 
     # Default cache directory
     if cache_dir is None:
         cache_dir = Path(".mxdev_cache")
+    if http_cache is None:
+        http_cache = HTTPCache(cache_dir)
+
+    if prefetcher is None and not offline:
+        # Start downloading all remote references of the tree, then process
+        # it in order, picking up the downloads as they are needed.
+        with HTTPPrefetcher(http_cache) as prefetcher:
+            prefetcher.discover(file_or_url)
+            yield from iter_dependencies(
+                file_or_url,
+                requirement_filter,
+                variety=variety,
+                offline=offline,
+                cache_dir=cache_dir,
+                prefetcher=prefetcher,
+                http_cache=http_cache,
+                parse_cache=parse_cache,
+                graph=graph,
+            )
+        return
 
-    if not is_url:
+    if graph is None:
+        graph = ResolutionGraph()
+    if not graph.enter(file_or_url, variety):
+        logger.info(f"Skip [{variety}]: {file_or_url} (already included)")
+        yield variety, f"# -{variety} {file_or_url} -> mxdev skipped (already included)\n"
+        return
+    try:
+        yield from _iter_file(
+            file_or_url,
+            variety,
+            requirement_filter,
+            offline,
+            cache_dir,
+            prefetcher,
+            http_cache,
+            parse_cache,
+            graph,
+        )
+    finally:
+        graph.leave()
+
+
+def _read_content(
+    file_or_url: str,
+    variety: str,
+    offline: bool,
+    prefetcher: HTTPPrefetcher | None,
+    http_cache: HTTPCache,
+) -> str | None:
+    variety_verbose = "requirements" if variety == "r" else "constraints"
+    if not _is_url(file_or_url):
         requirements_in_file = Path(file_or_url)
         if requirements_in_file.exists():
-            with requirements_in_file.open("r") as fio:
-                process_io(
-                    fio,
-                    requirements,
-                    constraints,
-                    package_keys,
-                    override_keys,
-                    ignore_keys,
-                    variety,
-                    offline,
-                    cache_dir,
-                )
-        else:
-            logger.info(
-                f"Can not read {variety_verbose} file '{file_or_url}', " "it does not exist. Empty file assumed."
-            )
-    else:
+            return requirements_in_file.read_text()
+        logger.info(f"Can not read {variety_verbose} file '{file_or_url}', it does not exist. Empty file assumed.")
+        return None
+    if offline:
         # HTTP(S) URL handling with caching
-        content: str
-        if offline:
-            # Offline mode: try to read from cache
-            cached_content = _read_from_cache(file_or_url, cache_dir)
-            if cached_content is None:
-                raise RuntimeError(
-                    f"Offline mode: HTTP reference '{file_or_url}' not found in cache. "
-                    f"Run mxdev in online mode first to populate the cache at {cache_dir}"
-                )
-            content = cached_content
-            logger.info(f"Using cached content for {file_or_url}")
-        else:
-            # Online mode: fetch from HTTP and cache it
-            try:
-                with request.urlopen(file_or_url) as fio:
-                    content = fio.read().decode("utf-8")
-                # Cache the content for future offline use
-                _cache_http_content(file_or_url, content, cache_dir)
-            except URLError as e:
-                raise Exception(f"Failed to fetch '{file_or_url}': {e}")
-
-        # Process the content (either from cache or fresh from HTTP)
-        from io import StringIO
-
-        with StringIO(content) as fio:
-            process_io(
-                fio,
-                requirements,
-                constraints,
-                package_keys,
-                override_keys,
-                ignore_keys,
-                variety,
-                offline,
-                cache_dir,
+        # Offline mode: try to read from cache
+        content = http_cache.read(file_or_url)
+        if content is None:
+            raise RuntimeError(
+                f"Offline mode: HTTP reference '{file_or_url}' not found in cache. "
+                f"Run mxdev in online mode first to populate the cache at {http_cache.directory}"
             )
+        logger.info(f"Using cached content for {file_or_url}")
+        return content
+    if prefetcher is not None:
+        # Online mode: the download was already started by the prefetcher
+        return prefetcher.get(file_or_url)
+    return _fetch_http(file_or_url, http_cache)
 
-    if requirements and variety == "r":
-        requirements = (
-            [
-                "#" * 79 + "\n",
-                f"# begin requirements from: {file_or_url}\n\n",
-            ]
-            + requirements
-            + ["\n", f"# end requirements from: {file_or_url}\n", "#" * 79 + "\n"]
-        )
-    if constraints and variety == "c":
-        constraints = (
-            [
-                "#" * 79 + "\n",
-                f"# begin constraints from: {file_or_url}\n",
-                "\n",
-            ]
-            + constraints
-            + ["\n", f"# end constraints from: {file_or_url}\n", "#" * 79 + "\n\n"]
-        )
-    return (requirements, constraints)
+
+def _iter_file(
+    file_or_url: str,
+    variety: str,
+    requirement_filter: RequirementFilter,
+    offline: bool,
+    cache_dir: Path,
+    prefetcher: HTTPPrefetcher | None,
+    http_cache: HTTPCache,
+    parse_cache: bool,
+    graph: ResolutionGraph,
+) -> typing.Iterator[tuple[str, str]]:
+    """Stream a single file for :func:`iter_dependencies`.
+
+    Lines of the file's own variety are framed by begin/end comments, which
+    are only emitted if there is at least one such line.
+    """
+    logger.info(f"Read [{variety}]: {file_or_url}")
+    content = _read_content(file_or_url, variety, offline, prefetcher, http_cache)
+    if content is None:
+        return
+    if parse_cache:
+        preload_requirement_names(content, cache_dir / PARSED_DIR)
+    variety_verbose = "requirements" if variety == "r" else "constraints"
+    framed = False
+    with StringIO(content) as fio:
+        for item in _iter_lines(
+            fio, variety, requirement_filter, offline, cache_dir, prefetcher, http_cache, parse_cache, graph
+        ):
+            if not framed and item[0] == variety:
+                framed = True
+                yield variety, "#" * 79 + "\n"
+                if variety == "r":
+                    yield variety, f"# begin requirements from: {file_or_url}\n\n"
+                else:
+                    yield variety, f"# begin constraints from: {file_or_url}\n"
+                    yield variety, "\n"
+            yield item
+    if framed:
+        yield variety, "\n"
+        yield variety, f"# end {variety_verbose} from: {file_or_url}\n"
+        yield variety, "#" * 79 + ("\n" if variety == "r" else "\n\n")
 
 
 def read(state: State) -> None:
     """Start reading and recursive processing of a requirements file
 
-    The result is stored on the state object
+    The lines are streamed into one text buffer per output file and stored on
+    the state object. They are split into lists only if a hook accesses them.
     """
     from .config import to_bool
 
     cfg = state.configuration
     offline = to_bool(cfg.settings.get("offline", False))
-    state.requirements, state.constraints = resolve_dependencies(
-        file_or_url=cfg.infile,
-        package_keys=cfg.package_keys,
-        override_keys=cfg.override_keys,
-        ignore_keys=cfg.ignore_keys,
+    http_cache = HTTPCache.from_settings(cfg.settings)
+    buffers = {"r": StringIO(), "c": StringIO()}
+    for variety, line in iter_dependencies(
+        cfg.infile,
+        RequirementFilter.from_configuration(cfg),
         offline=offline,
-    )
+        http_cache=http_cache,
+        parse_cache=to_bool(cfg.settings.get("parse-cache", False)),
+    ):
+        buffers[variety].write(line)
+    state.requirements = Lines(buffers["r"].getvalue())
+    state.constraints = Lines(buffers["c"].getvalue())
+    if not offline:
+        http_cache.prune()
 
 
 def fetch(state: State) -> None:
@@ -315,21 +598,37 @@ def fetch(state: State) -> None:
 
     logger.info("# Fetch sources from VCS")
     smart_threading = to_bool(state.configuration.settings.get("smart-threading", True))
-    workingcopies = WorkingCopies(
+    # Pass offline setting from configuration instead of hardcoding False
+    offline = to_bool(state.configuration.settings.get("offline", False))
+    credentials = None
+    if smart_threading and to_bool(state.configuration.settings.get("credential-preflight", True)):
+        prompt = to_bool(state.configuration.settings.get("credential-prompt", False))
+        credentials = CredentialBroker(interactive=prompt and sys.stdin is not None and sys.stdin.isatty())
+    host_limits = state.configuration.settings.get("host-limits", "").strip()
+    if to_bool(state.configuration.settings.get("toolchain-cache", True)):
+        toolchain.persist(Path(DEFAULT_CACHE_DIR) / TOOLCHAIN_FILE)
+    with WorkingCopies(
         packages,
         threads=int(state.configuration.settings["threads"]),
         smart_threading=smart_threading,
-    )
-    # Pass offline setting from configuration instead of hardcoding False
-    offline = to_bool(state.configuration.settings.get("offline", False))
-    workingcopies.checkout(
-        sorted(packages),
-        verbose=False,
-        update=True,
-        submodules="always",
-        always_accept_server_certificate=True,
-        offline=offline,
-    )
+        dirty_policy=state.configuration.settings.get("dirty-policy", "ask"),
+        credentials=credentials,
+        history=DurationHistory(Path(DEFAULT_CACHE_DIR) / HISTORY_FILE),
+        host_limits=HostLimiter(parse_host_limits(host_limits)) if host_limits else None,
+        retry=RetryPolicy(
+            attempts=int(state.configuration.settings.get("retry-attempts", 3)),
+            backoff=float(state.configuration.settings.get("retry-backoff", 1.0)),
+        ),
+    ) as workingcopies:
+        workingcopies.checkout(
+            sorted(packages),
+            verbose=False,
+            update=True,
+            submodules="always",
+            always_accept_server_certificate=True,
+            offline=offline,
+        )
+    toolchain.save()
 
 
 def write_dev_sources(fio, packages: dict[str, dict[str, typing.Any]], state: State):
@@ -401,8 +700,9 @@ def write_dev_overrides(fio, overrides: dict[str, str], package_keys: list[str])
     """Create requirements configuration for overridden packages."""
     fio.write("#" * 79 + "\n")
     fio.write("# mxdev constraint overrides\n")
+    source_keys = {canonicalize_name(k) for k in package_keys}
     for pkg, line in overrides.items():
-        if pkg.lower() in [k.lower() for k in package_keys]:
+        if canonicalize_name(pkg) in source_keys:
             fio.write(f"# {line} IGNORE mxdev constraint override. Source override wins!\n")
         else:
             fio.write(f"{line}\n")
@@ -418,25 +718,75 @@ def write_main_package(fio, settings: dict[str, str]):
         fio.write(f"{main_package}\n")
 
 
+def write_if_changed(path: str | Path, content: str) -> bool:
+    """Write content to a file unless the file already has exactly this content.
+
+    The file is replaced atomically, so readers never see a half written file.
+    An unchanged file keeps its modification time. Returns True if written.
+    """
+    path = Path(path)
+    new_hash = hashlib.sha256(content.encode("utf-8")).digest()
+    if path.exists():
+        with open(path) as fio:
+            if hashlib.sha256(fio.read().encode("utf-8")).digest() == new_hash:
+                return False
+    tmp = None
+    try:
+        with tempfile.NamedTemporaryFile(mode="w", dir=path.parent, suffix=".tmp", delete=False) as fio:
+            tmp = fio.name
+            fio.write(content)
+        if path.exists():
+            shutil.copymode(path, tmp)
+        else:
+            os.chmod(tmp, 0o666 & ~_umask())
+        os.replace(tmp, path)
+        tmp = None
+    finally:
+        if tmp and os.path.exists(tmp):
+            os.unlink(tmp)
+    return True
+
+
+def _umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def _write_lines(fio: typing.IO, lines: typing.Iterable[str]) -> None:
+    if isinstance(lines, Lines):
+        fio.write(lines.text)
+    else:
+        fio.writelines(lines)
+
+
 def write(state: State) -> None:
     """Write the requirements and constraints file according to information
     on the state
+
+    Both files are rendered in memory first and only written if their content
+    changed. ``state.outfiles_changed`` tells whether any file was written.
     """
     requirements = state.requirements
     constraints = state.constraints
     cfg = state.configuration
     logger.info("#" * 79)
     logger.info("# Write outfiles")
+    changed = False
     if constraints or cfg.overrides:
-        logger.info(f"Write [c]: {cfg.out_constraints}")
-        with open(cfg.out_constraints, "w") as fio:
-            fio.writelines(constraints)
+        with StringIO() as fio:
+            _write_lines(fio, constraints)
             if cfg.overrides:
                 write_dev_overrides(fio, cfg.overrides, cfg.package_keys)
+            content = fio.getvalue()
+        if write_if_changed(cfg.out_constraints, content):
+            logger.info(f"Write [c]: {cfg.out_constraints}")
+            changed = True
+        else:
+            logger.info(f"Unchanged [c]: {cfg.out_constraints}")
     else:
         logger.info("No constraints, skip writing constraints file")
-    logger.info(f"Write [r]: {cfg.out_requirements}")
-    with open(cfg.out_requirements, "w") as fio:
+    with StringIO() as fio:
         if constraints or cfg.overrides:
             # Calculate relative path from requirements-out directory to constraints-out file
             # This ensures pip can find the constraints file regardless of where requirements
@@ -459,5 +809,12 @@ def write(state: State) -> None:
             fio.write("# mxdev combined constraints\n")
             fio.write(f"-c {constraints_ref}\n\n")
         write_dev_sources(fio, cfg.packages, state)
-        fio.writelines(requirements)
+        _write_lines(fio, requirements)
         write_main_package(fio, cfg.settings)
+        content = fio.getvalue()
+    if write_if_changed(cfg.out_requirements, content):
+        logger.info(f"Write [r]: {cfg.out_requirements}")
+        changed = True
+    else:
+        logger.info(f"Unchanged [r]: {cfg.out_requirements}")
+    state.outfiles_changed = changed
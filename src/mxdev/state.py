@@ -1,10 +1,63 @@
 from .config import Configuration
+from collections import UserList
+from collections.abc import Iterable
+from collections.abc import MutableSequence
 from dataclasses import dataclass
 from dataclasses import field
 
 
+class Lines(UserList):
+    """Lines of a generated file, kept as a single text until needed.
+
+    Behaves like a list of lines. The text is only split into a list when
+    the lines are accessed; writing the file uses ``text``. Hooks get plain
+    lists instead, see :meth:`State.expand`.
+    """
+
+    def __init__(self, lines: str | Iterable[str] = "") -> None:
+        # UserList builds slices, sums and copies from lists
+        self._text = lines if isinstance(lines, str) else ""
+        self._data: list[str] | None = None if isinstance(lines, str) else list(lines)
+
+    @property
+    def data(self) -> list[str]:  # type: ignore[override]
+        if self._data is None:
+            self._data = self._text.splitlines(keepends=True)
+        return self._data
+
+    @data.setter
+    def data(self, value: list[str]) -> None:
+        self._data = value
+
+    @property
+    def text(self) -> str:
+        if self._data is None:
+            return self._text
+        return "".join(self._data)
+
+    def __bool__(self) -> bool:
+        if self._data is None:
+            return bool(self._text)
+        return bool(self._data)
+
+    def copy(self) -> "Lines":
+        if self._data is None:
+            return Lines(self._text)
+        return Lines(self._data)
+
+
 @dataclass
 class State:
     configuration: Configuration
-    requirements: list[str] = field(default_factory=list)
-    constraints: list[str] = field(default_factory=list)
+    # plain lists or, after read, ``Lines``
+    requirements: MutableSequence[str] = field(default_factory=list)
+    constraints: MutableSequence[str] = field(default_factory=list)
+    # set by write: False if the generated files already had the same content
+    outfiles_changed: bool = True
+
+    def expand(self) -> None:
+        """Turn ``Lines`` into plain lists, which hooks expect."""
+        if isinstance(self.requirements, Lines):
+            self.requirements = list(self.requirements)
+        if isinstance(self.constraints, Lines):
+            self.constraints = list(self.constraints)
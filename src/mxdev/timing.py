@@ -0,0 +1,203 @@
+"""Wall time spent in the phases of a mxdev run.
+
+Timing is off unless :func:`enable` was called, by ``--timings`` or ``--trace``.
+Code marks its phases with :func:`phase` (or :func:`timed` for methods of
+working copies), which costs next to nothing while timing is off.
+
+The main phases are ``read``, ``fetch``, ``write`` and ``hooks``. Each
+checkout or update of a package is a phase named after the action, and the
+git backend adds ``clone``, ``fetch``, ``switch``, ``merge``, ``submodules``
+and ``status`` phases for the package.
+
+Besides phases, spans of other categories are recorded for the timeline of
+:func:`trace`: each ``subprocess``, each ``http`` download, each ``hook``
+and the ``schedule`` of serial smart threading.
+"""
+
+from .logging import logger
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import functools
+import json
+import threading
+import time
+import typing
+
+
+# phases of the git backend, in the order of the summary table columns
+PACKAGE_PHASES = ("clone", "fetch", "switch", "merge", "submodules", "status")
+
+# actions of WorkingCopies, the total time of a package
+PACKAGE_ACTIONS = ("checkout", "update")
+
+SUMMARY_SIZE = 10
+
+
+@dataclass
+class Span:
+    name: str
+    # None for the main phases of the run
+    package: str | None
+    start: float
+    end: float
+    thread_id: int
+    thread_name: str
+    category: str = "phase"
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Recorder:
+    """Collects the spans of all threads."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def report(self) -> dict:
+        """Seconds per main phase and per package and phase."""
+        phases: dict[str, float] = {}
+        packages: dict[str, dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span.category != "phase":
+                continue
+            target = phases if span.package is None else packages.setdefault(span.package, {})
+            target[span.name] = target.get(span.name, 0.0) + span.duration
+        return {
+            "total": round(time.perf_counter() - self.start, 3),
+            "phases": {name: round(seconds, 3) for name, seconds in phases.items()},
+            "packages": {
+                package: {name: round(seconds, 3) for name, seconds in sorted(timings.items())}
+                for package, timings in sorted(packages.items())
+            },
+        }
+
+
+_recorder: Recorder | None = None
+
+
+def enable() -> Recorder:
+    global _recorder
+    _recorder = Recorder()
+    return _recorder
+
+
+def disable() -> None:
+    global _recorder
+    _recorder = None
+
+
+def recorder() -> Recorder | None:
+    return _recorder
+
+
+def record(name: str, start: float, package: str | None = None, category: str = "phase") -> None:
+    """Record a span from ``start`` (``time.perf_counter()``) until now in the current thread."""
+    current = _recorder
+    if current is None:
+        return
+    thread = threading.current_thread()
+    current.add(Span(name, package, start, time.perf_counter(), thread.ident or 0, thread.name, category))
+
+
+@contextmanager
+def phase(name: str, package: str | None = None, category: str = "phase") -> typing.Iterator[None]:
+    """Record the wall time of the block as a phase, of a package if given."""
+    if _recorder is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, start, package, category)
+
+
+def timed(name: str) -> typing.Callable:
+    """Decorate a working copy method to record it as a phase of its package."""
+
+    def decorator(method: typing.Callable) -> typing.Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with phase(name, self.source.get("name")):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def package_total(timings: dict[str, float]) -> float:
+    return sum(timings.get(action, 0.0) for action in PACKAGE_ACTIONS)
+
+
+def summary(report: dict, size: int = SUMMARY_SIZE) -> list[str]:
+    """Lines of a table of the slowest packages."""
+    packages = sorted(report["packages"].items(), key=lambda item: package_total(item[1]), reverse=True)
+    phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in report["phases"].items())
+    lines = [f"# Timings: total {report['total']:.2f}s ({phases})"]
+    if not packages:
+        return lines
+    width = max(len("package"), *(len(name) for name, _ in packages[:size]))
+    lines.append(f"# Slowest {min(size, len(packages))} of {len(packages)} packages:")
+    header = f"{'package':<{width}}  {'total':>8}" + "".join(f"  {name:>10}" for name in PACKAGE_PHASES)
+    lines.append(f"#   {header}")
+    for name, timings in packages[:size]:
+        row = f"{name:<{width}}  {package_total(timings):>7.2f}s"
+        for phase_name in PACKAGE_PHASES:
+            value = f"{timings[phase_name]:.2f}s" if phase_name in timings else "-"
+            row += f"  {value:>10}"
+        lines.append(f"#   {row}")
+    return lines
+
+
+def write_report(path: str | Path, report: dict) -> None:
+    Path(path).write_text(json.dumps(report, indent=1), encoding="utf-8")
+    logger.info(f"# Timings written to {path}")
+
+
+def trace(current: Recorder) -> dict:
+    """All spans in Trace Event Format, one track per thread.
+
+    Open it with https://ui.perfetto.dev or ``chrome://tracing``.
+    """
+    with current._lock:
+        spans = sorted(current.spans, key=lambda span: span.start)
+    tracks: dict[tuple[int, str], int] = {}
+    events: list[dict] = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": "mxdev"}}]
+    for span in spans:
+        # pool threads may reuse the ident of a finished thread
+        key = (span.thread_id, span.thread_name)
+        if key not in tracks:
+            tid = tracks[key] = len(tracks) + 1
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": span.thread_name}})
+            events.append({"name": "thread_sort_index", "ph": "M", "pid": 1, "tid": tid, "args": {"sort_index": tid}})
+        event = {
+            "name": span.name if span.package is None else f"{span.name} {span.package}",
+            "cat": span.category,
+            "ph": "X",
+            "ts": round((span.start - current.start) * 1e6, 1),
+            "dur": round(span.duration * 1e6, 1),
+            "pid": 1,
+            "tid": tracks[key],
+        }
+        if span.package is not None:
+            event["args"] = {"package": span.package}
+        events.append(event)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_trace(path: str | Path, current: Recorder) -> None:
+    Path(path).write_text(json.dumps(trace(current)), encoding="utf-8")
+    logger.info(f"# Trace written to {path}")
@@ -1,5 +1,7 @@
+from collections.abc import Iterable
 from mxdev.config import to_bool
 from mxdev.hooks import Hook
+from mxdev.parsing import requirement_name
 from mxdev.state import State
 from pathlib import Path
 from typing import Any
@@ -28,7 +30,7 @@ def _is_mxdev_managed_source(value: Any) -> bool:
     return _UV_SOURCE_MARKER in comment
 
 
-def _constraints_to_uv(constraints: list[str]) -> list[tuple[str, str]]:
+def _constraints_to_uv(constraints: Iterable[str]) -> list[tuple[str, str]]:
     """Turn resolved constraint lines into ordered uv array items.
 
     Mirrors ``constraints-mxdev.txt`` into TOML-array form: specifier lines
@@ -36,8 +38,6 @@ def _constraints_to_uv(constraints: list[str]) -> list[tuple[str, str]]:
     ``("comment", text)``, preserving source order. Decorative ``####`` rules,
     blank lines, and non-PEP-508 lines (e.g. ``--hash``) are dropped.
     """
-    from packaging.requirements import Requirement
-
     items: list[tuple[str, str]] = []
     for raw in constraints:
         stripped = raw.strip()
@@ -49,9 +49,7 @@ def _constraints_to_uv(constraints: list[str]) -> list[tuple[str, str]]:
         if stripped.startswith("#"):
             items.append(("comment", stripped.lstrip("#").strip()))
             continue
-        try:
-            Requirement(stripped)
-        except Exception:
+        if requirement_name(stripped) is None:
             logger.debug("[uv] Skipping non-PEP-508 constraint line: %s", stripped)
             continue
         items.append(("entry", stripped))
@@ -66,8 +64,14 @@ class UvPyprojectUpdater(Hook):
     def read(self, state: State) -> None:
         pass
 
+    def files(self, state: State) -> list[str]:
+        return [str(self._pyproject_path(state))]
+
+    def _pyproject_path(self, state: State) -> Path:
+        return Path(state.configuration.settings.get("directory", ".")) / "pyproject.toml"
+
     def write(self, state: State) -> None:
-        pyproject_path = Path(state.configuration.settings.get("directory", ".")) / "pyproject.toml"
+        pyproject_path = self._pyproject_path(state)
         if not pyproject_path.exists():
             logger.debug("[%s] pyproject.toml not found, skipping.", self.namespace)
             return
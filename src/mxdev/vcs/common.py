@@ -1,16 +1,35 @@
+from .. import timing
 from ..entry_points import load_eps_by_group
+from . import toolchain
+from .limits import host_of
+from .limits import HostLimiter
+from .retry import RetryPolicy
+from concurrent.futures import Executor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
 
 import abc
 import logging
+import math
 import os
 import platform
 import queue
 import re
+import shutil
+import subprocess
 import sys
 import threading
+import time
 import typing
 
 
+if typing.TYPE_CHECKING:
+    from .credentials import CredentialBroker
+    from .history import DurationHistory
+
 logger = logging.getLogger("mxdev")
 
 
@@ -20,9 +39,22 @@ def print_stderr(s: str):
     sys.stderr.flush()
 
 
+def which(name_root: str, default: str | None = None) -> str:
+    """Path of an executable on ``PATH``, looked up once per process."""
+    executable = toolchain.registry.executable(name_root, lambda: _find_executable(name_root))
+    if executable is not None:
+        return executable
+
+    if default is not None:
+        return default
+
+    logger.error("Cannot find executable %s in PATH", name_root)
+    sys.exit(1)
+
+
 # taken from
 # http://stackoverflow.com/questions/377017/test-if-executable-exists-in-python
-def which(name_root: str, default: str | None = None) -> str:
+def _find_executable(name_root: str) -> str | None:
     if platform.system() == "Windows":
         # http://www.voidspace.org.uk/python/articles/command_line.shtml#pathext
         pathext = os.environ["PATHEXT"]
@@ -36,12 +68,45 @@ def which(name_root: str, default: str | None = None) -> str:
             exe_file = os.path.join(path, name)
             if os.path.exists(exe_file) and os.access(exe_file, os.X_OK):
                 return exe_file
+    return None
 
-    if default is not None:
-        return default
 
-    logger.error("Cannot find executable %s in PATH", name_root)
-    sys.exit(1)
+def _command_name(args: list[str]) -> str:
+    return " ".join([os.path.basename(args[0]), *args[1:3]])
+
+
+class TimedPopen(subprocess.Popen):
+    """``subprocess.Popen`` recording its lifetime as a span for the trace."""
+
+    def __init__(self, args: list[str], **kwargs) -> None:
+        self._start = time.perf_counter()
+        self._command = _command_name(args)
+        self._recorded = False
+        super().__init__(args, **kwargs)
+
+    def _record(self) -> None:
+        if not self._recorded and self.returncode is not None:
+            self._recorded = True
+            timing.record(self._command, self._start, category="subprocess")
+
+    def communicate(self, input=None, timeout=None):
+        try:
+            return super().communicate(input, timeout)
+        finally:
+            self._record()
+
+    def wait(self, timeout=None):
+        try:
+            return super().wait(timeout)
+        finally:
+            self._record()
+
+
+def popen(args: list[str], **kwargs) -> subprocess.Popen:
+    """Start a command, recorded for the trace while timing is enabled."""
+    if timing.recorder() is not None:
+        return TimedPopen(args, **kwargs)
+    return subprocess.Popen(args, **kwargs)
 
 
 def version_sorted(inp: list, *args, **kwargs) -> list:
@@ -159,24 +224,200 @@ def get_workingcopytypes() -> dict[str, type[BaseWorkingCopy]]:
     return _workingcopytypes
 
 
+# What to do with a dirty working copy which should be updated: ask the user,
+# skip it or update it anyway
+DIRTY_POLICIES = ("ask", "skip", "update")
+
+
+@dataclass
+class TaskResult:
+    """Outcome of one checkout or update of a package."""
+
+    name: str
+    action: str
+    # "ok", "error" or "skipped" (not started because of an earlier error)
+    status: str
+    duration: float = 0.0
+    output: str | None = None
+    error: str | None = None
+    attempts: int = 1
+
+
 class WorkingCopies:
     def __init__(
         self,
         sources: dict[str, dict],
         threads=5,
         smart_threading=True,
+        executor: Executor | None = None,
+        dirty_policy: str = "ask",
+        credentials: "CredentialBroker | None" = None,
+        history: "DurationHistory | None" = None,
+        host_limits: HostLimiter | None = None,
+        retry: RetryPolicy | None = None,
     ):
+        if dirty_policy not in DIRTY_POLICIES:
+            raise ValueError(f"dirty-policy must be one of {', '.join(DIRTY_POLICIES)}, not '{dirty_policy}'")
         self.sources = sources
         self.threads = threads
         self.smart_threading = smart_threading
+        self.dirty_policy = dirty_policy
+        self.credentials = credentials
+        self.history = history
+        self.host_limits = host_limits
+        self.retry = retry
         self.errors = False
+        self.results: list[TaskResult] = []
         self.workingcopytypes = get_workingcopytypes()
+        # one pool for all phases, created on first parallel use unless given
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    def __enter__(self) -> "WorkingCopies":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the thread pool, if it was created by this instance.
+
+        Durations of the tasks are saved to the history, if there is one.
+        """
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.history is not None and self.results:
+            self.history.record(self.results)
+            self.history.save()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(self.threads, 1), thread_name_prefix="mxdev-vcs")
+        return self._executor
+
+    def run_task(self, wc: BaseWorkingCopy, action: typing.Callable, kwargs: dict) -> TaskResult:
+        """Run a checkout or update and report its output and outcome.
+
+        The messages collected by the working copy are logged at once, so
+        the output of parallel tasks does not interleave.
+        """
+        name = wc.source.get("name", "")
+        action_name = getattr(action, "__name__", str(action))
+        if self.errors:
+            result = TaskResult(name, action_name, "skipped")
+            self.results.append(result)
+            return result
+        start = time.monotonic()
+        attempt = 1
+        path = wc.source.get("path")
+        # a failed checkout into a new directory leaves a partial one behind,
+        # which a retry would take for an existing checkout and update
+        new_path = path if action_name == "checkout" and path and not os.path.lexists(path) else None
+        while True:
+            try:
+                with timing.phase(action_name, name):
+                    output = action(**kwargs)
+            except WCError as e:
+                if self._retry(wc, name, action_name, e, attempt):
+                    if new_path is not None and os.path.lexists(new_path):
+                        _remove_path(new_path)
+                    attempt += 1
+                    continue
+                result = TaskResult(
+                    name, action_name, "error", time.monotonic() - start, error=str(e), attempts=attempt
+                )
+                with output_lock:
+                    for lvl, msg in wc._output:
+                        lvl(msg)
+                    # WCError is an expected operational failure: show a clean,
+                    # actionable message and keep the full traceback for debug only.
+                    logger.error("%s", e)
+                    logger.debug("Traceback for the error above:", exc_info=True)
+                    self.errors = True
+            else:
+                if isinstance(output, bytes):
+                    output = output.decode("utf8")
+                result = TaskResult(name, action_name, "ok", time.monotonic() - start, output=output, attempts=attempt)
+                with output_lock:
+                    for lvl, msg in wc._output:
+                        lvl(msg)
+                    if kwargs.get("verbose", False) and output is not None and output.strip():
+                        print(output)
+            break
+        self.results.append(result)
+        return result
+
+    def _retry(self, wc: BaseWorkingCopy, name: str, action_name: str, error: WCError, attempt: int) -> bool:
+        """Wait and return True if the failed attempt should be repeated.
+
+        Only transient failures are retried, and none after another task failed.
+        """
+        policy = self.retry
+        if policy is None or attempt >= policy.attempts or self.errors or not policy.is_transient(str(error)):
+            return False
+        delay = policy.delay(attempt)
+        reason = str(error).strip().splitlines()[-1] if str(error).strip() else type(error).__name__
+        with output_lock:
+            logger.warning(
+                f"{action_name.capitalize()} of '{name}' failed ({reason}), "
+                f"retrying in {delay:.1f}s (attempt {attempt + 1} of {policy.attempts})"
+            )
+        # the messages of the failed attempt are replaced by those of the next
+        del wc._output[:]
+        time.sleep(delay)
+        return True
+
+    def submit(self, wc: BaseWorkingCopy, action: typing.Callable, kwargs: dict) -> Future:
+        """Schedule a task on the shared pool, also while others are running."""
+        return self.executor.submit(self.run_task, wc, action, kwargs)
+
+    def _inspect(self, candidates: list[tuple[BaseWorkingCopy, bool]]) -> list[tuple[bool, bool, typing.Any]]:
+        """Check ``(exists, islink, status)`` of working copies, concurrently.
+
+        The status is only asked for existing, not linked working copies
+        whose flag is set, otherwise it is None.
+        """
+
+        def inspect(candidate: tuple[BaseWorkingCopy, bool]) -> tuple[bool, bool, typing.Any]:
+            wc, check_status = candidate
+            path = wc.source["path"]
+            if not os.path.exists(path):
+                return False, False, None
+            if os.path.islink(path):
+                return True, True, None
+            return True, False, wc.status() if check_status else None
+
+        if self.threads < 2 or len(candidates) < 2:
+            return [inspect(candidate) for candidate in candidates]
+        return list(self.executor.map(inspect, candidates))
+
+    def _update_dirty(self, name: str, kw: dict, kwargs: dict) -> bool:
+        """Decide whether a dirty working copy is updated, by policy or prompt."""
+        if self.dirty_policy == "skip":
+            logger.info(f"Skipped update of dirty '{name}'.")
+            return False
+        if self.dirty_policy == "update":
+            logger.info(f"Updating dirty '{name}' anyway.")
+            kw["force"] = True
+            return True
+        print_stderr(f"The package '{name}' is dirty.")
+        answer = yesno("Do you want to update it anyway?", default=False, all=True)
+        if answer:
+            kw["force"] = True
+            if answer == "all":
+                kwargs["force"] = True
+            return True
+        logger.info(f"Skipped update of '{name}'.")
+        return False
 
     def _separate_https_packages(self, packages: list[str]) -> tuple[list[str], list[str]]:
         """Separate HTTPS packages from others for smart threading.
 
         HTTPS packages WITH pushurl are safe for parallel processing
-        (pushurl implies the https url is read-only/public).
+        (pushurl implies the https url is read-only/public), as are those on
+        hosts whose credentials the credential broker resolved up front.
 
         Returns (https_packages, other_packages)
         """
@@ -192,30 +433,92 @@ class WorkingCopies:
             has_pushurl = "pushurl" in source
 
             if url.startswith("https://") and not has_pushurl:
-                # HTTPS without pushurl: may need credentials, process serially
-                https_packages.append(name)
+                if self.credentials is not None and self.credentials.resolve(url):
+                    # credentials known: git will not prompt, safe for parallel
+                    other_packages.append(name)
+                else:
+                    # HTTPS without pushurl: may need credentials, process serially
+                    https_packages.append(name)
             else:
                 # SSH, fs, or HTTPS with pushurl: safe for parallel
                 other_packages.append(name)
 
         return https_packages, other_packages
 
-    def process(self, the_queue: queue.Queue) -> None:
-        if self.threads < 2:
-            worker(self, the_queue)
-            return
-        threads = []
+    def _drain(self, the_queue: queue.Queue) -> list[tuple]:
+        tasks = []
+        while True:
+            try:
+                tasks.append(the_queue.get_nowait())
+            except queue.Empty:
+                return tasks
+
+    def _schedule(self, tasks: list[tuple]) -> list[int]:
+        """Indexes of the tasks in the order to start them.
+
+        With a history the longest expected tasks start first, otherwise
+        in queue order.
+        """
+        if self.history is None:
+            return list(range(len(tasks)))
+        return self.history.schedule(
+            [
+                (wc.source.get("name", ""), getattr(action, "__name__", str(action)), wc.source.get("path", ""))
+                for wc, action, _ in tasks
+            ]
+        )
+
+    def _dispatch(self, tasks: list[tuple], limiter: HostLimiter) -> dict[int, Future]:
+        """Submit the tasks in scheduled order, as far as their host limits allow.
+
+        A task waiting for its host does not hold a thread, tasks on other
+        hosts start meanwhile.
+        """
+        hosts = [host_of(wc.source.get("url", "")) for wc, _, _ in tasks]
+        pending = self._schedule(tasks)
+        running: dict[Future, int] = {}
+        futures = {}
+        while pending or running:
+            delay = math.inf
+            for index in list(pending):
+                if len(running) >= self.threads:
+                    break
+                wait_for = limiter.acquire(hosts[index])
+                if wait_for:
+                    delay = min(delay, wait_for)
+                    continue
+                pending.remove(index)
+                future = futures[index] = self.submit(*tasks[index])
+                running[future] = index
+            if not running:
+                # only the rate limit holds back the pending tasks
+                time.sleep(delay)
+                continue
+            done, _ = wait(running, timeout=None if delay == math.inf else delay, return_when=FIRST_COMPLETED)
+            for future in done:
+                limiter.release(hosts[running.pop(future)])
+        return futures
+
+    def process(self, the_queue: queue.Queue) -> list[TaskResult]:
+        """Run all queued tasks and return their results in queue order.
 
-        for _ in range(self.threads):
-            thread = threading.Thread(target=worker, args=(self, the_queue))
-            thread.start()
-            threads.append(thread)
-        for thread in threads:
-            thread.join()
+        With less than two threads the tasks run one after another in the
+        calling thread, otherwise on the shared pool, longest expected first.
+        """
+        if self.threads < 2:
+            return worker(self, the_queue)
+        tasks = self._drain(the_queue)
+        if self.host_limits is None:
+            futures = {index: self.submit(*tasks[index]) for index in self._schedule(tasks)}
+        else:
+            futures = self._dispatch(tasks, self.host_limits)
+        wait(futures.values())
+        results = [futures[index].result() for index in range(len(tasks))]
 
         if self.errors:
             logger.error("There have been errors, see messages above.")
             sys.exit(1)
+        return results
 
     def checkout(self, packages: typing.Iterable[str], **kwargs) -> None:
         # Smart threading: process HTTPS packages serially to avoid overlapping prompts
@@ -230,7 +533,8 @@ class WorkingCopies:
                 # Save original thread count and process HTTPS packages serially
                 original_threads = self.threads
                 self.threads = 1
-                self._checkout_impl(https_pkgs, **kwargs)
+                with timing.phase("smart threading: HTTPS serially", category="schedule"):
+                    self._checkout_impl(https_pkgs, **kwargs)
                 self.threads = original_threads
                 # Process remaining packages in parallel
                 logger.info(
@@ -246,7 +550,8 @@ class WorkingCopies:
                 )
                 original_threads = self.threads
                 self.threads = 1
-                self._checkout_impl(packages_list, **kwargs)
+                with timing.phase("smart threading: HTTPS serially", category="schedule"):
+                    self._checkout_impl(packages_list, **kwargs)
                 self.threads = original_threads
                 return
 
@@ -271,8 +576,8 @@ class WorkingCopies:
         if kwargs["submodules"] not in ["always", "never", "checkout", "recursive"]:
             logger.error("Unknown value '{}' for update-git-submodules option.".format(kwargs["submodules"]))
             sys.exit(1)
+        candidates = []
         for name in packages:
-            kw = kwargs.copy()
             if name not in self.sources:
                 logger.error(f"Checkout failed. No source defined for '{name}'.")
                 sys.exit(1)
@@ -284,20 +589,16 @@ class WorkingCopies:
                 continue
             wc = wc_class(source)
             update = wc.should_update(**kwargs)
-            if not os.path.exists(source["path"]):
-                pass
-            elif os.path.islink(source["path"]):
+            candidates.append((name, wc, update and not kwargs.get("force", False)))
+        # inspect all working copies first, then ask about the dirty ones
+        inspections = self._inspect([(wc, check_status) for _, wc, check_status in candidates])
+        for (name, wc, _), (_, islink, status) in zip(candidates, inspections):
+            kw = kwargs.copy()
+            if islink:
                 logger.info(f"Skipped update of linked '{name}'.")
                 continue
-            elif update and not kw.get("force", False) and wc.status() != "clean":
-                print_stderr(f"The package '{name}' is dirty.")
-                answer = yesno("Do you want to update it anyway?", default=False, all=True)
-                if answer:
-                    kw["force"] = True
-                    if answer == "all":
-                        kwargs["force"] = True
-                else:
-                    logger.info(f"Skipped update of '{name}'.")
+            if status is not None and status != "clean" and not kw.get("force", False):
+                if not self._update_dirty(name, kw, kwargs):
                     continue
             logger.info("Queued '%s' for checkout.", name)
             the_queue.put_nowait((wc, wc.checkout, kw))
@@ -364,7 +665,8 @@ class WorkingCopies:
                 # Save original thread count and process HTTPS packages serially
                 original_threads = self.threads
                 self.threads = 1
-                self._update_impl(https_pkgs, **kwargs)
+                with timing.phase("smart threading: HTTPS serially", category="schedule"):
+                    self._update_impl(https_pkgs, **kwargs)
                 self.threads = original_threads
                 # Process remaining packages in parallel
                 logger.info(
@@ -380,7 +682,8 @@ class WorkingCopies:
                 )
                 original_threads = self.threads
                 self.threads = 1
-                self._update_impl(packages_list, **kwargs)
+                with timing.phase("smart threading: HTTPS serially", category="schedule"):
+                    self._update_impl(packages_list, **kwargs)
                 self.threads = original_threads
                 return
 
@@ -390,8 +693,8 @@ class WorkingCopies:
     def _update_impl(self, packages: list[str], **kwargs) -> None:
         """Internal implementation of update logic."""
         the_queue: queue.Queue = queue.Queue()
+        candidates = []
         for name in packages:
-            kw = kwargs.copy()
             if name not in self.sources:
                 continue
             source = self.sources[name]
@@ -400,46 +703,50 @@ class WorkingCopies:
             if not wc_class:
                 logger.error(f"Unregistered repository type {vcs}")
                 sys.exit(1)
-            wc = wc_class(source)
-            if wc.status() != "clean" and not kw.get("force", False):
-                print_stderr(f"The package '{name}' is dirty.")
-                answer = yesno("Do you want to update it anyway?", default=False, all=True)
-                if answer:
-                    kw["force"] = True
-                    if answer == "all":
-                        kwargs["force"] = True
-                else:
-                    logger.info(f"Skipped update of '{name}'.")
+            candidates.append((name, wc_class(source)))
+        # ask for the status of all working copies first, then about the dirty ones
+        if kwargs.get("force", False):
+            statuses: list[typing.Any] = ["clean"] * len(candidates)
+        elif self.threads < 2 or len(candidates) < 2:
+            statuses = [wc.status() for _, wc in candidates]
+        else:
+            statuses = list(self.executor.map(lambda wc: wc.status(), [wc for _, wc in candidates]))
+        for (name, wc), status in zip(candidates, statuses):
+            kw = kwargs.copy()
+            if status != "clean" and not kw.get("force", False):
+                if not self._update_dirty(name, kw, kwargs):
                     continue
             logger.info("Queued '%s' for update.", name)
             the_queue.put_nowait((wc, wc.update, kw))
         self.process(the_queue)
 
 
-def worker(working_copies: WorkingCopies, the_queue: queue.Queue) -> None:
+def _remove_path(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
+def worker(working_copies: WorkingCopies, the_queue: queue.Queue) -> list[TaskResult]:
+    """Run queued tasks one after another until the queue is empty or a task failed."""
+    results: list[TaskResult] = []
     while True:
         if working_copies.errors:
-            return
+            return results
         try:
             wc, action, kwargs = the_queue.get_nowait()
         except queue.Empty:
-            return
+            return results
+        limiter = working_copies.host_limits
+        if limiter is None:
+            results.append(working_copies.run_task(wc, action, kwargs))
+            continue
+        host = host_of(wc.source.get("url", ""))
+        while delay := limiter.acquire(host):
+            # only the rate can hold back a serial task, unless other threads use the host
+            time.sleep(0.1 if delay == math.inf else delay)
         try:
-            output = action(**kwargs)
-        except WCError as e:
-            with output_lock:
-                for lvl, msg in wc._output:
-                    lvl(msg)
-                # WCError is an expected operational failure: show a clean,
-                # actionable message and keep the full traceback for debug only.
-                logger.error("%s", e)
-                logger.debug("Traceback for the error above:", exc_info=True)
-                working_copies.errors = True
-        else:
-            with output_lock:
-                for lvl, msg in wc._output:
-                    lvl(msg)
-                if kwargs.get("verbose", False) and output is not None and output.strip():
-                    if isinstance(output, bytes):
-                        output = output.decode("utf8")
-                    print(output)
+            results.append(working_copies.run_task(wc, action, kwargs))
+        finally:
+            limiter.release(host)
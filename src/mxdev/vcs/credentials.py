@@ -0,0 +1,196 @@
+"""Credential pre-flight for HTTPS sources.
+
+Smart threading processes HTTPS sources serially, because git might prompt
+for credentials. A :class:`CredentialBroker` resolves the credentials of each
+host once, before fetching. Sources on resolved hosts can then be fetched in
+parallel without overlapping prompts.
+
+A host is resolved if
+
+- its URL contains a username and password,
+- ``~/.netrc`` has an entry for it (git uses it through curl),
+- a configured git credential helper returns credentials without prompting,
+- or, only if prompting was enabled, the user entered them once through
+  ``git credential fill``.
+
+Entered credentials are only kept in memory. They are handed to the git
+commands of this process with :func:`git_environment`, which adds a
+credential helper reading them from the environment. Git before 2.31 ignores
+this environment, so with older git nothing is asked and hosts without other
+credentials stay serial.
+"""
+
+from . import common
+from . import toolchain
+from urllib import parse
+
+import netrc
+import os
+import re
+import subprocess
+import threading
+
+
+logger = common.logger
+
+# first git reading configuration from GIT_CONFIG_COUNT
+MIN_GIT_VERSION = (2, 31)
+
+# credentials entered during this run, by (protocol, host)
+_entered: dict[tuple[str, str], tuple[str, str]] = {}
+_entered_lock = threading.Lock()
+
+
+def _host_key(url: str) -> tuple[str, str] | None:
+    parsed = parse.urlsplit(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return None
+    host = parsed.hostname if parsed.port is None else f"{parsed.hostname}:{parsed.port}"
+    return parsed.scheme, host
+
+
+def _helper(index: int) -> str:
+    return (
+        f'!f() {{ test "$1" = get && echo "username=$MXDEV_CREDENTIAL_USERNAME_{index}" '
+        f'&& echo "password=$MXDEV_CREDENTIAL_PASSWORD_{index}"; }}; f'
+    )
+
+
+def _probe_git_version(executable: str) -> tuple[int, ...]:
+    output = subprocess.run([executable, "--version"], capture_output=True, text=True, check=True).stdout
+    match = re.search(r"git version (\d+(?:\.\d+)*)", output)
+    if match is None:
+        raise ValueError(f"Unable to parse git version output {output!r}")
+    return tuple(int(part) for part in match.group(1).split("."))
+
+
+_warned_version = False
+
+
+def supports_git_environment() -> bool:
+    """Whether git reads the credentials of :func:`git_environment`, warns once if not."""
+    global _warned_version
+    executable = common.which("git", default="git")
+    try:
+        version = toolchain.registry.version(executable, lambda: _probe_git_version(executable))
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return False
+    if version >= MIN_GIT_VERSION:
+        return True
+    if not _warned_version:
+        _warned_version = True
+        required = ".".join(str(part) for part in MIN_GIT_VERSION)
+        logger.warning(
+            f"git {'.'.join(str(part) for part in version)} can not pass entered credentials "
+            f"to parallel git commands (requires {required}), not asking for credentials."
+        )
+    return False
+
+
+def git_environment() -> dict[str, str] | None:
+    """Environment for git commands, or None if no credentials were entered.
+
+    Adds a ``credential.<url>.helper`` per host with ``GIT_CONFIG_COUNT``,
+    after any configuration already passed this way.
+    """
+    with _entered_lock:
+        entered = dict(_entered)
+    if not entered or not supports_git_environment():
+        return None
+    env = dict(os.environ)
+    count = int(env.get("GIT_CONFIG_COUNT", "0") or 0)
+    for index, ((protocol, host), (username, password)) in enumerate(sorted(entered.items())):
+        env[f"GIT_CONFIG_KEY_{count}"] = f"credential.{protocol}://{host}.helper"
+        env[f"GIT_CONFIG_VALUE_{count}"] = _helper(index)
+        env[f"MXDEV_CREDENTIAL_USERNAME_{index}"] = username
+        env[f"MXDEV_CREDENTIAL_PASSWORD_{index}"] = password
+        count += 1
+    env["GIT_CONFIG_COUNT"] = str(count)
+    return env
+
+
+def _parse_credential(output: str) -> dict[str, str]:
+    return dict(line.split("=", 1) for line in output.splitlines() if "=" in line)
+
+
+class CredentialBroker:
+    """Resolve the credentials of HTTPS hosts once per run.
+
+    Only with ``interactive`` the user is asked for credentials which no
+    other source provides.
+    """
+
+    def __init__(self, interactive: bool = False):
+        self.interactive = interactive
+        self._resolved: dict[tuple[str, str], bool] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, url: str) -> bool:
+        """Whether git can authenticate to the host of ``url`` without prompting."""
+        key = _host_key(url)
+        if key is None:
+            return False
+        if _has_password(url):
+            return True
+        with self._lock:
+            if key not in self._resolved:
+                self._resolved[key] = self._resolve(*key)
+            return self._resolved[key]
+
+    def _resolve(self, protocol: str, host: str) -> bool:
+        if _in_netrc(host):
+            logger.debug(f"Credentials for {host} found in netrc")
+            return True
+        if self._fill(protocol, host, prompt=False) is not None:
+            logger.debug(f"Credentials for {host} provided by a git credential helper")
+            return True
+        if not self.interactive or not supports_git_environment():
+            return False
+        logger.info(f"Asking once for the credentials of {protocol}://{host}")
+        credential = self._fill(protocol, host, prompt=True)
+        if credential is None:
+            return False
+        with _entered_lock:
+            _entered[(protocol, host)] = credential
+        return True
+
+    def _fill(self, protocol: str, host: str, prompt: bool) -> tuple[str, str] | None:
+        env = dict(os.environ)
+        if not prompt:
+            env["GIT_TERMINAL_PROMPT"] = "0"
+            # Git Credential Manager would open a login window otherwise
+            env["GCM_INTERACTIVE"] = "never"
+            env.pop("GIT_ASKPASS", None)
+            env.pop("SSH_ASKPASS", None)
+        try:
+            result = subprocess.run(
+                [common.which("git", default="git")]
+                + ([] if prompt else ["-c", "core.askPass="])
+                + ["credential", "fill"],
+                input=f"protocol={protocol}\nhost={host}\n\n",
+                capture_output=True,
+                text=True,
+                env=env,
+                timeout=None if prompt else 30,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        values = _parse_credential(result.stdout)
+        if not values.get("username") or "password" not in values:
+            return None
+        return values["username"], values["password"]
+
+
+def _has_password(url: str) -> bool:
+    return parse.urlsplit(url).password is not None
+
+
+def _in_netrc(host: str) -> bool:
+    """Whether ``~/.netrc`` (or ``$NETRC``) has an entry for the host."""
+    try:
+        entries = netrc.netrc(os.environ.get("NETRC"))
+    except (OSError, netrc.NetrcParseError):
+        return False
+    return entries.authenticators(host.split(":")[0]) is not None
@@ -1,6 +1,8 @@
+from .. import timing
 from . import common
+from . import credentials
+from . import toolchain
 
-import functools
 import os
 import re
 import subprocess
@@ -10,6 +12,9 @@ import sys
 logger = common.logger
 GIT_CLONE_DEPTH = os.getenv("GIT_CLONE_DEPTH")
 
+# for-each-ref with %(HEAD) and %(*objectname), used by the fast update
+FAST_UPDATE_GIT_VERSION = (2, 13)
+
 
 class GitError(common.WCError):
     pass
@@ -57,8 +62,10 @@ class GitWorkingCopy(common.BaseWorkingCopy):
                 sys.exit(1)
         super().__init__(source)
 
-    @functools.lru_cache(maxsize=4096)
     def git_version(self) -> tuple[int, ...]:
+        return toolchain.registry.version(self.git_executable, self._probe_git_version)
+
+    def _probe_git_version(self) -> tuple[int, ...]:
         cmd = self.run_git(["--version"])
         stdout, stderr = cmd.communicate()
         if cmd.returncode != 0:
@@ -106,8 +113,14 @@ class GitWorkingCopy(common.BaseWorkingCopy):
         # back to the main one large chunks of output
         kwargs["bufsize"] = -1
         kwargs["universal_newlines"] = True
-        return subprocess.Popen(commands, **kwargs)
-
+        if "env" not in kwargs:
+            # credentials entered in the pre-flight, if any
+            env = credentials.git_environment()
+            if env is not None:
+                kwargs["env"] = env
+        return common.popen(commands, **kwargs)
+
+    @timing.timed("merge")
     def git_merge_rbranch(self, stdout_in: str, stderr_in: str, accept_missing: bool = False) -> tuple[str, str]:
         path = self.source["path"]
         branch = self.source.get("branch", "master")
@@ -155,8 +168,9 @@ class GitWorkingCopy(common.BaseWorkingCopy):
         if "branch" in self.source:
             args.extend(["-b", self.source["branch"]])
         args.extend([url, path])
-        cmd = self.run_git(args)
-        stdout, stderr = cmd.communicate()
+        with timing.phase("clone", name):
+            cmd = self.run_git(args)
+            stdout, stderr = cmd.communicate()
         if cmd.returncode != 0:
             branch = self.source.get("branch")
             if branch and "not found in upstream" in stderr:
@@ -184,6 +198,7 @@ class GitWorkingCopy(common.BaseWorkingCopy):
             return stdout
         return None
 
+    @timing.timed("switch")
     def git_switch_branch(self, stdout_in: str, stderr_in: str, accept_missing: bool = False) -> tuple[str, str]:
         """Switch branches.
 
@@ -237,6 +252,77 @@ class GitWorkingCopy(common.BaseWorkingCopy):
         # git tag -l returns the tag name if it exists, empty if not
         return tag_name in stdout.strip().split("\n")
 
+    def git_refs(self, branch: str) -> dict[str, tuple[str, bool]]:
+        """Commits of the local branch, remote branch and tag of the given name.
+
+        Maps the full ref names which exist to their commit and whether the ref
+        is the checked out branch, with a single ``git for-each-ref``.
+        """
+        cmd = self.run_git(
+            [
+                "for-each-ref",
+                "--format=%(HEAD)%(objectname) %(*objectname) %(refname)",
+                f"refs/heads/{branch}",
+                f"refs/remotes/{self._upstream_name}/{branch}",
+                f"refs/tags/{branch}",
+            ],
+            cwd=self.source["path"],
+        )
+        stdout, stderr = cmd.communicate()
+        if cmd.returncode != 0:
+            raise GitError(f"git for-each-ref of '{self.source['name']}' failed.\n{stderr}")
+        refs = {}
+        for line in stdout.splitlines():
+            # HEAD is '*' for the checked out branch, else a space, and the
+            # peeled commit is empty unless the ref is an annotated tag
+            objectname, peeled, refname = line[1:].split(" ", 2)
+            refs[refname] = (peeled or objectname, line[0] == "*")
+        return refs
+
+    def git_fast_update(self, stdout: str, stderr: str) -> tuple[str, str] | None:
+        """Update the checked out branch from one ref query.
+
+        Nothing is done if the branch already is at the remote branch, else
+        the remote branch is merged, fast-forward if possible. A tag is
+        checked out directly. Returns None if the branch is not checked out
+        or does not exist, which needs the switch of :meth:`git_update`.
+        """
+        name = self.source["name"]
+        path = self.source["path"]
+        if self.git_version() < FAST_UPDATE_GIT_VERSION:
+            return None
+        branch = self.source.get("branch", "master")
+        refs = self.git_refs(branch)
+        if "branch" in self.source and f"refs/tags/{branch}" in refs:
+            with timing.phase("switch", name):
+                cmd = self.run_git(["checkout", branch], cwd=path)
+                tag_stdout, tag_stderr = cmd.communicate()
+            if cmd.returncode != 0:
+                raise GitError(f"git checkout of tag '{branch}' failed.\n{tag_stderr}")
+            self.output((logger.info, f"Switched to tag '{branch}'."))
+            return stdout + tag_stdout, stderr + tag_stderr
+        local = refs.get(f"refs/heads/{branch}")
+        remote = refs.get(f"refs/remotes/{self._upstream_name}/{branch}")
+        if local is None or remote is None or not local[1]:
+            return None
+        if local[0] == remote[0]:
+            self.output((logger.info, f"Branch '{branch}' is up to date."))
+            return stdout, stderr
+        rbranch = f"{self._upstream_name}/{branch}"
+        with timing.phase("merge", name):
+            cmd = self.run_git(["merge", "--ff-only", rbranch], cwd=path)
+            merge_stdout, merge_stderr = cmd.communicate()
+            message = f"Fast-forwarded branch '{branch}'."
+            if cmd.returncode != 0:
+                # diverged, merge as the regular update does
+                cmd = self.run_git(["merge", rbranch], cwd=path)
+                merge_stdout, merge_stderr = cmd.communicate()
+                message = f"Merged '{rbranch}' into branch '{branch}'."
+        if cmd.returncode != 0:
+            raise GitError(f"git merge of remote branch '{rbranch}' failed.\n{merge_stderr}")
+        self.output((logger.info, message))
+        return stdout + merge_stdout, stderr + merge_stderr
+
     def git_update(self, **kwargs) -> str | None:
         name = self.source["name"]
         path = self.source["path"]
@@ -246,19 +332,24 @@ class GitWorkingCopy(common.BaseWorkingCopy):
         update_git_submodules = self.source.get("submodules", kwargs["submodules"])
         if update_git_submodules == "recursive":
             argv.append("--recurse-submodules")
-        cmd = self.run_git(argv, cwd=path)
-        stdout, stderr = cmd.communicate()
+        with timing.phase("fetch", name):
+            cmd = self.run_git(argv, cwd=path)
+            stdout, stderr = cmd.communicate()
         if cmd.returncode != 0:
             raise GitError(f"git fetch of '{name}' failed.\n{stderr}")
-        if "rev" in self.source:
+        updated = None if "rev" in self.source else self.git_fast_update(stdout, stderr)
+        if updated is not None:
+            stdout, stderr = updated
+        elif "rev" in self.source:
             stdout, stderr = self.git_switch_branch(stdout, stderr)
         elif "branch" in self.source:
             # Check if 'branch' is actually a tag (#46)
             branch_value = self.source["branch"]
             if self.git_is_tag(branch_value):
                 # It's a tag - checkout directly without merge
-                cmd = self.run_git(["checkout", branch_value], cwd=path)
-                tag_stdout, tag_stderr = cmd.communicate()
+                with timing.phase("switch", name):
+                    cmd = self.run_git(["checkout", branch_value], cwd=path)
+                    tag_stdout, tag_stderr = cmd.communicate()
                 if cmd.returncode != 0:
                     raise GitError(f"git checkout of tag '{branch_value}' failed.\n{tag_stderr}")
                 stdout += tag_stdout
@@ -275,7 +366,8 @@ class GitWorkingCopy(common.BaseWorkingCopy):
             stdout, stderr = self.git_merge_rbranch(stdout, stderr, accept_missing=True)
 
         update_git_submodules = self.source.get("submodules", kwargs["submodules"])
-        if update_git_submodules in ["always", "recursive"]:
+        has_submodules = os.path.exists(os.path.join(path, ".gitmodules"))
+        if update_git_submodules in ["always", "recursive"] and has_submodules:
             stdout, stderr, initialized = self.git_init_submodules(stdout, stderr)
             # Update only new submodules that we just registered. this is for safety reasons
             # as git submodule update on modified subomdules may cause code loss
@@ -317,6 +409,7 @@ class GitWorkingCopy(common.BaseWorkingCopy):
             )
         return None
 
+    @timing.timed("status")
     def status(self, **kwargs) -> tuple[str, str] | str:
         path = self.source["path"]
         cmd = self.run_git(["status", "-s", "-b"], cwd=path)
@@ -410,6 +503,7 @@ class GitWorkingCopy(common.BaseWorkingCopy):
 
         return (stdout_in, stderr_in)
 
+    @timing.timed("submodules")
     def git_init_submodules(self, stdout_in, stderr_in) -> tuple[str, str, list]:
         cmd = self.run_git(["submodule", "init"], cwd=self.source["path"])
         stdout, stderr = cmd.communicate()
@@ -421,6 +515,7 @@ class GitWorkingCopy(common.BaseWorkingCopy):
         initialized_submodules = re.findall(r'\s+[\'"](.*?)[\'"]\s+\(.+\)', output)
         return (stdout_in + stdout, stderr_in + stderr, initialized_submodules)
 
+    @timing.timed("submodules")
     def git_update_submodules(self, stdout_in, stderr_in, submodule="all", recursive: bool = False) -> tuple[str, str]:
         params = ["submodule", "update"]
         if recursive:
@@ -0,0 +1,91 @@
+"""Durations of past checkouts and updates, to start the longest first.
+
+The parallel pool finishes earliest if the longest tasks are started first
+(longest processing time first scheduling). :class:`DurationHistory` keeps
+the duration of each package's checkout and update, smoothed over runs, in
+a small JSON file. Packages without history are started before all others,
+largest checkout on disk first.
+"""
+
+from .common import logger
+from .common import TaskResult
+from pathlib import Path
+
+import json
+import os
+import typing
+
+
+HISTORY_FILE = "durations.json"
+
+# weight of the latest duration against the recorded one
+SMOOTHING = 0.5
+
+
+def disk_size(path: str | Path) -> int:
+    """Size of a checkout in bytes, of its git objects if it is a git repository."""
+    root = os.path.join(path, ".git", "objects")
+    if not os.path.isdir(root):
+        root = os.fspath(path)
+    size = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            try:
+                size += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return size
+
+
+class DurationHistory:
+    """Recorded durations in seconds, by package name and action."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.durations: dict[str, dict[str, float]] = {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            self.durations = data
+
+    def expected(self, name: str, action: str) -> float | None:
+        """The expected duration, or None if the package has no history."""
+        actions = self.durations.get(name, {})
+        # an update is no checkout, but still a better guess than nothing
+        return actions.get(action, actions.get("checkout" if action == "update" else "update"))
+
+    def record(self, results: typing.Iterable[TaskResult]) -> None:
+        for result in results:
+            if result.status != "ok":
+                continue
+            actions = self.durations.setdefault(result.name, {})
+            previous = actions.get(result.action)
+            if previous is None:
+                actions[result.action] = round(result.duration, 3)
+            else:
+                actions[result.action] = round(SMOOTHING * result.duration + (1 - SMOOTHING) * previous, 3)
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.durations, indent=1, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.debug(f"Could not save durations to {self.path}: {e}")
+
+    def schedule(self, tasks: list[tuple[str, str, str]]) -> list[int]:
+        """Order ``(name, action, path)`` tasks, longest expected first.
+
+        Returns the indexes of the tasks in the order to start them.
+        """
+        keys = []
+        for name, action, path in tasks:
+            expected = self.expected(name, action)
+            if expected is None:
+                keys.append((1, float(disk_size(path)) if path else 0.0))
+            else:
+                keys.append((0, expected))
+        return sorted(range(len(tasks)), key=keys.__getitem__, reverse=True)
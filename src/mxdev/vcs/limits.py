@@ -0,0 +1,128 @@
+"""Per-host limits for fetching sources.
+
+The ``host-limits`` setting caps how many tasks run against one host at the
+same time, and optionally how many start per second. Each line has a host
+(``*`` for all others), the number of concurrent tasks and an optional rate
+in tasks per second::
+
+    host-limits =
+        github.com 4 2
+        *          8
+
+The global ``threads`` setting stays the upper bound of all running tasks.
+"""
+
+from dataclasses import dataclass
+from urllib import parse
+
+import math
+import re
+import threading
+import time
+
+
+# scp-like syntax of git, e.g. git@github.com:org/repo.git
+_SCP_URL = re.compile(r"^(?:[^@/]+@)?(?P<host>[^:/]+):(?!//)")
+
+
+def host_of(url: str) -> str:
+    """The host of a source URL, empty for local paths."""
+    if "://" in url:
+        return (parse.urlsplit(url).hostname or "").lower()
+    match = _SCP_URL.match(url)
+    if match is None or len(match.group("host")) == 1:
+        # no host or a windows drive letter
+        return ""
+    return match.group("host").lower()
+
+
+@dataclass
+class HostLimit:
+    concurrency: int
+    # tasks started per second, None for no limit
+    rate: float | None = None
+
+
+def parse_host_limits(value: str) -> dict[str, HostLimit]:
+    """Parse the ``host-limits`` setting."""
+    limits = {}
+    for line in value.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split()
+        try:
+            if len(parts) not in (2, 3):
+                raise ValueError
+            limit = HostLimit(int(parts[1]), float(parts[2]) if len(parts) == 3 else None)
+        except ValueError:
+            raise ValueError(f"host-limits: expected '<host> <concurrency> [<rate>]', got '{line}'") from None
+        if limit.concurrency < 1 or (limit.rate is not None and limit.rate <= 0):
+            raise ValueError(f"host-limits: concurrency and rate must be positive, got '{line}'")
+        limits[parts[0].lower()] = limit
+    return limits
+
+
+class TokenBucket:
+    """Allows ``rate`` starts per second, with bursts of up to ``max(rate, 1)``."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def delay(self) -> float:
+        """Seconds until a token is available, 0 if one is."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class HostLimiter:
+    """Slots and tokens per host, shared by all tasks of a run."""
+
+    def __init__(self, limits: dict[str, HostLimit]):
+        self.limits = limits
+        self._running: dict[str, int] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _limit(self, host: str) -> HostLimit | None:
+        if not host:
+            return None
+        return self.limits.get(host, self.limits.get("*"))
+
+    def acquire(self, host: str) -> float:
+        """Take a slot and a token for a task on the host.
+
+        Returns 0 if the task may start. Otherwise nothing is taken and the
+        seconds until a token is available are returned, or ``math.inf`` if
+        a running task of the host has to finish first.
+        """
+        limit = self._limit(host)
+        if limit is None:
+            return 0.0
+        with self._lock:
+            if self._running.get(host, 0) >= limit.concurrency:
+                return math.inf
+            if limit.rate is not None:
+                bucket = self._buckets.setdefault(host, TokenBucket(limit.rate))
+                delay = bucket.delay()
+                if delay:
+                    return delay
+                bucket.take()
+            self._running[host] = self._running.get(host, 0) + 1
+            return 0.0
+
+    def release(self, host: str) -> None:
+        if self._limit(host) is None:
+            return
+        with self._lock:
+            self._running[host] -= 1
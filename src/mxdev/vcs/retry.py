@@ -0,0 +1,59 @@
+"""Retry of checkouts and updates which failed for a transient reason.
+
+A failure is transient if the error message, which contains the stderr of
+the failed command, matches one of :data:`TRANSIENT_PATTERNS`: dropped
+connections, timeouts, name resolution and 5xx/429 responses of the host.
+Git exits with 128 for transient and permanent failures alike, so the exit
+code alone does not tell them apart.
+"""
+
+from dataclasses import dataclass
+from dataclasses import field
+
+import random
+import re
+
+
+TRANSIENT_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"connection (reset|refused|timed out|closed)",
+        r"operation timed out",
+        r"could not resolve host",
+        r"temporary failure in name resolution",
+        r"the remote end hung up unexpectedly",
+        r"early eof",
+        r"unexpected disconnect",
+        r"rpc failed",
+        r"returned error: (429|5\d\d)",
+        r"\b(502 bad gateway|503 service unavailable|504 gateway time-?out)\b",
+        r"gnutls_handshake\(\) failed",
+        r"ssl_error_syscall",
+        r"kex_exchange_identification",
+        r"ssh: connect to host .* port \d+: ",
+    )
+)
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how long to wait before running a failed task again."""
+
+    # total number of attempts, 1 never retries
+    attempts: int = 3
+    # seconds before the first retry, doubled for each further one
+    backoff: float = 1.0
+    max_backoff: float = 30.0
+    patterns: tuple[re.Pattern, ...] = field(default=TRANSIENT_PATTERNS)
+
+    def is_transient(self, message: str) -> bool:
+        return any(pattern.search(message) for pattern in self.patterns)
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after the given failed attempt, with jitter.
+
+        Waits between half and the full exponential backoff, so tasks which
+        failed at the same moment do not retry at the same moment.
+        """
+        backoff = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(backoff / 2, backoff)
@@ -1,4 +1,5 @@
 from . import common
+from . import toolchain
 from urllib.parse import urlparse
 from urllib.parse import urlunparse
 
@@ -71,6 +72,16 @@ class SVNWorkingCopy(common.BaseWorkingCopy):
 
     def _svn_check_version(self):
         global _svn_version_warning
+        version = toolchain.registry.version(self.svn_executable, self._svn_probe_version)
+        if (version < (1, 5)) and not _svn_version_warning:
+            logger.warning(
+                "The installed 'svn' command is too old. Expected 1.5 or newer, got {}.".format(
+                    ".".join([str(x) for x in version])
+                )
+            )
+            _svn_version_warning = True
+
+    def _svn_probe_version(self):
         try:
             cmd = subprocess.Popen(
                 [self.svn_executable, "--version"],
@@ -100,13 +111,7 @@ class SVNWorkingCopy(common.BaseWorkingCopy):
                 stderr.decode("utf8"),
             )
             sys.exit(1)
-        if (version < (1, 5)) and not _svn_version_warning:
-            logger.warning(
-                "The installed 'svn' command is too old. Expected 1.5 or newer, got {}.".format(
-                    ".".join([str(x) for x in version])
-                )
-            )
-            _svn_version_warning = True
+        return version
 
     def _svn_auth_get(self, url):
         for root in self._svn_auth_cache:
@@ -0,0 +1,102 @@
+"""Process-wide registry of VCS executables and their versions.
+
+Working copies are created for every package and phase, and each used to
+search ``PATH`` for its executable and some to run ``<tool> --version``.
+The :data:`registry` does both once per process: executables are cached by
+name and search path, versions by the executable's path, modification time
+and size. With :meth:`Toolchain.persist`, versions are also kept on disk,
+so the next run does not probe unchanged executables again.
+"""
+
+from pathlib import Path
+
+import json
+import os
+import platform
+import threading
+import typing
+
+
+TOOLCHAIN_FILE = "toolchain.json"
+
+
+class Toolchain:
+    def __init__(self) -> None:
+        self._executables: dict[tuple[str, ...], str] = {}
+        self._versions: dict[str, list[int]] = {}
+        self._lock = threading.RLock()
+        self._file: Path | None = None
+        self._dirty = False
+
+    def clear(self) -> None:
+        """Forget all executables and versions, and stop persisting."""
+        with self._lock:
+            self._executables.clear()
+            self._versions.clear()
+            self._file = None
+            self._dirty = False
+
+    def executable(self, name: str, find: typing.Callable[[], str | None]) -> str | None:
+        """The path of an executable, found with ``find`` once per search path."""
+        key = (name, platform.system(), os.environ.get("PATH", ""), os.environ.get("PATHEXT", ""))
+        with self._lock:
+            if key not in self._executables:
+                path = find()
+                if path is None:
+                    # not cached, it may get installed while running
+                    return None
+                self._executables[key] = path
+            return self._executables[key]
+
+    @staticmethod
+    def _version_key(executable: str) -> str | None:
+        try:
+            stat = os.stat(executable)
+        except OSError:
+            return None
+        return f"{os.path.abspath(executable)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def version(self, executable: str, probe: typing.Callable[[], tuple[int, ...]]) -> tuple[int, ...]:
+        """The version of an executable, determined with ``probe`` once."""
+        key = self._version_key(executable)
+        if key is None:
+            return probe()
+        with self._lock:
+            if key not in self._versions:
+                self._versions[key] = list(probe())
+                self._dirty = True
+            return tuple(self._versions[key])
+
+    def persist(self, path: str | Path) -> None:
+        """Load versions from the file, and save new ones there with :meth:`save`."""
+        with self._lock:
+            self._file = Path(path)
+            try:
+                data = json.loads(self._file.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return
+            if isinstance(data, dict):
+                for key, version in data.get("versions", {}).items():
+                    self._versions.setdefault(key, version)
+
+    def save(self) -> None:
+        with self._lock:
+            if self._file is None or not self._dirty:
+                return
+            try:
+                self._file.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self._file.with_suffix(".tmp")
+                # drop versions of executables which changed or are gone
+                versions = {
+                    key: version
+                    for key, version in self._versions.items()
+                    if self._version_key(key.rsplit(":", 2)[0]) == key
+                }
+                tmp.write_text(json.dumps({"versions": versions}, indent=1, sort_keys=True), encoding="utf-8")
+                os.replace(tmp, self._file)
+            except OSError:
+                return
+            self._dirty = False
+
+
+registry = Toolchain()
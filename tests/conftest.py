@@ -65,3 +65,22 @@ def httpretty():
     yield httpretty
     httpretty.disable()
     httpretty.reset()
+
+
+@pytest.fixture(autouse=True)
+def http_connections():
+    """Do not keep HTTP connections of one test alive for the next one."""
+    from mxdev.httpclient import default_client
+
+    yield
+    default_client().close()
+
+
+@pytest.fixture(autouse=True)
+def clear_toolchain():
+    """Executables and versions are cached process-wide, tests patch them."""
+    from mxdev.vcs.toolchain import registry
+
+    registry.clear()
+    yield
+    registry.clear()
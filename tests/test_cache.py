@@ -0,0 +1,133 @@
+import os
+import pytest
+import time
+
+
+def test_parse_size():
+    from mxdev.cache import parse_size
+
+    assert parse_size(None) is None
+    assert parse_size("") is None
+    assert parse_size(123) == 123
+    assert parse_size("2048") == 2048
+    assert parse_size("2K") == 2048
+    assert parse_size("1.5m") == 1572864
+    assert parse_size("1G") == 1024**3
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_http_cache_write_read(tmp_path):
+    from mxdev.cache import get_cache_key
+    from mxdev.cache import HTTPCache
+
+    http_cache = HTTPCache(tmp_path)
+    url = "http://example.com/constraints.txt"
+    assert http_cache.read(url) is None
+    http_cache.write(url, "pkg==1.0\n", {"ETag": '"abc"'})
+    key = get_cache_key(url)
+    assert (tmp_path / key).read_text() == "pkg==1.0\n"
+    assert (tmp_path / f"{key}.url").read_text() == url
+    assert http_cache.read(url) == "pkg==1.0\n"
+    assert http_cache.validators(url) == {"ETag": '"abc"'}
+
+    # rewriting without validators drops stale ones
+    http_cache.write(url, "pkg==2.0\n")
+    assert http_cache.validators(url) == {}
+    assert not (tmp_path / f"{key}.meta").exists()
+
+
+def test_http_cache_is_fresh(tmp_path):
+    from mxdev.cache import get_cache_key
+    from mxdev.cache import HTTPCache
+
+    url = "http://example.com/constraints.txt"
+    assert not HTTPCache(tmp_path, max_age=60).is_fresh(url)
+    HTTPCache(tmp_path).write(url, "pkg==1.0\n")
+    assert not HTTPCache(tmp_path).is_fresh(url)
+    assert HTTPCache(tmp_path, max_age=60).is_fresh(url)
+
+    # fetched two minutes ago
+    cache_file = tmp_path / get_cache_key(url)
+    past = time.time() - 120
+    os.utime(cache_file, (past, past))
+    assert not HTTPCache(tmp_path, max_age=60).is_fresh(url)
+    HTTPCache(tmp_path, max_age=60).touch(url)
+    assert HTTPCache(tmp_path, max_age=60).is_fresh(url)
+
+
+def test_http_cache_prune_evicts_least_recently_used(tmp_path):
+    from mxdev.cache import get_cache_key
+    from mxdev.cache import HTTPCache
+
+    http_cache = HTTPCache(tmp_path)
+    now = time.time()
+    for age, name in enumerate(["new", "middle", "old"]):
+        url = f"http://example.com/{name}.txt"
+        http_cache.write(url, "x" * 100)
+        accessed = now - age * 100
+        os.utime(tmp_path / get_cache_key(url), (accessed, now))
+    assert [entry.url.split("/")[-1] for entry in http_cache.entries()] == ["old.txt", "middle.txt", "new.txt"]
+
+    oldest, *others = http_cache.entries()
+    removed = http_cache.prune(max_size=sum(entry.size for entry in others))
+    assert [entry.url for entry in removed] == ["http://example.com/old.txt"]
+
+    removed = http_cache.prune(max_size=None, unused_for=50)
+    assert [entry.url for entry in removed] == ["http://example.com/middle.txt"]
+    assert [entry.url for entry in http_cache.entries()] == ["http://example.com/new.txt"]
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [get_cache_key("http://example.com/new.txt"), get_cache_key("http://example.com/new.txt") + ".url"]
+    )
+
+
+def test_http_cache_read_marks_entry_used(tmp_path):
+    from mxdev.cache import get_cache_key
+    from mxdev.cache import HTTPCache
+
+    http_cache = HTTPCache(tmp_path)
+    url = "http://example.com/constraints.txt"
+    http_cache.write(url, "pkg==1.0\n")
+    past = time.time() - 1000
+    os.utime(tmp_path / get_cache_key(url), (past, past))
+    http_cache.read(url)
+    entry = http_cache.entries()[0]
+    assert entry.accessed > past + 900
+    assert entry.fetched == pytest.approx(past)
+
+
+def test_http_cache_includes_parse_results(tmp_path):
+    from mxdev.cache import HTTPCache
+    from mxdev.parsing import preload_requirement_names
+
+    http_cache = HTTPCache(tmp_path)
+    http_cache.write("http://example.com/constraints.txt", "pkg==1.0\n")
+    preload_requirement_names("requests==1.0\n", tmp_path / "parsed")
+    preload_requirement_names("urllib3==2.0\n", tmp_path / "parsed")
+    past = time.time() - 1000
+    for path in (tmp_path / "parsed").iterdir():
+        os.utime(path, (past, past))
+    entries = http_cache.entries()
+    assert [entry.key.startswith("parsed/") for entry in entries] == [True, True, False]
+
+    # loading the parse results marks them used
+    preload_requirement_names("requests==1.0\n", tmp_path / "parsed")
+    removed = http_cache.prune(max_size=None, unused_for=500)
+    assert len(removed) == 1
+    assert len(list((tmp_path / "parsed").iterdir())) == 1
+
+    assert http_cache.clear() == 2
+    assert list((tmp_path / "parsed").iterdir()) == []
+
+
+def test_http_cache_from_settings(tmp_path):
+    from mxdev.cache import DEFAULT_MAX_SIZE
+    from mxdev.cache import HTTPCache
+
+    http_cache = HTTPCache.from_settings({}, tmp_path)
+    assert http_cache.max_age == 0
+    assert http_cache.max_size == DEFAULT_MAX_SIZE
+    http_cache = HTTPCache.from_settings({"http-cache-max-age": "600", "http-cache-max-size": "1M"}, tmp_path)
+    assert http_cache.max_age == 600
+    assert http_cache.max_size == 1024 * 1024
+    assert HTTPCache.from_settings({"http-cache-max-size": ""}, tmp_path).max_size is None
@@ -1,10 +1,12 @@
 from mxdev import vcs
 from mxdev.vcs import common
+from utils import FakeWorkingCopy
 
 import logging
 import os
 import pytest
 import queue
+import threading
 
 
 def test_print_stderr(mocker):
@@ -128,9 +130,10 @@ def test_WorkingCopies_process(mocker, caplog):
     wc.process(queue.Queue())
     assert worker.call_count == 1
 
+    # with threads the queue is run on the shared pool
     wc.threads = 5
     wc.process(queue.Queue())
-    assert worker.call_count == 6
+    assert worker.call_count == 1
 
     wc.threads = 2
     wc.errors = True
@@ -567,3 +570,155 @@ def test_worker_errors_flag(mocker):
     # Should return immediately without processing queue
     common.worker(working_copies, test_queue)
     assert test_queue.qsize() == 0  # Queue should not be modified
+
+
+def _recording_checkout(calls):
+    def checkout(wc, **kwargs):
+        calls.append((wc.source["name"], threading.current_thread().name))
+        if wc.source.get("fail"):
+            raise common.WCError(f"{wc.source['name']} failed")
+        wc.output((common.logger.info, f"checked out {wc.source['name']}"))
+        return f"output of {wc.source['name']}"
+
+    return checkout
+
+
+def test_WorkingCopies_process_results(mocker):
+    """Test process() runs tasks on one shared pool and returns structured results."""
+    calls = []
+    checkout = _recording_checkout(calls)
+    exit = mocker.patch("sys.exit")
+    with common.WorkingCopies(sources={}, threads=3) as working_copies:
+        for phase in ("checkout", "update"):
+            the_queue = queue.Queue()
+            for name in ("a", "b", "c"):
+                wc = FakeWorkingCopy({"name": name, "checkout": checkout})
+                the_queue.put((wc, getattr(wc, phase), {}))
+            results = working_copies.process(the_queue)
+            assert [(r.name, r.action, r.status) for r in results] == [
+                ("a", phase, "ok"),
+                ("b", phase, "ok"),
+                ("c", phase, "ok"),
+            ]
+            assert results[0].output == "output of a"
+            assert all(r.duration >= 0 for r in results)
+        executor = working_copies.executor
+    assert len(working_copies.results) == 6
+    assert all(thread.startswith("mxdev-vcs") for _, thread in calls)
+    # both phases used the same pool, which is shut down on exit
+    assert executor._shutdown
+    assert not exit.called
+
+
+def test_WorkingCopies_process_error_result(mocker, caplog):
+    """Test a failing task is reported in its result and stops the run."""
+    calls = []
+    checkout = _recording_checkout(calls)
+    exit = mocker.patch("sys.exit")
+    the_queue = queue.Queue()
+    wc = FakeWorkingCopy({"name": "broken", "fail": True, "checkout": checkout})
+    the_queue.put((wc, wc.checkout, {}))
+    with common.WorkingCopies(sources={}, threads=2) as working_copies:
+        results = working_copies.process(the_queue)
+        assert results[0].status == "error"
+        assert results[0].error == "broken failed"
+        assert exit.call_count == 1
+        assert "broken failed" in caplog.text
+
+        # nothing else is started after an error
+        later = working_copies.submit(FakeWorkingCopy({"name": "later"}), wc.checkout, {}).result()
+        assert later.status == "skipped"
+
+
+def test_WorkingCopies_shared_executor():
+    """Test several WorkingCopies can share an executor they do not own."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = []
+    checkout = _recording_checkout(calls)
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="shared") as executor:
+        for name in ("a", "b"):
+            with common.WorkingCopies(sources={}, threads=2, executor=executor) as working_copies:
+                wc = FakeWorkingCopy({"name": name, "checkout": checkout})
+                assert working_copies.submit(wc, wc.checkout, {}).result().status == "ok"
+        assert not executor._shutdown
+    assert [thread.split("_")[0] for _, thread in calls] == ["shared", "shared"]
+
+
+def test_WorkingCopies_checkout_inspects_in_parallel(mocker, tmp_path):
+    """Test all statuses are asked concurrently before any dirty package is prompted for."""
+    import threading
+
+    events = []
+    barrier = threading.Barrier(3, timeout=5)
+
+    class TestWorkingCopy(FakeWorkingCopy):
+        def checkout(self, **kwargs):
+            events.append(("checkout", self.source["name"], kwargs.get("force", False)))
+
+        def status(self, **kwargs):
+            # fails unless all three are asked at the same time
+            barrier.wait()
+            events.append(("status", self.source["name"]))
+            return "dirty" if self.source["name"] in ("a", "c") else "clean"
+
+    mocker.patch("mxdev.vcs.common._workingcopytypes", {"test": TestWorkingCopy})
+    sources = {}
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        sources[name] = {"vcs": "test", "name": name, "path": str(tmp_path / name)}
+
+    def yesno(question, **kwargs):
+        events.append(("prompt",))
+        return True
+
+    mocker.patch("mxdev.vcs.common.yesno", side_effect=yesno)
+    print_stderr = mocker.patch("mxdev.vcs.common.print_stderr")
+    with common.WorkingCopies(sources=sources, threads=3) as working_copies:
+        working_copies.checkout(packages=["a", "b", "c"], update=True)
+    assert [event[0] for event in events[:5]] == ["status", "status", "status", "prompt", "prompt"]
+    assert [call.args[0] for call in print_stderr.call_args_list] == [
+        "The package 'a' is dirty.",
+        "The package 'c' is dirty.",
+    ]
+    assert sorted(event[1:] for event in events[5:]) == [("a", True), ("b", False), ("c", True)]
+
+
+@pytest.mark.parametrize(
+    "policy, expected, message",
+    [
+        ("skip", [], "Skipped update of dirty 'package'."),
+        ("update", [True], "Updating dirty 'package' anyway."),
+    ],
+)
+def test_WorkingCopies_dirty_policy(mocker, caplog, tmp_path, policy, expected, message):
+    """Test dirty packages are handled without asking by a non-interactive policy."""
+    caplog.set_level(logging.INFO)
+    forced = []
+
+    def checkout(wc, **kwargs):
+        forced.append(kwargs.get("force", False))
+
+    mocker.patch("mxdev.vcs.common._workingcopytypes", {"test": FakeWorkingCopy})
+    yesno = mocker.patch("mxdev.vcs.common.yesno")
+    (tmp_path / "package").mkdir()
+    sources = {
+        "package": {
+            "vcs": "test",
+            "name": "package",
+            "path": str(tmp_path / "package"),
+            "status": "dirty",
+            "checkout": checkout,
+        }
+    }
+    wc = common.WorkingCopies(sources=sources, threads=1, dirty_policy=policy)
+    wc.checkout(packages=["package"], update=True)
+    assert forced == expected
+    assert message in caplog.messages
+    forced.clear()
+    wc.update(packages=["package"])
+    assert forced == expected
+    assert not yesno.called
+
+    with pytest.raises(ValueError, match="dirty-policy must be one of ask, skip, update"):
+        common.WorkingCopies(sources=sources, dirty_policy="never")
@@ -474,3 +474,41 @@ url = https://github.com/example/uvst.addon.git
 
     assert "uvst.addon" in config.packages
     assert "uvst.addon" not in config.hooks
+
+
+def test_configuration_snapshot(tmp_path, monkeypatch, mocker, caplog):
+    """Test the compiled configuration is stored and reused while nothing changed."""
+    from mxdev.config import Configuration
+    from mxdev.config import SNAPSHOT_FILE
+
+    import os
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "base.ini").write_text("[settings]\ndefault-target = sources\n")
+    (tmp_path / "mx.ini").write_text(
+        "[settings]\ninclude = base.ini\ndefault-install-mode = direct\n"
+        "version-overrides =\n    foo==1.0\n"
+        "[pkg]\nurl = https://example.com/pkg.git\npushurl =\n    git@a:pkg.git\n    git@b:pkg.git\n"
+    )
+    cache_dir = tmp_path / "cache"
+    compiled = Configuration("mx.ini")
+
+    config = Configuration("mx.ini", cache_dir=cache_dir)
+    assert (cache_dir / SNAPSHOT_FILE).exists()
+    compile_spy = mocker.spy(Configuration, "_compile")
+    caplog.clear()
+    config = Configuration("mx.ini", cache_dir=cache_dir)
+    assert not compile_spy.called
+    for name in ("settings", "overrides", "ignore_keys", "packages", "hooks"):
+        assert getattr(config, name) == getattr(compiled, name)
+    assert config.packages["pkg"]["pushurls"] == ["git@a:pkg.git", "git@b:pkg.git"]
+    # warnings of the compilation are repeated
+    assert any("install-mode 'direct' is deprecated" in record.message for record in caplog.records)
+
+    Configuration("mx.ini", override_args={"threads": 8}, cache_dir=cache_dir)
+    assert compile_spy.call_count == 1
+
+    (tmp_path / "base.ini").write_text("[settings]\ndefault-target = src\n")
+    config = Configuration("mx.ini", cache_dir=cache_dir)
+    assert compile_spy.call_count == 2
+    assert config.packages["pkg"]["path"] == os.path.join("src", "pkg")
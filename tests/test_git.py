@@ -2,6 +2,7 @@
 from logging import getLogger
 from logging import Logger
 from unittest.mock import patch
+from utils import GitRepo
 from utils import vcs_checkout
 from utils import vcs_status
 from utils import vcs_update
@@ -357,3 +358,59 @@ def test_update_missing_branch_gives_clear_error(mkgitrepo, src, caplog):
     assert "Branch 'does-not-exist' for package 'egg' does not exist" in caplog.text
     assert "Check the 'branch' setting for [egg] in your mx.ini" in caplog.text
     assert "Can not execute action!" not in caplog.text
+
+
+def test_update_up_to_date_runs_no_merge(mkgitrepo, src, mocker):
+    """An up to date branch is updated with a fetch and a single ref query."""
+    from mxdev.vcs.git import GitWorkingCopy
+
+    repository = mkgitrepo("repository")
+    create_default_content(repository)
+    path = src / "egg"
+    sources = {"egg": dict(vcs="git", name="egg", branch="master", url=str(repository.base), path=str(path))}
+    vcs_checkout(sources, ["egg"], False)
+
+    run_git = mocker.spy(GitWorkingCopy, "run_git")
+    vcs_update(sources, ["egg"], False)
+    commands = [call.args[1][1] for call in run_git.call_args_list if call.args[1][1] != "--version"]
+    assert commands[commands.index("fetch") :] == ["fetch", "for-each-ref"]
+
+
+def test_update_fast_forward(mkgitrepo, src, mocker):
+    from mxdev.vcs.git import GitWorkingCopy
+
+    repository = mkgitrepo("repository")
+    create_default_content(repository)
+    path = src / "egg"
+    sources = {"egg": dict(vcs="git", name="egg", branch="master", url=str(repository.base), path=str(path))}
+    vcs_checkout(sources, ["egg"], False)
+    repository.add_file("baz")
+
+    run_git = mocker.spy(GitWorkingCopy, "run_git")
+    vcs_update(sources, ["egg"], False)
+    assert {x for x in path.iterdir()} == {path / ".git", path / "bar", path / "baz", path / "foo"}
+    commands = [call.args[1][1:] for call in run_git.call_args_list if call.args[1][1] != "--version"]
+    assert commands[commands.index(["fetch", "--tags"]) + 1 :] == [
+        ["for-each-ref", "--format=%(HEAD)%(objectname) %(*objectname) %(refname)"]
+        + ["refs/heads/master", "refs/remotes/origin/master", "refs/tags/master"],
+        ["merge", "--ff-only", "origin/master"],
+    ]
+    assert vcs_status(sources) == {"egg": "clean"}
+
+
+def test_update_merges_diverged_branch(mkgitrepo, src):
+    repository = mkgitrepo("repository")
+    create_default_content(repository)
+    path = src / "egg"
+    sources = {"egg": dict(vcs="git", name="egg", branch="master", url=str(repository.base), path=str(path))}
+    vcs_checkout(sources, ["egg"], False)
+    checkout = GitRepo(path)
+    checkout.setup_user()
+    checkout.add_file("local")
+    repository.add_file("baz")
+
+    with patch("mxdev.vcs.git.logger") as log:
+        # the local commit makes the checkout 'ahead', which counts as dirty
+        vcs_update(sources, ["egg"], False, force=True)
+    assert ("info", ("Merged 'origin/master' into branch 'master'.",), {}) in log.method_calls
+    assert {x.name for x in path.iterdir()} == {".git", "bar", "baz", "foo", "local"}
@@ -183,7 +183,7 @@ def test_update_with_submodule(mkgitrepo, src, git_allow_file_protocol):
         }
         assert log.method_calls == [
             ("info", ("Updated 'egg' with git.",), {}),
-            ("info", ("Switching to branch 'master'.",), {}),
+            ("info", ("Fast-forwarded branch 'master'.",), {}),
             (
                 "info",
                 (f"Initialized 'egg' submodule at '{submodule_b_name}' with git.",),
@@ -238,7 +238,7 @@ def test_update_with_submodule_recursive(mkgitrepo, src, git_allow_file_protocol
         }
         assert log.method_calls == [
             ("info", ("Updated 'egg' with git.",)),
-            ("info", ("Switching to branch 'master'.",)),
+            ("info", ("Fast-forwarded branch 'master'.",)),
             (
                 "info",
                 (f"Initialized 'egg' submodule at '{submodule_b_name}' with git.",),
@@ -443,7 +443,7 @@ def test_update_with_submodule_checkout(mkgitrepo, src, git_allow_file_protocol)
         assert set(os.listdir(src / "egg" / submodule_b_name)) == set()
         assert log.method_calls == [
             ("info", ("Updated 'egg' with git.",), {}),
-            ("info", ("Switching to branch 'master'.",), {}),
+            ("info", ("Fast-forwarded branch 'master'.",), {}),
         ]
 
 
@@ -499,5 +499,5 @@ def test_update_with_submodule_dont_update_previous_submodules(mkgitrepo, src, g
         }
         assert log.method_calls == [
             ("info", ("Updated 'egg' with git.",), {}),
-            ("info", ("Switching to branch 'master'.",), {}),
+            ("info", ("Branch 'master' is up to date.",), {}),
         ]
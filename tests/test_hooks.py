@@ -186,6 +186,33 @@ def test_write_hooks_empty_list():
     write_hooks(state, [])
 
 
+def test_read_hooks_get_plain_lists():
+    """Test hooks get the lines read as plain lists."""
+    from mxdev.config import Configuration
+    from mxdev.hooks import Hook
+    from mxdev.hooks import read_hooks
+    from mxdev.state import Lines
+    from mxdev.state import State
+
+    import json
+    import pathlib
+
+    base = pathlib.Path(__file__).parent / "data" / "config_samples"
+    state = State(configuration=Configuration(str(base / "basic_config.ini")))
+    state.requirements = Lines("a\nb\n")
+    state.constraints = Lines("c\n")
+    seen = []
+
+    class ListHook(Hook):
+        def read(self, state):
+            seen.append(json.dumps(state.requirements[1:] + state.constraints))
+
+    read_hooks(state, [ListHook()])
+    assert seen == ['["b\\n", "c\\n"]']
+    assert type(state.requirements) is list
+    assert type(state.constraints) is list
+
+
 def test_has_importlib_entrypoints_constant():
     """Test HAS_IMPORTLIB_ENTRYPOINTS constant is defined."""
     from mxdev.hooks import HAS_IMPORTLIB_ENTRYPOINTS
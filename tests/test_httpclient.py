@@ -0,0 +1,117 @@
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+import threading
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        type(self).connections += 1
+        super().setup()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/redirect":
+            self.respond(302, b"", {"Location": "/file.txt"})
+        elif self.path == "/cached" and self.headers.get("If-None-Match") == '"v1"':
+            self.respond(304, b"")
+        elif self.path in ("/file.txt", "/cached"):
+            self.respond(200, f"path={self.path}\n".encode(), {"ETag": '"v1"'})
+        else:
+            self.respond(404, b"not found")
+
+    def respond(self, status, body, headers={}):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    for name in ("http_proxy", "HTTP_PROXY", "https_proxy", "HTTPS_PROXY", "all_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    Handler.connections = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_client_reuses_connection(server):
+    from mxdev.httpclient import HTTPClient
+
+    with HTTPClient() as client:
+        for _ in range(5):
+            response = client.get(f"{server}/file.txt")
+            assert response.status == 200
+            assert response.body == b"path=/file.txt\n"
+        assert client.stats.requests == 5
+        assert client.stats.connections == 1
+        assert client.stats.handshakes_saved == 4
+    assert Handler.connections == 1
+
+
+def test_client_not_modified(server):
+    from mxdev.httpclient import HTTPClient
+
+    with HTTPClient() as client:
+        response = client.get(f"{server}/cached")
+        assert response.headers["ETag"] == '"v1"'
+        response = client.get(f"{server}/cached", {"If-None-Match": '"v1"'})
+        assert response.status == 304
+        assert response.body == b""
+
+
+def test_client_follows_redirect(server):
+    from mxdev.httpclient import HTTPClient
+
+    with HTTPClient() as client:
+        response = client.get(f"{server}/redirect")
+        assert response.status == 200
+        assert response.url == f"{server}/file.txt"
+
+
+def test_client_http_error(server):
+    from mxdev.httpclient import HTTPClient
+    from urllib.error import HTTPError
+
+    with HTTPClient() as client:
+        with pytest.raises(HTTPError) as exc_info:
+            client.get(f"{server}/missing")
+        assert exc_info.value.code == 404
+
+
+def test_client_connection_error():
+    from mxdev.httpclient import HTTPClient
+    from urllib.error import URLError
+
+    with HTTPClient() as client:
+        with pytest.raises(URLError):
+            # nothing listens on port 9 (discard) of localhost
+            client.get("http://127.0.0.1:9/file.txt")
+
+
+def test_client_retries_stale_connection(server):
+    from mxdev.httpclient import HTTPClient
+
+    with HTTPClient() as client:
+        client.get(f"{server}/file.txt")
+        # the server closes the idle keep-alive connection
+        for idle in client._idle.values():
+            for conn in idle:
+                conn.sock.shutdown(2)
+        response = client.get(f"{server}/file.txt")
+        assert response.status == 200
+        assert client.stats.connections == 2
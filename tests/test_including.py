@@ -36,6 +36,46 @@ def test_resolve_dependencies_http(tmp_path, httpretty):
     assert len(file_list) == 4
 
 
+def test_read_dependencies_caches_only_with_http_cache(tmp_path, monkeypatch, httpretty):
+    from mxdev.cache import HTTPCache
+    from mxdev.including import read_dependencies
+
+    monkeypatch.chdir(tmp_path)
+    url = "http://www.example.com/base.ini"
+    httpretty.register_uri(httpretty.GET, url, "[settings]\nthreads = 2\n", status=200)
+    (tmp_path / "mx.ini").write_text(f"[settings]\ninclude = {url}\n")
+    assert [source for source, _ in read_dependencies("mx.ini")] == [url, "mx.ini"]
+    assert not (tmp_path / ".mxdev_cache").exists()
+
+    http_cache = HTTPCache(tmp_path / "cache")
+    read_dependencies("mx.ini", http_cache=http_cache)
+    assert [entry.url for entry in http_cache.entries()] == [url]
+
+
+def test_read_dependencies_file_url(tmp_path, monkeypatch):
+    from mxdev.including import read_dependencies
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "base.ini").write_text("[settings]\nthreads = 2\n")
+    url = (tmp_path / "base.ini").as_uri()
+    (tmp_path / "mx.ini").write_text(f"[settings]\ninclude = {url}\n")
+    dependencies = read_dependencies("mx.ini")
+    assert [source for source, _ in dependencies] == [url, "mx.ini"]
+    assert "threads = 2" in dependencies[0][1]
+
+
+def test_read_dependencies_reads_local_file_once(tmp_path, mocker):
+    from mxdev.including import read_dependencies
+
+    (tmp_path / "base.ini").write_text("[settings]\nthreads = 2\n")
+    (tmp_path / "a.ini").write_text("[settings]\ninclude = base.ini\n")
+    (tmp_path / "mx.ini").write_text("[settings]\ninclude =\n    a.ini\n    ./base.ini\n")
+    read_text = mocker.spy(pathlib.Path, "read_text")
+    sources = [source for source, _ in read_dependencies(tmp_path / "mx.ini")]
+    assert [pathlib.Path(source).name for source in sources] == ["base.ini", "a.ini", "base.ini", "mx.ini"]
+    assert read_text.call_count == 3
+
+
 def test_resolve_dependencies_filenotfound(tmp_path):
     from mxdev.including import resolve_dependencies
 
@@ -72,3 +112,147 @@ def test_resolve_dependencies_windows_path(tmp_path):
     file_list = resolve_dependencies(str(test_file), str(tmp_path))
     assert len(file_list) == 1
     assert file_list[0] == test_file
+
+
+def test_resolve_dependencies_http_cached(tmp_path, httpretty):
+    """Test remote includes are cached, revalidated and served offline."""
+    from mxdev.cache import HTTPCache
+    from mxdev.including import read_with_included
+    from mxdev.including import resolve_dependencies
+
+    base = pathlib.Path(__file__).parent / "data"
+    for name in ("file_with_http_include02.ini", "file_with_http_include03.ini"):
+        httpretty.register_uri(
+            httpretty.GET,
+            f"http://www.example.com/{name}",
+            (base / name).read_text(),
+            status=200,
+            adding_headers={"ETag": f'"{name}"'},
+        )
+    http_cache = HTTPCache(tmp_path / "cache")
+    file_list = resolve_dependencies(base / "file_with_http_include01.ini", tmp_path, http_cache=http_cache)
+    assert len(file_list) == 4
+    assert len(http_cache.entries()) == 2
+    assert http_cache.validators("http://www.example.com/file_with_http_include02.ini") == {
+        "ETag": '"file_with_http_include02.ini"'
+    }
+
+    # the next online run revalidates with the stored ETag
+    resolve_dependencies(base / "file_with_http_include01.ini", tmp_path, http_cache=http_cache)
+    assert httpretty.last_request().headers["If-None-Match"] == '"file_with_http_include03.ini"'
+
+    requests_made = len(httpretty.latest_requests())
+    cfg = read_with_included(base / "file_with_http_include01.ini", offline=True, http_cache=http_cache)
+    assert len(httpretty.latest_requests()) == requests_made
+    assert "settings" in cfg
+
+
+def test_resolve_dependencies_http_offline_not_cached(tmp_path):
+    """Test offline mode fails clearly for remote includes missing in the cache."""
+    from mxdev.cache import HTTPCache
+    from mxdev.including import resolve_dependencies
+
+    base = pathlib.Path(__file__).parent / "data"
+    with pytest.raises(RuntimeError, match="Offline mode: include 'http://www.example.com/"):
+        resolve_dependencies(
+            base / "file_with_http_include01.ini", tmp_path, offline=True, http_cache=HTTPCache(tmp_path / "cache")
+        )
+
+
+def test_resolve_dependencies_fetches_siblings_concurrently(tmp_path, mocker):
+    """Test remote includes download in parallel, the file order stays the same."""
+    from mxdev.cache import HTTPCache
+    from mxdev.including import read_with_included
+    from mxdev.including import resolve_dependencies
+
+    import threading
+    import time
+
+    remote = {
+        "http://example.com/a.ini": "[settings]\ninclude = a1.ini\nvalue = a\n",
+        "http://example.com/a1.ini": "[settings]\nvalue = a1\n",
+        "http://example.com/b.ini": "[settings]\ninclude = b1.ini\nvalue = b\n",
+        "http://example.com/b1.ini": "[settings]\nvalue = b1\n",
+        "http://example.com/c.ini": "[settings]\nvalue = c\n",
+    }
+    delays = {"http://example.com/a.ini": 0.2, "http://example.com/a1.ini": 0.1}
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def fetch_http(url, http_cache):
+        with lock:
+            running.append(url)
+            max_running.append(len(running))
+        time.sleep(delays.get(url, 0.05))
+        with lock:
+            running.remove(url)
+        return remote[url]
+
+    mocker.patch("mxdev.processing._fetch_http", side_effect=fetch_http)
+    root = tmp_path / "mx.ini"
+    root.write_text(
+        "[settings]\ninclude =\n    http://example.com/a.ini\n    http://example.com/b.ini\n"
+        "    http://example.com/c.ini\n"
+    )
+    http_cache = HTTPCache(tmp_path / "cache")
+    file_list = resolve_dependencies(root, tmp_path, http_cache=http_cache)
+    assert [path.read_text().split("value = ")[1].strip() for path in file_list[:-1]] == ["a1", "a", "b1", "b", "c"]
+    assert file_list[-1] == root
+    assert max(max_running) > 1
+
+    cfg = read_with_included(root, http_cache=http_cache)
+    assert cfg["settings"]["value"] == "c"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "[settings]\ntest = 1\n",
+        "[settings]\ninclude = a.ini\n",
+        "[settings]\nInclude: a.ini\n",
+        "[settings]\ninclude =\n    a.ini\n\n    # comment\n    b.ini\nother = 1\n",
+        "[settings]\n  include = a.ini\n      b.ini\n  other = c.ini\n",
+        "[other]\ninclude = a.ini\n[settings]\nfoo = bar\n    include = x.ini\n",
+        "; comment\n[settings]\n# include = no.ini\ninclude = a.ini\n[pkg]\ninclude = b.ini\n",
+        "[settings]\ninclude =\n",
+    ],
+)
+def test_scan_includes_matches_configparser(text):
+    from configparser import ConfigParser
+    from mxdev.including import _scan_includes
+
+    cfg = ConfigParser()
+    cfg.read_string(text)
+    expected = []
+    if "settings" in cfg and "include" in cfg["settings"]:
+        expected = [i.strip() for i in cfg["settings"]["include"].split("\n") if i.strip()]
+    assert _scan_includes(text) == expected
+
+
+def test_read_with_included_reads_in_memory(tmp_path, mocker, httpretty):
+    """Test each file is read once and no temporary files are written."""
+    from mxdev.cache import HTTPCache
+    from mxdev.including import read_dependencies
+    from mxdev.including import read_with_included
+
+    base = pathlib.Path(__file__).parent / "data"
+    for name in ("file_with_http_include02.ini", "file_with_http_include03.ini"):
+        httpretty.register_uri(httpretty.GET, f"http://www.example.com/{name}", (base / name).read_text())
+    http_cache = HTTPCache(tmp_path / "cache")
+    tempfiles = mocker.patch("tempfile.NamedTemporaryFile", side_effect=AssertionError)
+    tempdirs = mocker.patch("tempfile.TemporaryDirectory", side_effect=AssertionError)
+
+    texts = read_dependencies(base / "file_with_http_include01.ini", http_cache=http_cache)
+    assert [source.rsplit("/", 1)[-1] for source, _ in texts] == [
+        "file_with_http_include03.ini",
+        "file_with_http_include02.ini",
+        "file_with_http_include04.ini",
+        "file_with_http_include01.ini",
+    ]
+    assert texts[0][0] == "http://www.example.com/file_with_http_include03.ini"
+    cfg = read_with_included(base / "file_with_http_include01.ini", http_cache=http_cache)
+    assert cfg["settings"]["test"] == "1"
+    assert cfg["settings"]["unique_3"] == "true"
+    assert not tempfiles.called
+    assert not tempdirs.called
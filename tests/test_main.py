@@ -71,6 +71,18 @@ def test_parser_threads():
     assert args.threads == 16
 
 
+def test_parser_dirty_policy():
+    """Test argument parser with --dirty-policy flag."""
+    from mxdev.main import parser
+
+    import pytest
+
+    assert parser.parse_args([]).dirty_policy is None
+    assert parser.parse_args(["--dirty-policy", "skip"]).dirty_policy == "skip"
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--dirty-policy", "never"])
+
+
 def test_parser_silent():
     """Test argument parser with --silent flag."""
     from mxdev.main import parser
@@ -451,3 +463,192 @@ requirements-out = requirements-out.txt
         # Verify write and write_hooks were NOT called
         assert not mock_write.called
         assert not mock_write_hooks.called
+
+
+def test_main_cache_command(tmp_path, monkeypatch, capsys):
+    """Test 'mxdev cache' lists, prunes and clears the HTTP cache."""
+    from mxdev.cache import HTTPCache
+
+    import sys
+
+    main_module = sys.modules["mxdev.main"]
+    http_cache = HTTPCache(tmp_path / "cache")
+    http_cache.write("http://example.com/a.txt", "a==1\n")
+    http_cache.write("http://example.com/b.txt", "b==1\n" * 100)
+    cache_args = ["mxdev", "cache", "--cache-dir", str(tmp_path / "cache")]
+
+    with patch.object(main_module, "setup_logger"):
+        with patch("sys.argv", cache_args + ["list"]):
+            main_module.main()
+        out = capsys.readouterr().out
+        assert "http://example.com/a.txt" in out
+        assert "2 entries" in out
+
+        with patch("sys.argv", cache_args + ["prune", "--max-size", "100"]):
+            main_module.main()
+        assert [entry.url for entry in http_cache.entries()] == []
+
+        http_cache.write("http://example.com/a.txt", "a==1\n")
+        with patch("sys.argv", cache_args + ["clear"]):
+            main_module.main()
+        assert http_cache.entries() == []
+
+
+def test_parser_force():
+    """Test argument parser with --force flag."""
+    from mxdev.main import parser
+
+    assert parser.parse_args([]).force is False
+    assert parser.parse_args(["--force"]).force is True
+
+
+def test_main_skips_unchanged_run(tmp_path, monkeypatch):
+    """Test main() skips a run if no input changed, unless --force is given."""
+    config_file = tmp_path / "mx.ini"
+    config_file.write_text(
+        """[settings]
+requirements-in = requirements.txt
+requirements-out = requirements-out.txt
+constraints-out = constraints-out.txt
+"""
+    )
+    (tmp_path / "requirements.txt").write_text("requests\n")
+    monkeypatch.chdir(tmp_path)
+
+    import sys
+
+    main_module = sys.modules["mxdev.main"]
+
+    def run(*args):
+        with (
+            patch("sys.argv", ["mxdev", "-c", str(config_file)] + list(args)),
+            patch.object(main_module, "load_hooks", return_value=[]),
+            patch.object(main_module, "read", wraps=main_module.read) as mock_read,
+            patch.object(main_module, "setup_logger"),
+        ):
+            main_module.main()
+        return mock_read.called
+
+    assert run() is True
+    assert (tmp_path / "requirements-out.txt").exists()
+    assert run() is False
+    assert run("--force") is True
+    assert run("--offline") is True
+
+    (tmp_path / "requirements.txt").write_text("requests\nurllib3\n")
+    assert run("--offline") is True
+    assert "urllib3" in (tmp_path / "requirements-out.txt").read_text()
+    assert run("--offline") is False
+
+
+def test_main_runs_hooks_on_changed_hook_files(tmp_path, monkeypatch):
+    """Test a run is not skipped if a file of a hook changed."""
+    from mxdev.uv import UvPyprojectUpdater
+
+    config_file = tmp_path / "mx.ini"
+    config_file.write_text("[settings]\nrequirements-in = requirements.txt\n")
+    (tmp_path / "requirements.txt").write_text("-c constraints.txt\nrequests\n")
+    (tmp_path / "constraints.txt").write_text("requests==2.28.0\n")
+    monkeypatch.chdir(tmp_path)
+
+    import sys
+
+    main_module = sys.modules["mxdev.main"]
+
+    def run():
+        with (
+            patch("sys.argv", ["mxdev", "-c", str(config_file), "--offline"]),
+            patch.object(main_module, "load_hooks", return_value=[UvPyprojectUpdater()]),
+            patch.object(main_module, "setup_logger"),
+        ):
+            main_module.main()
+
+    run()
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "test"\n\n[tool.uv]\nmanaged = true\n')
+    run()
+    assert "requests==2.28.0" in (tmp_path / "pyproject.toml").read_text()
+
+
+def test_main_pulls_upstream_commits(mkgitrepo, tempdir, monkeypatch):
+    """Test a run which updates sources is not skipped, new upstream commits are pulled."""
+    repository = mkgitrepo("repository")
+    repository.add_file("foo", msg="Initial")
+    config_file = tempdir / "mx.ini"
+    config_file.write_text(
+        f"""[settings]
+requirements-in = requirements.txt
+threads = 1
+
+[pkg]
+url = {repository.url}
+branch = master
+"""
+    )
+    (tempdir / "requirements.txt").write_text("")
+    monkeypatch.chdir(tempdir)
+
+    import sys
+
+    main_module = sys.modules["mxdev.main"]
+
+    def run():
+        with (
+            patch("sys.argv", ["mxdev", "-c", str(config_file)]),
+            patch.object(main_module, "load_hooks", return_value=[]),
+            patch.object(main_module, "setup_logger"),
+        ):
+            main_module.main()
+
+    run()
+    assert (tempdir / "sources" / "pkg" / "foo").exists()
+    repository.add_file("bar", msg="Second")
+    run()
+    assert (tempdir / "sources" / "pkg" / "bar").exists()
+
+
+def test_main_timings_report(tmp_path, monkeypatch):
+    """Test --timings writes a JSON report and logs the summary."""
+    from mxdev import timing
+
+    import json
+    import sys
+
+    config_file = tmp_path / "mx.ini"
+    config_file.write_text("[settings]\nrequirements-in = requirements.txt\n")
+    (tmp_path / "requirements.txt").write_text("requests\n")
+    monkeypatch.chdir(tmp_path)
+    main_module = sys.modules["mxdev.main"]
+    report_file = tmp_path / "report.json"
+    with (
+        patch("sys.argv", ["mxdev", "-c", str(config_file), "--timings", str(report_file)]),
+        patch.object(main_module, "load_hooks", return_value=[]),
+        patch.object(main_module, "setup_logger"),
+        patch.object(main_module.logger, "info") as info,
+    ):
+        main_module.main()
+    report = json.loads(report_file.read_text())
+    assert set(report["phases"]) == {"read", "hooks", "fetch", "write"}
+    assert report["packages"] == {}
+    assert report["total"] >= report["phases"]["read"]
+    assert any(call.args[0].startswith("# Timings: total") for call in info.call_args_list)
+    assert timing.recorder() is None
+
+
+def test_main_trace(tmp_path, monkeypatch):
+    """Test --trace writes the spans of the run in Trace Event Format."""
+    import json
+    import sys
+
+    config_file = tmp_path / "mx.ini"
+    config_file.write_text("[settings]\nrequirements-in = requirements.txt\n")
+    (tmp_path / "requirements.txt").write_text("requests\n")
+    monkeypatch.chdir(tmp_path)
+    main_module = sys.modules["mxdev.main"]
+    with (
+        patch("sys.argv", ["mxdev", "-c", str(config_file), "--trace", "trace.json"]),
+        patch.object(main_module, "load_hooks", return_value=[]),
+        patch.object(main_module, "setup_logger"),
+    ):
+        main_module.main()
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert [event["name"] for event in events if event["ph"] == "X"] == ["read", "hooks", "fetch", "write", "hooks"]
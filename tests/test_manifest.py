@@ -0,0 +1,132 @@
+from mxdev import manifest
+from mxdev.cache import HTTPCache
+from mxdev.config import Configuration
+from mxdev.state import State
+
+import json
+import pytest
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "mx.ini").write_text(
+        "[settings]\n"
+        "requirements-in = requirements.txt\n"
+        "include = base.ini\n"
+        "[pkg]\n"
+        "url = https://example.com/pkg.git\n"
+        "update = no\n"
+    )
+    (tmp_path / "base.ini").write_text("[settings]\nthreads = 2\n")
+    (tmp_path / "requirements.txt").write_text("-c constraints.txt\nrequests\n")
+    (tmp_path / "constraints.txt").write_text("requests==2.28.0\n")
+    (tmp_path / "requirements-mxdev.txt").write_text("requests\n")
+    (tmp_path / "constraints-mxdev.txt").write_text("requests==2.28.0\n")
+    return tmp_path
+
+
+def _record(project, key, hooks=()):
+    state = State(configuration=Configuration("mx.ini"))
+    state.constraints = ["requests==2.28.0\n"]
+    manifest.record(state, key, project / "cache", hooks=hooks)
+
+
+def test_is_unchanged(project):
+    key = {"configuration": str(project / "mx.ini")}
+    assert manifest.is_unchanged(key, project / "cache") is False
+    _record(project, key)
+    assert manifest.is_unchanged(key, project / "cache") is True
+    assert manifest.is_unchanged({"configuration": "other.ini"}, project / "cache") is False
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["mx.ini", "base.ini", "requirements.txt", "constraints.txt", "requirements-mxdev.txt"],
+)
+def test_is_unchanged_detects_changed_files(project, path):
+    key = {"configuration": str(project / "mx.ini")}
+    _record(project, key)
+    with open(project / path, "a") as f:
+        f.write("\n# changed\n")
+    assert manifest.is_unchanged(key, project / "cache") is False
+
+
+def test_is_unchanged_detects_removed_output(project):
+    key = {"configuration": str(project / "mx.ini")}
+    _record(project, key)
+    (project / "constraints-mxdev.txt").unlink()
+    assert manifest.is_unchanged(key, project / "cache") is False
+
+
+def test_is_unchanged_detects_new_commit(project, mkgitrepo):
+    key = {"configuration": str(project / "mx.ini")}
+    (project / "sources").mkdir()
+    repository = mkgitrepo(project / "sources" / "pkg")
+    repository.add_file("foo", msg="Initial")
+    _record(project, key)
+    assert manifest.is_unchanged(key, project / "cache") is True
+
+    repository.add_file("bar", msg="Second")
+    assert manifest.is_unchanged(key, project / "cache") is False
+
+
+def test_is_unchanged_remote_requirements(project):
+    url = "http://example.com/constraints.txt"
+    (project / "requirements.txt").write_text(f"-c {url}\nrequests\n")
+    key = {"configuration": str(project / "mx.ini")}
+    http_cache = HTTPCache(project / "cache")
+
+    # not cached, nothing recorded
+    _record(project, key)
+    assert not (project / "cache" / manifest.MANIFEST_FILE).exists()
+
+    http_cache.write(url, "requests==2.28.0\n")
+    _record(project, key)
+    # without max age remote files are never trusted
+    assert manifest.is_unchanged(key, project / "cache") is False
+
+    data = json.loads((project / "cache" / manifest.MANIFEST_FILE).read_text())
+    data["http-cache-max-age"] = 3600
+    (project / "cache" / manifest.MANIFEST_FILE).write_text(json.dumps(data))
+    assert manifest.is_unchanged(key, project / "cache") is True
+
+    http_cache.write(url, "requests==2.31.0\n")
+    assert manifest.is_unchanged(key, project / "cache") is False
+
+
+def test_invalidate(project):
+    key = {"configuration": str(project / "mx.ini")}
+    _record(project, key)
+    manifest.invalidate(project / "cache")
+    assert manifest.is_unchanged(key, project / "cache") is False
+    manifest.invalidate(project / "cache")
+
+
+@pytest.mark.parametrize(
+    "update, offline, unchanged",
+    [("yes", False, False), ("yes", True, True), ("no", False, True)],
+)
+def test_is_unchanged_not_for_updated_sources(project, update, offline, unchanged):
+    mx_ini = (project / "mx.ini").read_text().replace("update = no", f"update = {update}")
+    if offline:
+        mx_ini = mx_ini.replace("[settings]\n", "[settings]\noffline = true\n")
+    (project / "mx.ini").write_text(mx_ini)
+    key = {"configuration": str(project / "mx.ini")}
+    _record(project, key)
+    assert manifest.is_unchanged(key, project / "cache") is unchanged
+
+
+def test_is_unchanged_detects_changed_hook_files(project):
+    from mxdev.hooks import Hook
+    from mxdev.uv import UvPyprojectUpdater
+
+    key = {"configuration": str(project / "mx.ini")}
+    _record(project, key, hooks=[UvPyprojectUpdater()])
+    assert manifest.is_unchanged(key, project / "cache") is True
+    (project / "pyproject.toml").write_text("[tool.uv]\nmanaged = true\n")
+    assert manifest.is_unchanged(key, project / "cache") is False
+
+    # hooks which do not declare their files are never skipped
+    _record(project, key, hooks=[UvPyprojectUpdater(), Hook()])
+    assert manifest.is_unchanged(key, project / "cache") is False
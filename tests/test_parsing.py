@@ -0,0 +1,86 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_memo():
+    from mxdev.parsing import _memo
+
+    _memo.clear()
+    yield
+    _memo.clear()
+
+
+def test_requirement_name():
+    from mxdev.parsing import requirement_name
+
+    assert requirement_name("requests>=2.28.0\n") == "requests"
+    assert requirement_name("My.Package[extra]==1.0 ; python_version>'3'") == "My.Package"
+    assert requirement_name("# a comment") is None
+    assert requirement_name("") is None
+    assert requirement_name("-e ./sources/foo") is None
+
+
+def test_requirement_name_memoized(mocker):
+    from mxdev import parsing
+
+    requirement = mocker.spy(parsing, "Requirement")
+    assert parsing.requirement_name("requests==1.0") == "requests"
+    assert parsing.requirement_name("  requests==1.0\n") == "requests"
+    assert parsing.requirement_name("not a requirement!") is None
+    assert parsing.requirement_name("not a requirement!") is None
+    assert requirement.call_count == 2
+
+
+def test_memo_evicts_least_recently_used():
+    from mxdev.parsing import _NameMemo
+
+    memo = _NameMemo(maxsize=2)
+    memo.set("a", "a")
+    memo.set("b", "b")
+    memo.get("a")
+    memo.set("c", "c")
+    assert memo.get("b") is None
+    assert memo.get("a") == "a"
+    assert memo.get("c") == "c"
+
+
+def test_preload_requirement_names(tmp_path, mocker):
+    from mxdev import parsing
+
+    content = "# comment\n-c other.txt\nrequests==1.0\nurllib3==2.0\n"
+    parsing.preload_requirement_names(content, tmp_path)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    parsing._memo.clear()
+    requirement = mocker.spy(parsing, "Requirement")
+    parsing.preload_requirement_names(content, tmp_path)
+    assert parsing.requirement_name("requests==1.0") == "requests"
+    assert parsing.requirement_name("urllib3==2.0") == "urllib3"
+    requirement.assert_not_called()
+
+
+def test_requirement_name_skips_non_requirements(mocker):
+    from mxdev import parsing
+
+    requirement = mocker.spy(parsing, "Requirement")
+    for line in ("# comment", "", "   ", "-e ./sources/foo", "--hash=sha256:abc", "-c constraints.txt"):
+        assert parsing.requirement_name(line) is None
+    requirement.assert_not_called()
+
+
+def test_resolve_dependencies_parse_cache(tmp_path, monkeypatch):
+    from mxdev.processing import resolve_dependencies
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "constraints.txt").write_text("my.package==1.0\nrequests==2.0\n")
+    requirements, constraints = resolve_dependencies(
+        "constraints.txt",
+        package_keys=["my.package"],
+        override_keys=[],
+        ignore_keys=[],
+        variety="c",
+        cache_dir=tmp_path / "cache",
+        parse_cache=True,
+    )
+    assert "# my.package==1.0 -> mxdev disabled (source)\n" in constraints
+    assert len(list((tmp_path / "cache" / "parsed").glob("*.json"))) == 1
@@ -145,6 +145,38 @@ def test_process_line_source_constraint_with_trailing_newline(eol):
     assert constraints == ["# my.package==1.0.0 -> mxdev disabled (source)\n"]
 
 
+def test_requirement_filter_normalizes_names():
+    """Test RequirementFilter stores PEP 503 normalized names."""
+    from mxdev.processing import RequirementFilter
+
+    requirement_filter = RequirementFilter(
+        package_keys=["My.Package"],
+        override_keys=["Some_Lib"],
+        ignore_keys=["other-LIB"],
+    )
+    assert requirement_filter.package_keys == {"my-package"}
+    assert requirement_filter.override_keys == {"some-lib"}
+    assert requirement_filter.ignore_keys == {"other-lib"}
+
+
+def test_process_line_with_requirement_filter():
+    """Test process_line uses a precompiled filter and matches normalized names."""
+    from mxdev.processing import process_line
+    from mxdev.processing import RequirementFilter
+
+    requirement_filter = RequirementFilter(package_keys=["my.package"])
+    requirements, constraints = process_line(
+        "My_Package==1.0.0",
+        package_keys=[],
+        override_keys=[],
+        ignore_keys=[],
+        variety="c",
+        requirement_filter=requirement_filter,
+    )
+    assert requirements == []
+    assert constraints == ["# My_Package==1.0.0 -> mxdev disabled (source)\n"]
+
+
 def test_resolve_dependencies_source_package_commented(tmp_path):
     """Regression test for #100 through the real file-reading path."""
     from mxdev.processing import resolve_dependencies
@@ -261,12 +293,15 @@ def test_resolve_dependencies_nested(tmp_path):
         os.chdir(old_cwd)
 
 
-def test_resolve_dependencies_http(tmp_path):
+def test_resolve_dependencies_http(tmp_path, monkeypatch):
     """Test resolve_dependencies with HTTP URL."""
     from mxdev.processing import resolve_dependencies
 
     import httpretty
 
+    # the HTTP cache defaults to the working directory
+    monkeypatch.chdir(tmp_path)
+
     # Mock HTTP response
     httpretty.enable()
     try:
@@ -289,6 +324,22 @@ def test_resolve_dependencies_http(tmp_path):
         httpretty.reset()
 
 
+def test_resolve_dependencies_file_url_constraint(tmp_path, monkeypatch):
+    """Test a file:// constraints reference is read like at any other URL."""
+    from mxdev.processing import resolve_dependencies
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "constraints.txt").write_text("requests==2.28.0\n")
+    (tmp_path / "requirements.txt").write_text(f"-c {(tmp_path / 'constraints.txt').as_uri()}\nrequests\n")
+    requirements, constraints = resolve_dependencies(
+        "requirements.txt",
+        package_keys=[],
+        override_keys=[],
+        ignore_keys=[],
+    )
+    assert any(line.startswith("requests==2.28.0") for line in constraints)
+
+
 def test_write_dev_sources(tmp_path):
     """Test write_dev_sources writes development sources correctly."""
     from mxdev.config import Configuration
@@ -492,6 +543,15 @@ def test_write_dev_overrides_source_wins(tmp_path):
     assert "# my.package==1.0.0 IGNORE mxdev constraint override" in content
 
 
+def test_write_dev_overrides_source_wins_normalized(tmp_path):
+    """Test write_dev_overrides matches source packages by normalized name."""
+    from mxdev.processing import write_dev_overrides
+
+    fio = StringIO()
+    write_dev_overrides(fio, {"My_Package": "My_Package==1.0.0"}, package_keys=["my.package"])
+    assert "# My_Package==1.0.0 IGNORE mxdev constraint override" in fio.getvalue()
+
+
 def test_write_main_package(tmp_path):
     """Test write_main_package writes main package correctly."""
     from mxdev.processing import write_main_package
@@ -1068,3 +1128,269 @@ def test_http_cache_revalidates_in_online_mode(tmp_path):
     finally:
         httpretty.disable()
         httpretty.reset()
+
+
+def test_resolve_dependencies_prefetches_remote_tree(tmp_path, httpretty):
+    """Test nested remote references are fetched and expanded once each, in order."""
+    from mxdev.processing import resolve_dependencies
+
+    base = "http://example.com"
+    httpretty.register_uri(httpretty.GET, f"{base}/root.txt", body=f"-c {base}/a.txt\n-c {base}/b.txt\nroot==1\n")
+    httpretty.register_uri(httpretty.GET, f"{base}/a.txt", body=f"-c {base}/shared.txt\na==1\n")
+    httpretty.register_uri(httpretty.GET, f"{base}/b.txt", body=f"-c {base}/shared.txt\nb==1\n")
+    httpretty.register_uri(httpretty.GET, f"{base}/shared.txt", body="shared==1\n")
+
+    requirements, constraints = resolve_dependencies(
+        f"{base}/root.txt",
+        package_keys=[],
+        override_keys=[],
+        ignore_keys=[],
+        variety="c",
+        cache_dir=tmp_path / "cache",
+    )
+    entries = [line.strip() for line in constraints if line.strip() and not line.startswith("#")]
+    assert entries == ["shared==1", "a==1", "b==1", "root==1"]
+    assert f"# -c {base}/shared.txt -> mxdev skipped (already included)\n" in constraints
+    paths = [request.path for request in httpretty.latest_requests()]
+    assert sorted(paths) == ["/a.txt", "/b.txt", "/root.txt", "/shared.txt"]
+
+
+def test_http_prefetcher_single_flight(tmp_path, mocker):
+    """Test HTTPPrefetcher downloads a URL only once."""
+    from mxdev.cache import HTTPCache
+    from mxdev.processing import HTTPPrefetcher
+
+    fetch = mocker.patch("mxdev.processing._fetch_http", return_value="pkg==1\n")
+    http_cache = HTTPCache(tmp_path)
+    with HTTPPrefetcher(http_cache) as prefetcher:
+        prefetcher.discover("http://example.com/c.txt")
+        prefetcher.discover("http://example.com/c.txt")
+        assert prefetcher.get("http://example.com/c.txt") == "pkg==1\n"
+    fetch.assert_called_once_with("http://example.com/c.txt", http_cache)
+
+
+def test_http_cache_stores_validators(tmp_path, httpretty):
+    """Test ETag and Last-Modified are stored next to the cache entry."""
+    from mxdev.cache import HTTPCache
+    from mxdev.processing import _fetch_http
+
+    http_cache = HTTPCache(tmp_path)
+    url = "http://example.com/constraints.txt"
+    httpretty.register_uri(
+        httpretty.GET,
+        url,
+        body="pkg==1.0\n",
+        adding_headers={"ETag": '"abc"', "Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT"},
+    )
+    assert _fetch_http(url, http_cache) == "pkg==1.0\n"
+    assert http_cache.validators(url) == {
+        "ETag": '"abc"',
+        "Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT",
+    }
+
+
+def test_http_cache_not_modified_served_from_cache(tmp_path, httpretty):
+    """Test a conditional request answered with 304 is served from the cache."""
+    from mxdev.cache import HTTPCache
+    from mxdev.processing import _fetch_http
+
+    http_cache = HTTPCache(tmp_path)
+    url = "http://example.com/constraints.txt"
+    http_cache.write(url, "cached==1.0\n", {"ETag": '"abc"'})
+
+    def respond(request, uri, response_headers):
+        if request.headers.get("If-None-Match") == '"abc"':
+            return 304, response_headers, ""
+        return 200, response_headers, "fresh==2.0\n"
+
+    httpretty.register_uri(httpretty.GET, url, body=respond)
+    assert _fetch_http(url, http_cache) == "cached==1.0\n"
+    assert httpretty.last_request().headers["If-None-Match"] == '"abc"'
+
+
+def test_http_cache_fresh_entry_skips_network(tmp_path, mocker):
+    """Test an entry within max-age is served without any request."""
+    from mxdev.cache import HTTPCache
+    from mxdev.processing import _fetch_http
+
+    client = mocker.patch("mxdev.processing.default_client")
+    http_cache = HTTPCache(tmp_path, max_age=3600)
+    url = "http://example.com/constraints.txt"
+    http_cache.write(url, "cached==1.0\n")
+    assert _fetch_http(url, http_cache) == "cached==1.0\n"
+    client.assert_not_called()
+
+
+def test_write_if_changed(tmp_path):
+    """Test write_if_changed only replaces files with different content."""
+    from mxdev.processing import write_if_changed
+
+    outfile = tmp_path / "out.txt"
+    assert write_if_changed(outfile, "a==1\n") is True
+    assert outfile.read_text() == "a==1\n"
+    os.utime(outfile, (0, 0))
+    assert write_if_changed(outfile, "a==1\n") is False
+    assert outfile.stat().st_mtime == 0
+    assert write_if_changed(outfile, "a==2\n") is True
+    assert outfile.read_text() == "a==2\n"
+    assert [path.name for path in tmp_path.iterdir()] == ["out.txt"]
+
+
+def test_write_reports_unchanged_outfiles(tmp_path, monkeypatch):
+    """Test write() keeps unchanged files and reports it on the state."""
+    from mxdev.config import Configuration
+    from mxdev.processing import write
+    from mxdev.state import State
+
+    monkeypatch.chdir(tmp_path)
+    config_file = tmp_path / "mx.ini"
+    config_file.write_text(
+        "[settings]\nrequirements-out = requirements-out.txt\nconstraints-out = constraints-out.txt\n"
+    )
+    state = State(configuration=Configuration(str(config_file)))
+    state.requirements = ["requests\n"]
+    state.constraints = ["urllib3==1.26.9\n"]
+
+    write(state)
+    assert state.outfiles_changed is True
+    for name in ("requirements-out.txt", "constraints-out.txt"):
+        os.utime(tmp_path / name, (0, 0))
+
+    state = State(configuration=Configuration(str(config_file)))
+    state.requirements = ["requests\n"]
+    state.constraints = ["urllib3==1.26.9\n"]
+    write(state)
+    assert state.outfiles_changed is False
+    assert (tmp_path / "requirements-out.txt").stat().st_mtime == 0
+    assert (tmp_path / "constraints-out.txt").stat().st_mtime == 0
+
+    state.constraints = ["urllib3==2.0.0\n"]
+    write(state)
+    assert state.outfiles_changed is True
+    assert (tmp_path / "requirements-out.txt").stat().st_mtime == 0
+    assert "urllib3==2.0.0" in (tmp_path / "constraints-out.txt").read_text()
+
+
+def test_resolve_dependencies_expands_shared_file_once(tmp_path, monkeypatch):
+    """Test a file referenced twice is expanded once, repeats are a comment."""
+    from mxdev.processing import resolve_dependencies
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "requirements.txt").write_text("-c a.txt\n-c ./b.txt\n-r base.txt\nfoo\n")
+    (tmp_path / "a.txt").write_text("-c base.txt\na==1\n")
+    (tmp_path / "b.txt").write_text(f"-c {tmp_path / 'base.txt'}\nb==1\n")
+    (tmp_path / "base.txt").write_text("base==1\n")
+
+    requirements, constraints = resolve_dependencies("requirements.txt", [], [], [], cache_dir=tmp_path / "cache")
+    entries = [line.strip() for line in constraints if line.strip() and not line.startswith("#")]
+    assert entries == ["base==1", "a==1", "b==1"]
+    assert f"# -c {tmp_path / 'base.txt'} -> mxdev skipped (already included)\n" in constraints
+    # the same file as requirements is another node
+    assert "base==1\n" in requirements
+
+
+def test_resolve_dependencies_detects_cycle(tmp_path, monkeypatch):
+    """Test circular references raise a clear error instead of recursing."""
+    from mxdev.processing import resolve_dependencies
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "requirements.txt").write_text("-c a.txt\n")
+    (tmp_path / "a.txt").write_text("-c b.txt\na==1\n")
+    (tmp_path / "b.txt").write_text("-c a.txt\nb==1\n")
+
+    with pytest.raises(RuntimeError, match="Circular reference .*: a.txt -> b.txt -> a.txt"):
+        resolve_dependencies("requirements.txt", [], [], [], cache_dir=tmp_path / "cache")
+
+
+def test_resolution_graph_normalize(tmp_path, monkeypatch):
+    """Test paths and URLs referring to the same file are the same node."""
+    from mxdev.processing import ResolutionGraph
+
+    monkeypatch.chdir(tmp_path)
+    normalize = ResolutionGraph.normalize
+    assert normalize("a.txt") == normalize("./sub/../a.txt") == normalize(str(tmp_path / "a.txt"))
+    assert normalize("HTTP://Example.COM/a.txt#x") == normalize("http://example.com/a.txt")
+    assert normalize("http://example.com/a.txt") != normalize("http://example.com/A.txt")
+
+
+def test_iter_dependencies_streams_nested_files(tmp_path, monkeypatch):
+    """Test iter_dependencies yields lines lazily, in the order of resolve_dependencies."""
+    from mxdev.processing import iter_dependencies
+    from mxdev.processing import RequirementFilter
+    from mxdev.processing import resolve_dependencies
+
+    monkeypatch.chdir(tmp_path)
+    depth = 50
+    for i in range(depth):
+        reference = f"-c level{i + 1}.txt\n" if i + 1 < depth else ""
+        (tmp_path / f"level{i}.txt").write_text(f"{reference}package{i}==1.0\n")
+    (tmp_path / "requirements.txt").write_text("-c level0.txt\nrequests\n")
+
+    stream = iter_dependencies("requirements.txt", RequirementFilter(), offline=True)
+    # nothing is read before the first line is requested
+    assert next(stream) == ("c", "#" * 79 + "\n")
+    items = list(stream)
+    constraints = [line for variety, line in items if variety == "c"]
+    assert constraints.count("#" * 79 + "\n\n") == depth
+    assert sum("package" in line for line in constraints) == depth
+
+    requirements, expected = resolve_dependencies("requirements.txt", [], [], [], offline=True)
+    assert ["#" * 79 + "\n"] + constraints == expected
+    assert [line for variety, line in items if variety == "r"] == requirements
+
+
+def test_read_stores_lines(tmp_path, monkeypatch):
+    """Test read() stores the output as Lines, split only when accessed."""
+    from mxdev.config import Configuration
+    from mxdev.processing import read
+    from mxdev.state import Lines
+    from mxdev.state import State
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "mx.ini").write_text("[settings]\nrequirements-in = requirements.txt\noffline = true\n")
+    (tmp_path / "requirements.txt").write_text("-c constraints.txt\nrequests\n")
+    (tmp_path / "constraints.txt").write_text("requests==2.28.0\n")
+
+    state = State(configuration=Configuration("mx.ini"))
+    read(state)
+    assert isinstance(state.constraints, Lines)
+    assert state.constraints._data is None
+    assert "requests==2.28.0\n" in state.constraints.text
+    assert state.constraints
+    assert "requests==2.28.0\n" in state.constraints
+    assert state.constraints.text == "".join(state.constraints)
+
+
+def test_lines():
+    """Test Lines behaves like a list of lines backed by a text."""
+    from mxdev.state import Lines
+
+    lines = Lines("a\nb\n")
+    assert lines.text == "a\nb\n"
+    assert len(lines) == 2
+    assert lines == ["a\n", "b\n"]
+    lines.append("c\n")
+    assert lines.text == "a\nb\nc\n"
+    assert not Lines()
+    assert not Lines("")
+    assert Lines("x")
+
+
+def test_lines_list_operations():
+    """Test Lines supports the list operations which build new Lines."""
+    from mxdev.state import Lines
+
+    lines = Lines("a\nb\n")
+    assert lines[1:] == ["b\n"]
+    assert isinstance(lines[1:], Lines)
+    assert (lines + ["c\n"]).text == "a\nb\nc\n"
+    assert (["z\n"] + lines).text == "z\na\nb\n"
+    assert (lines * 2).text == "a\nb\na\nb\n"
+
+    copy = Lines("a\nb\n").copy()
+    assert copy._data is None
+    copy.append("c\n")
+    assert lines.text == "a\nb\n"
+    assert copy.text == "a\nb\nc\n"
+    assert copy.copy().text == "a\nb\nc\n"
+
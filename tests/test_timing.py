@@ -0,0 +1,124 @@
+from mxdev import timing
+
+import os
+import pytest
+import threading
+
+
+@pytest.fixture
+def recorder():
+    yield timing.enable()
+    timing.disable()
+
+
+def test_phase_is_noop_when_disabled():
+    timing.disable()
+    with timing.phase("read"):
+        pass
+    assert timing.recorder() is None
+
+
+def test_report(recorder, mocker):
+    clock = mocker.patch("time.perf_counter")
+    for package, name, start, end in [
+        (None, "read", 0.0, 1.0),
+        (None, "fetch", 1.0, 10.0),
+        ("a", "checkout", 1.0, 9.0),
+        ("a", "clone", 1.0, 7.0),
+        ("a", "submodules", 7.0, 9.0),
+        ("b", "update", 1.0, 3.0),
+        ("b", "status", 0.5, 0.75),
+        ("b", "update", 4.0, 5.0),
+    ]:
+        clock.side_effect = [start, end]
+        with timing.phase(name, package):
+            pass
+    clock.side_effect = None
+    clock.return_value = 12.0
+    recorder.start = 0.0
+    report = recorder.report()
+    assert report == {
+        "total": 12.0,
+        "phases": {"read": 1.0, "fetch": 9.0},
+        "packages": {
+            "a": {"checkout": 8.0, "clone": 6.0, "submodules": 2.0},
+            "b": {"status": 0.25, "update": 3.0},
+        },
+    }
+    lines = timing.summary(report, size=1)
+    assert lines[0] == "# Timings: total 12.00s (read 1.00s, fetch 9.00s)"
+    assert lines[1] == "# Slowest 1 of 2 packages:"
+    assert lines[2].split() == ["#", "package", "total", *timing.PACKAGE_PHASES]
+    assert lines[3].split() == ["#", "a", "8.00s", "6.00s", "-", "-", "-", "2.00s", "-"]
+    assert len(lines) == 4
+
+
+def test_timed_records_package_phase_per_thread(recorder):
+    class WorkingCopy:
+        source = {"name": "a"}
+
+        @timing.timed("status")
+        def status(self):
+            return "clean"
+
+    thread = threading.Thread(target=WorkingCopy().status, name="worker")
+    thread.start()
+    thread.join()
+    assert WorkingCopy().status() == "clean"
+    assert [(span.name, span.package, span.thread_name) for span in recorder.spans] == [
+        ("status", "a", "worker"),
+        ("status", "a", threading.current_thread().name),
+    ]
+
+
+def test_trace(recorder, mocker):
+    from mxdev.vcs import common
+
+    import subprocess
+    import sys
+
+    def work():
+        with timing.phase("checkout", "a"):
+            cmd = common.popen([sys.executable, "-c", "print('x')"], stdout=subprocess.PIPE)
+            cmd.communicate()
+
+    with timing.phase("fetch"):
+        thread = threading.Thread(target=work, name="mxdev-vcs_0")
+        thread.start()
+        thread.join()
+    trace = timing.trace(recorder)
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    tracks = {event["args"]["name"]: event["tid"] for event in events if event["name"] == "thread_name"}
+    assert set(tracks) == {threading.current_thread().name, "mxdev-vcs_0"}
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    python = f"{os.path.basename(sys.executable)} -c print('x')"
+    assert set(spans) == {"fetch", "checkout a", python}
+    assert spans["fetch"]["tid"] == tracks[threading.current_thread().name]
+    assert spans["checkout a"]["tid"] == spans[python]["tid"] == tracks["mxdev-vcs_0"]
+    assert spans["checkout a"]["args"] == {"package": "a"}
+    assert spans[python]["cat"] == "subprocess"
+    # the command is nested in the package span, which is nested in the phase
+    checkout, command = spans["checkout a"], spans[python]
+    assert checkout["ts"] <= command["ts"]
+    assert command["ts"] + command["dur"] <= checkout["ts"] + checkout["dur"]
+    assert spans["fetch"]["ts"] <= checkout["ts"]
+    # only phases count in the report
+    assert timing.recorder().report()["packages"] == {"a": {"checkout": pytest.approx(checkout["dur"] / 1e6, abs=1e-3)}}
+
+
+def test_hooks_are_traced(recorder, mocker):
+    from mxdev.hooks import Hook
+    from mxdev.hooks import read_hooks
+    from mxdev.hooks import write_hooks
+
+    class MyHook(Hook):
+        namespace = "my"
+
+    state = mocker.Mock()
+    read_hooks(state, [MyHook()])
+    write_hooks(state, [MyHook()])
+    assert [(span.name, span.category) for span in recorder.spans] == [
+        ("MyHook.read", "hook"),
+        ("MyHook.write", "hook"),
+    ]
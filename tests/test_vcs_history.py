@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+from mxdev.vcs import common
+from mxdev.vcs.history import disk_size
+from mxdev.vcs.history import DurationHistory
+from utils import FakeWorkingCopy
+
+import json
+import queue
+
+
+def test_history_record_and_load(tmp_path):
+    path = tmp_path / "cache" / "durations.json"
+    history = DurationHistory(path)
+    assert history.expected("a", "checkout") is None
+    history.record(
+        [
+            common.TaskResult("a", "checkout", "ok", 10.0),
+            common.TaskResult("b", "checkout", "error", 99.0),
+            common.TaskResult("c", "skipped", "skipped"),
+        ]
+    )
+    history.save()
+    assert json.loads(path.read_text()) == {"a": {"checkout": 10.0}}
+
+    history = DurationHistory(path)
+    assert history.expected("a", "checkout") == 10.0
+    # the other action is the next best guess
+    assert history.expected("a", "update") == 10.0
+    history.record([common.TaskResult("a", "checkout", "ok", 20.0)])
+    assert history.expected("a", "checkout") == 15.0
+
+
+def test_history_broken_file(tmp_path):
+    path = tmp_path / "durations.json"
+    path.write_text("{broken")
+    assert DurationHistory(path).durations == {}
+
+
+def test_disk_size(tmp_path):
+    (tmp_path / "plain").mkdir()
+    (tmp_path / "plain" / "file").write_bytes(b"x" * 100)
+    assert disk_size(tmp_path / "plain") == 100
+    objects = tmp_path / "repo" / ".git" / "objects" / "pack"
+    objects.mkdir(parents=True)
+    (objects / "pack-1.pack").write_bytes(b"x" * 1000)
+    (tmp_path / "repo" / "README").write_bytes(b"x" * 10)
+    assert disk_size(tmp_path / "repo") == 1000
+    assert disk_size(tmp_path / "missing") == 0
+
+
+def test_history_schedule_longest_first(tmp_path):
+    history = DurationHistory(tmp_path / "durations.json")
+    history.durations = {"short": {"update": 1.0}, "long": {"update": 30.0}}
+    (tmp_path / "small").mkdir()
+    (tmp_path / "small" / "file").write_bytes(b"x")
+    (tmp_path / "big").mkdir()
+    (tmp_path / "big" / "file").write_bytes(b"x" * 1000)
+    tasks = [
+        ("short", "update", ""),
+        ("small", "update", str(tmp_path / "small")),
+        ("long", "update", ""),
+        ("big", "update", str(tmp_path / "big")),
+    ]
+    # unknown packages first, largest on disk first, then the longest known
+    assert [tasks[index][0] for index in history.schedule(tasks)] == ["big", "small", "long", "short"]
+
+
+def test_WorkingCopies_process_longest_first(tmp_path, mocker):
+    """Test tasks start longest expected first, results keep queue order, durations are saved."""
+    started = []
+
+    def checkout(wc, **kwargs):
+        started.append(wc.source["name"])
+        return wc.source["name"]
+
+    mocker.patch("sys.exit")
+    path = tmp_path / "durations.json"
+    history = DurationHistory(path)
+    history.durations = {"a": {"checkout": 1.0}, "b": {"checkout": 5.0}, "c": {"checkout": 3.0}}
+    # one worker thread runs the tasks exactly in the order they were submitted
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with common.WorkingCopies(sources={}, threads=2, executor=executor, history=history) as working_copies:
+            the_queue = queue.Queue()
+            for name in ("a", "b", "c"):
+                wc = FakeWorkingCopy({"name": name, "path": str(tmp_path / name), "checkout": checkout})
+                the_queue.put((wc, wc.checkout, {}))
+            results = working_copies.process(the_queue)
+    assert started == ["b", "c", "a"]
+    assert [result.output for result in results] == ["a", "b", "c"]
+    assert set(json.loads(path.read_text())) == {"a", "b", "c"}
@@ -0,0 +1,108 @@
+from mxdev.vcs import common
+from mxdev.vcs.retry import RetryPolicy
+from utils import FakeWorkingCopy
+
+import logging
+import pytest
+
+
+@pytest.mark.parametrize(
+    "message, transient",
+    [
+        ("git fetch of 'a' failed.\nerror: RPC failed; curl 56 Recv failure: Connection reset by peer", True),
+        ("fatal: unable to access 'https://x/': The requested URL returned error: 502", True),
+        ("fatal: unable to access 'https://x/': Could not resolve host: github.com", True),
+        ("fatal: the remote end hung up unexpectedly\nfatal: early EOF", True),
+        ("ssh: connect to host github.com port 22: Connection timed out", True),
+        ("remote: Internal Server Error\n503 Service Unavailable", True),
+        ("fatal: Authentication failed for 'https://github.com/org/repo.git/'", False),
+        ("Branch 'nope' for package 'a' does not exist at 'https://x'.", False),
+        ("Can't update package 'a' because it's dirty.", False),
+    ],
+)
+def test_is_transient(message, transient):
+    assert RetryPolicy().is_transient(message) is transient
+
+
+def test_delay_is_jittered_exponential():
+    policy = RetryPolicy(backoff=2.0, max_backoff=5.0)
+    for _ in range(20):
+        assert 1.0 <= policy.delay(1) <= 2.0
+        assert 2.0 <= policy.delay(2) <= 4.0
+        assert 2.5 <= policy.delay(5) <= 5.0
+
+
+class FlakyWorkingCopy(FakeWorkingCopy):
+    """Fails with the configured messages, then succeeds."""
+
+    def checkout(self, **kwargs):
+        self.output((common.logger.info, f"attempt of {self.source['name']}"))
+        if self.source["failures"]:
+            raise common.WCError(self.source["failures"].pop(0))
+        return "done"
+
+
+def test_run_task_retries_transient_failures(mocker, caplog):
+    caplog.set_level(logging.INFO)
+    sleep = mocker.patch("time.sleep")
+    working_copies = common.WorkingCopies(sources={}, threads=1, retry=RetryPolicy(attempts=3))
+    wc = FlakyWorkingCopy({"name": "a", "failures": ["git fetch of 'a' failed.\nConnection reset by peer"]})
+    result = working_copies.run_task(wc, wc.checkout, {})
+    assert (result.status, result.output, result.attempts) == ("ok", "done", 2)
+    assert not working_copies.errors
+    assert sleep.call_count == 1
+    assert "Checkout of 'a' failed (Connection reset by peer), retrying in" in caplog.text
+    assert "(attempt 2 of 3)" in caplog.text
+    # only the messages of the successful attempt are logged
+    assert caplog.messages.count("attempt of a") == 1
+
+
+def test_run_task_gives_up_after_attempts(mocker, caplog):
+    sleep = mocker.patch("time.sleep")
+    working_copies = common.WorkingCopies(sources={}, threads=1, retry=RetryPolicy(attempts=3))
+    wc = FlakyWorkingCopy({"name": "a", "failures": ["returned error: 502"] * 5})
+    result = working_copies.run_task(wc, wc.checkout, {})
+    assert (result.status, result.attempts) == ("error", 3)
+    assert sleep.call_count == 2
+    assert working_copies.errors
+
+
+def test_run_task_retries_checkout_from_scratch(mocker, tmp_path):
+    mocker.patch("time.sleep")
+    started = []
+
+    def checkout(wc, **kwargs):
+        path = tmp_path / "a"
+        # a checkout starts with a new directory, an existing one is updated
+        started.append("update" if path.exists() else "checkout")
+        path.mkdir(exist_ok=True)
+        (path / "partial").write_text("")
+        if len(started) == 1:
+            raise common.WCError("git submodule update failed.\nConnection reset by peer")
+        return started[-1]
+
+    working_copies = common.WorkingCopies(sources={}, threads=1, retry=RetryPolicy(attempts=3))
+    wc = FakeWorkingCopy({"name": "a", "path": str(tmp_path / "a"), "checkout": checkout})
+    result = working_copies.run_task(wc, wc.checkout, {})
+    assert (result.status, result.output, result.attempts) == ("ok", "checkout", 2)
+    assert started == ["checkout", "checkout"]
+
+    # an existing checkout is kept
+    started.clear()
+    assert working_copies.run_task(wc, wc.checkout, {}).status == "ok"
+    assert started == ["update", "update"]
+
+
+def test_run_task_does_not_retry_permanent_failures(mocker):
+    sleep = mocker.patch("time.sleep")
+    working_copies = common.WorkingCopies(sources={}, threads=1, retry=RetryPolicy(attempts=3))
+    wc = FlakyWorkingCopy({"name": "a", "failures": ["fatal: Authentication failed"]})
+    result = working_copies.run_task(wc, wc.checkout, {})
+    assert (result.status, result.attempts) == ("error", 1)
+    assert not sleep.called
+
+    # without a policy nothing is retried
+    working_copies = common.WorkingCopies(sources={}, threads=1)
+    wc = FlakyWorkingCopy({"name": "b", "failures": ["Connection reset by peer"]})
+    assert working_copies.run_task(wc, wc.checkout, {}).status == "error"
+    assert not sleep.called
@@ -0,0 +1,109 @@
+from mxdev.vcs import common
+from mxdev.vcs.toolchain import Toolchain
+
+import json
+import os
+import pytest
+
+
+@pytest.fixture
+def executable(tmp_path):
+    path = tmp_path / "bin" / "tool"
+    path.parent.mkdir()
+    path.write_text("#!/bin/sh\n")
+    return str(path)
+
+
+def test_executable_cached_per_search_path(monkeypatch):
+    toolchain = Toolchain()
+    calls = []
+
+    def find():
+        calls.append(os.environ["PATH"])
+        return f"{os.environ['PATH']}/tool"
+
+    monkeypatch.setenv("PATH", "/a")
+    assert toolchain.executable("tool", find) == "/a/tool"
+    assert toolchain.executable("tool", find) == "/a/tool"
+    monkeypatch.setenv("PATH", "/b")
+    assert toolchain.executable("tool", find) == "/b/tool"
+    assert calls == ["/a", "/b"]
+
+
+def test_missing_executable_not_cached():
+    toolchain = Toolchain()
+    results = iter([None, "/usr/bin/tool"])
+    assert toolchain.executable("tool", lambda: next(results)) is None
+    assert toolchain.executable("tool", lambda: next(results)) == "/usr/bin/tool"
+
+
+def test_version_probed_once_per_executable(executable):
+    toolchain = Toolchain()
+    calls = []
+
+    def probe():
+        calls.append(1)
+        return (2, 43, 0)
+
+    assert toolchain.version(executable, probe) == (2, 43, 0)
+    assert toolchain.version(executable, probe) == (2, 43, 0)
+    assert len(calls) == 1
+
+    # a changed executable is probed again
+    with open(executable, "a") as fio:
+        fio.write("exit 0\n")
+    assert toolchain.version(executable, lambda: (2, 44)) == (2, 44)
+
+
+def test_persist_and_save(tmp_path, executable):
+    cache = tmp_path / "cache" / "toolchain.json"
+    toolchain = Toolchain()
+    toolchain.persist(cache)
+    assert toolchain.version(executable, lambda: (1, 14, 2)) == (1, 14, 2)
+    toolchain.save()
+    assert list(json.loads(cache.read_text())["versions"].values()) == [[1, 14, 2]]
+
+    # the next process does not probe the unchanged executable
+    toolchain = Toolchain()
+    toolchain.persist(cache)
+    assert toolchain.version(executable, lambda: pytest.fail("probed")) == (1, 14, 2)
+
+    # versions of executables which are gone are dropped
+    other = tmp_path / "bin" / "other"
+    other.write_text("")
+    toolchain.version(str(other), lambda: (3,))
+    os.remove(executable)
+    toolchain.save()
+    versions = json.loads(cache.read_text())["versions"]
+    assert list(versions.values()) == [[3]]
+
+
+def test_persist_ignores_broken_file(tmp_path, executable):
+    cache = tmp_path / "toolchain.json"
+    cache.write_text("{broken")
+    toolchain = Toolchain()
+    toolchain.persist(cache)
+    assert toolchain.version(executable, lambda: (1,)) == (1,)
+
+
+def test_git_version_probed_once(mocker):
+    from mxdev.vcs.git import GitWorkingCopy
+
+    mocker.patch("mxdev.vcs.git.common.which", return_value="/usr/bin/git")
+    mocker.patch("mxdev.vcs.toolchain.Toolchain._version_key", return_value="/usr/bin/git:1:1")
+    mock_process = mocker.Mock()
+    mock_process.returncode = 0
+    mock_process.communicate.return_value = ("git version 2.43.0", "")
+    popen = mocker.patch("mxdev.vcs.git.subprocess.Popen", return_value=mock_process)
+
+    for name in ("a", "b", "c"):
+        wc = GitWorkingCopy({"name": name, "url": "https://example.com/repo.git", "path": "/tmp/x"})
+        assert wc.git_version() == (2, 43, 0)
+    assert popen.call_count == 1
+
+
+def test_which_cached(mocker):
+    find = mocker.patch("mxdev.vcs.common._find_executable", return_value="/usr/bin/hg")
+    assert common.which("hg") == "/usr/bin/hg"
+    assert common.which("hg") == "/usr/bin/hg"
+    assert find.call_count == 1
@@ -1,4 +1,5 @@
 from collections.abc import Iterable
+from mxdev.vcs.common import BaseWorkingCopy
 from mxdev.vcs.common import WorkingCopies
 from subprocess import PIPE
 from subprocess import Popen
@@ -218,3 +219,25 @@ def vcs_status(sources: dict[str, Any], verbose=False):
         res[k] = workingcopies.status(sources[k], verbose=verbose)
 
     return res
+
+
+class FakeWorkingCopy(BaseWorkingCopy):
+    """Working copy which runs no vcs commands, configured by its source.
+
+    ``source["checkout"]`` is called with the working copy and the keyword
+    arguments on checkout and update, its return value is the output.
+    ``source["status"]`` is the reported status, "clean" by default.
+    """
+
+    def checkout(self, **kwargs):
+        checkout = self.source.get("checkout")
+        return checkout(self, **kwargs) if checkout else None
+
+    def status(self, **kwargs):
+        return self.source.get("status", "clean")
+
+    def matches(self):
+        return True
+
+    def update(self, **kwargs):
+        return self.checkout(**kwargs)